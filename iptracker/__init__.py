@@ -0,0 +1,26 @@
+"""
+IP Tracker - Core package
+
+This package contains the IP Tracker tool. The core modules (lookup, cache, history, formatting, validation, offline, saved, export, analytics, ingest, sweep, providers, scheduler, metrics, profiling, server) do not depend on tkinter, thus the lookup engine can be used from scripts, servers and the command line interface without pulling in the graphical interface. The graphical interface (the gui module) is imported only when it is launched.
+
+Modules :
+1. iptracker.lookup - The pooled HTTP client for the ipinfo.io API, the cached lookup function and the bounded-concurrency pipeline for many lookups.
+2. iptracker.cache - The two-tier (in-memory LRU + SQLite) response cache.
+3. iptracker.history - The append-only history log, the indexed history store and the compact session history.
+4. iptracker.formatting - The helpers for reading lists of IP addresses and arranging the fetched information as text.
+5. iptracker.validation - The parsing, validation and normalization of the IP addresses (IPv4, IPv6, CIDR), with a vectorized path for the large batches.
+6. iptracker.offline - The offline lookup engine over a memory-mapped database of IP ranges.
+7. iptracker.saved - The store of the saved results.
+8. iptracker.export - The streaming exporters of the history and the results (CSV, NDJSON, and Parquet / Arrow IPC when pyarrow is installed).
+9. iptracker.analytics - The incrementally updated analytics of the overall history (top IP addresses, countries and organizations, lookups per hour), with the Count-Min and Space-Saving sketches.
+10. iptracker.ingest - The ingestion of the log files : the parallel extraction, counting and deduplication of the IP addresses feeding the lookups.
+11. iptracker.sweep - The sweep of the networks (CIDR), inferring the results of the hosts covered by the network range of a result instead of looking them up.
+12. iptracker.providers - The provider backends of the lookups (ipinfo.io, ip-api.com, any HTTP endpoint, the offline database) mapped to one normalized schema, and the hedged provider.
+13. iptracker.scheduler - The request scheduler (token bucket, Retry-After, jittered exponential backoff, priority lanes) in front of the HTTP layer.
+14. iptracker.metrics - The phase timing of the lookups, the rolling histograms and their export (Prometheus text, NDJSON trace).
+15. iptracker.profiling - The profiling mode : each action (menu command, lookup, startup phase, command) is profiled using cProfile and tracemalloc, with the summary of the slowest ones.
+16. iptracker.server - The local JSON API server exposing the lookups (single, batch and NDJSON streaming) to many clients over one shared cache and rate-limited client.
+17. iptracker.benchmark - The benchmark suite, along with the local stub server standing in for the ipinfo.io API.
+18. iptracker.cli - The command line interface.
+19. iptracker.gui - The tkinter graphical interface.
+"""
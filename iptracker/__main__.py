@@ -0,0 +1,11 @@
+"""
+IP Tracker - Entry point for 'python3 -m iptracker'
+"""
+
+import sys
+
+from iptracker.cli import run
+
+# The guard keeps the worker processes (like those of the log ingestion, when they are spawned) from running the command line interface again
+if __name__ == '__main__':
+	sys.exit(run())
@@ -0,0 +1,280 @@
+"""
+IP Tracker - Analytics
+
+This module contains the analytics of the overall history : the most queried IP addresses, the distribution of the lookups by country and by organization (ASN), and the number of lookups per hour. The aggregates are updated incrementally from the records appended to the history log, and kept in a small state file, thus rendering them does not depend on the size of the history. The unbounded keys (the IP addresses, the organizations) are counted using the heavy hitter sketches (Count-Min and Space-Saving), which use a fixed amount of memory.
+"""
+
+# Importing the required functions and modules
+from json import loads, dumps
+from hashlib import blake2b
+from datetime import datetime
+from threading import Lock
+from array import array
+import heapq
+import os
+
+from iptracker.history import history_log
+
+# The number of the latest hours for which the lookups per hour are kept
+HOURS = 168
+
+class CountMinSketch:
+	""" This class contains a Count-Min sketch : a fixed table of counters (depth rows of width counters), each key being counted in one counter per row. The estimated count of a key is the smallest of its counters, which is never below the true count and above it by at most a small share of the total. To count -> sketch.add(key), to estimate -> sketch.estimate(key). """
+
+	def __init__(self, width = 2048, depth = 4):
+		""" The constructor takes the number of the counters per row and the number of rows (at most 8). """
+
+		self.width = width
+		self.depth = depth
+		self.counters = array('Q', bytes(8 * width * depth))
+
+	def positions(self, key):
+		""" This method returns the positions of the counters of the key mentioned in the arguments, one per row. The hash is stable across the runs (unlike the built-in hash()), as the sketch is stored. """
+
+		digest = blake2b(key.encode(), digest_size = 4 * self.depth).digest()
+		return [row * self.width + int.from_bytes(digest[4 * row : 4 * row + 4], 'little') % self.width for row in range(self.depth)]
+
+	def add(self, key, count = 1):
+		""" This method adds the count mentioned in the arguments to the key. """
+
+		for position in self.positions(key):
+			self.counters[position] += count
+
+	def estimate(self, key):
+		""" This method returns the estimated count of the key. """
+
+		return min(self.counters[position] for position in self.positions(key))
+
+	def state(self):
+		""" This method returns the sketch as a JSON serializable dict. """
+
+		return {"width" : self.width, "depth" : self.depth, "counters" : self.counters.tolist()}
+
+	@classmethod
+	def fromState(cls, state):
+		""" This method returns the sketch stored using state(). """
+
+		sketch = cls(state["width"], state["depth"])
+		sketch.counters = array('Q', state["counters"])
+		return sketch
+
+class SpaceSaving:
+	""" This class contains a Space-Saving sketch of the most frequent keys (the heavy hitters). At most capacity keys are tracked : a new key replaces the key with the smallest count and inherits its count (kept as the error bound of the new key). Every key whose true count is above total / capacity is guaranteed to be tracked. To count -> sketch.add(key), to list -> sketch.top(count).
+
+	The key with the smallest count is found using a min-heap holding one (count, key) entry per tracked key. The counts of the heap are refreshed lazily : an increment leaves the entry of the key behind, and the entry is fixed only when it reaches the top of the heap. """
+
+	def __init__(self, capacity = 256):
+		""" The constructor takes the maximum number of the keys tracked. """
+
+		self.capacity = capacity
+		self.counts = {}
+		self.errors = {}
+		self.heap = []
+
+	def add(self, key, count = 1):
+		""" This method adds the count mentioned in the arguments to the key. """
+
+		if key in self.counts:
+			self.counts[key] += count
+		elif len(self.counts) < self.capacity:
+			self.counts[key] = count
+			self.errors[key] = 0
+			heapq.heappush(self.heap, (count, key))
+		else:
+			# If the sketch is full, then the key replaces the key with the smallest count. The outdated entries met on the top of the heap are refreshed first.
+			while self.heap[0][0] != self.counts[self.heap[0][1]]:
+				heapq.heapreplace(self.heap, (self.counts[self.heap[0][1]], self.heap[0][1]))
+			floor, smallest = heapq.heappop(self.heap)
+			del self.counts[smallest], self.errors[smallest]
+			self.counts[key] = floor + count
+			self.errors[key] = floor
+			heapq.heappush(self.heap, (floor + count, key))
+
+	def top(self, count = 10):
+		""" This method returns the most frequent keys as a list of tuples (key, count, error), from the most to the least frequent. The true count of a key lies between count - error and count. """
+
+		keys = sorted(self.counts, key = self.counts.get, reverse = True)[:count]
+		return [(key, self.counts[key], self.errors[key]) for key in keys]
+
+	def floor(self):
+		""" This method returns the count any key not tracked may have reached : the smallest count tracked once the sketch is full, or 0 while it is not. A tracked key whose guaranteed count (count - error) is not above the floor may be no more frequent than the keys evicted. """
+
+		return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+	def state(self):
+		""" This method returns the sketch as a JSON serializable dict. """
+
+		return {"capacity" : self.capacity, "counts" : self.counts, "errors" : self.errors}
+
+	@classmethod
+	def fromState(cls, state):
+		""" This method returns the sketch stored using state(). """
+
+		sketch = cls(state["capacity"])
+		sketch.counts = dict(state["counts"])
+		sketch.errors = dict(state["errors"])
+		sketch.heap = [(count, key) for key, count in sketch.counts.items()]
+		heapq.heapify(sketch.heap)
+		return sketch
+
+# Defining the history analytics
+# ----
+# 1. The aggregates are built from the overall history log, whose records hold the key fields of the response (country and org) along with the IP address and the timestamp. Like the indexed history store, the analytics remember up to which byte of the log they have read, thus only the newly appended records are read on each refresh. If the log has been replaced (compacted or cleared), then the aggregates are rebuilt from scratch.
+# 2. The countries are counted exactly (there are only a few hundred of them). The IP addresses and the organizations are counted using a Space-Saving sketch (the top ones), and the IP addresses also using a Count-Min sketch (the estimated count of any address).
+# 3. The lookups are counted per hour for the latest week, and per hour of the day overall.
+# 4. The aggregates are stored in a JSON state file named 'analytics.json' in the current working directory, replaced atomically after each refresh which read new records.
+# ----
+class Analytics:
+	""" This class contains the analytics of the overall history. Below are some of the steps to use the analytics :
+	* To fetch the aggregates -> analytics.snapshot(top = 10), returns a dict (the records appended to the log since the last call are read first)
+	* To estimate how many times an IP address was looked up -> analytics.estimate(ipAddress) """
+
+	def __init__(self, log, filename = 'analytics.json'):
+		""" The constructor takes the history log to be read and the filename of the state file. The state file is loaded lazily on the first access. """
+
+		self.log = log
+		self.filename = filename
+		self.lock = Lock()
+		self.loaded = False
+		self.reset()
+
+	def reset(self):
+		""" This method empties the aggregates. """
+
+		self.inode, self.offset = None, 0
+		self.total = 0
+		self.ips = SpaceSaving(256)
+		self.ipCounts = CountMinSketch()
+		self.orgs = SpaceSaving(256)
+		self.countries = {}
+		self.hours = {}
+		self.hourOfDay = [0] * 24
+
+	def load(self):
+		""" This method loads the aggregates from the state file (if any). The caller must hold the lock. """
+
+		self.loaded = True
+		try:
+			with open(self.filename, 'r') as file:
+				state = loads(file.read())
+			self.inode, self.offset, self.total = state["inode"], state["offset"], state["total"]
+			self.ips = SpaceSaving.fromState(state["ips"])
+			self.ipCounts = CountMinSketch.fromState(state["ip_counts"])
+			self.orgs = SpaceSaving.fromState(state["orgs"])
+			self.countries = state["countries"]
+			self.hours = {int(hour) : count for hour, count in state["hours"].items()}
+			self.hourOfDay = state["hour_of_day"]
+		except (OSError, ValueError, KeyError, TypeError):
+			# If the state file is missing or unreadable, then we rebuild the aggregates from the log
+
+			self.reset()
+
+	def save(self):
+		""" This method writes the aggregates to the state file. The file is replaced atomically. The caller must hold the lock. """
+
+		state = {
+			"inode" : self.inode,
+			"offset" : self.offset,
+			"total" : self.total,
+			"ips" : self.ips.state(),
+			"ip_counts" : self.ipCounts.state(),
+			"orgs" : self.orgs.state(),
+			"countries" : self.countries,
+			"hours" : self.hours,
+			"hour_of_day" : self.hourOfDay,
+		}
+		temporary = self.filename + '.tmp'
+		with open(temporary, 'w') as file:
+			file.write(dumps(state, separators = (',', ':')))
+		os.replace(temporary, self.filename)
+
+	def update(self, item):
+		""" This method adds a history record (dict, with the keys ip, timestamp, and optionally country and org) to the aggregates. """
+
+		ipAddress, timestamp = str(item["ip"]), float(item["timestamp"])
+		self.total += 1
+		self.ips.add(ipAddress)
+		self.ipCounts.add(ipAddress)
+		if item.get("country"):
+			self.countries[item["country"]] = self.countries.get(item["country"], 0) + 1
+		if item.get("org"):
+			self.orgs.add(item["org"])
+
+		hour = int(timestamp // 3600)
+		self.hours[hour] = self.hours.get(hour, 0) + 1
+		if len(self.hours) > HOURS:
+			# Dropping the hours older than the latest week
+			latest = max(self.hours)
+			for old in [old for old in self.hours if old <= latest - HOURS]:
+				del self.hours[old]
+		self.hourOfDay[datetime.fromtimestamp(timestamp).hour] += 1
+
+	def refresh(self):
+		""" This method adds the records appended to the log since the last refresh to the aggregates, and stores them. The caller must hold the lock. """
+
+		if not self.loaded:
+			self.load()
+		self.log.flush()
+		try:
+			status = os.stat(self.log.filename)
+		except FileNotFoundError:
+			status = None
+
+		if status is None or status.st_ino != self.inode or status.st_size < self.offset:
+			# If the log has been replaced (or removed), then we rebuild the aggregates from scratch
+
+			self.reset()
+			self.inode = status.st_ino if status else 0
+		if status is None or status.st_size == self.offset:
+			return
+
+		with open(self.log.filename, 'rb') as file:
+			file.seek(self.offset)
+			for line in file:
+				if not line.endswith(b'\n'):
+					# If the last record is still being written, then we leave it for the next refresh
+
+					break
+				self.offset += len(line)
+				try:
+					self.update(loads(line))
+				except (ValueError, KeyError, TypeError):
+					continue
+		self.save()
+
+	def estimate(self, ipAddress):
+		""" This method returns the estimated number of the lookups of the IP address mentioned in the arguments (never below the true number). """
+
+		with self.lock:
+			self.refresh()
+			return self.ipCounts.estimate(ipAddress)
+
+	def heavyHitters(self, sketch, top, estimate = None):
+		""" This method returns the heavy hitters of the Space-Saving sketch mentioned in the arguments as a list of [key, count], from the most to the least frequent. Only the keys whose guaranteed count rises above the floor of the sketch are listed. The count is the estimate function of the key if specified (never above the upper bound of the sketch), else the guaranteed count. """
+
+		floor = sketch.floor()
+		hitters = []
+		for key, count, error in sketch.top(len(sketch.counts)):
+			if count - error > floor:
+				hitters.append([key, min(count, estimate(key)) if estimate is not None else count - error])
+		hitters.sort(key = lambda item : item[1], reverse = True)
+		return hitters[:top]
+
+	def snapshot(self, top = 10):
+		""" This method returns the aggregates as a dict : the total number of lookups, the top IP addresses, countries and organizations (as lists of [key, count], the heavy hitters of the sketches being listed only when they are known to be such, see heavyHitters()), the lookups per hour over the latest 24 hours (as a list of [hour, count], the hour in ISO 8601), the lookups in the latest hour and the lookups per hour of the day. Its cost depends only on the size of the aggregates, not on the size of the history. """
+
+		with self.lock:
+			self.refresh()
+			now = int(datetime.now().timestamp() // 3600)
+			return {
+				"total" : self.total,
+				"top_ips" : self.heavyHitters(self.ips, top, self.ipCounts.estimate),
+				"countries" : sorted(self.countries.items(), key = lambda item : item[1], reverse = True)[:top],
+				"orgs" : self.heavyHitters(self.orgs, top),
+				"hourly" : [[datetime.fromtimestamp(hour * 3600).isoformat(timespec = 'minutes'), self.hours.get(hour, 0)] for hour in range(now - 23, now + 1)],
+				"last_hour" : self.hours.get(now, 0),
+				"hour_of_day" : list(self.hourOfDay),
+			}
+
+# The analytics are built from the overall history log
+analytics = Analytics(history_log)
@@ -0,0 +1,320 @@
+"""
+IP Tracker - Benchmarks
+
+This module contains the benchmark suite of the tool, built around a local stub server standing in for the ipinfo.io API. The stub server answers with canned ipinfo-style JSON responses, after a configurable latency, and fails a configurable share of the requests with errors (HTTP 500) and rate limits (HTTP 429 with a Retry-After header). Thus, the lookups can be measured without touching the live API, and the numbers do not depend on the network.
+
+The suite measures :
+1. single - The latency of one lookup at a time, both for the requests to the server (cache misses) and for the cache hits.
+2. batch - The throughput of the batch lookups (lookupMany) at different levels of concurrency.
+3. history - The cost of recording the lookups to the history log, the cost of the save path on exit (closing the log) and of indexing the log.
+4. render - The time of arranging a result as text, and (if a display is available) of displaying it in a result pane and of appending rows to the results table.
+
+The results are emitted as one JSON document, so that they can be stored and compared over time. To run the suite -> python3 main.py benchmark [--output FILE], or runBenchmarks() from a script.
+"""
+
+# Importing the required functions and modules
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from ipaddress import IPv4Address
+from threading import Thread, Lock
+from time import perf_counter, sleep
+from datetime import datetime
+from contextlib import contextmanager
+from tempfile import TemporaryDirectory
+from json import dumps
+import os
+import random
+import platform
+
+import iptracker.lookup
+from iptracker.lookup import ConnectionPool, SingleFlight, lookupIp, lookupMany
+from iptracker.cache import ResponseCache
+from iptracker.scheduler import RequestScheduler
+from iptracker.providers import IpinfoProvider
+from iptracker.history import HistoryLog, HistoryIndex
+from iptracker.formatting import formatText
+
+# The canned response served by the stub server, the same shape as that of the ipinfo.io API
+CANNED_RESPONSE = {
+	"hostname" : "host.example.net",
+	"city" : "Mountain View",
+	"region" : "California",
+	"country" : "US",
+	"loc" : "37.4056,-122.0775",
+	"org" : "AS15169 Google LLC",
+	"postal" : "94043",
+	"timezone" : "America/Los_Angeles",
+}
+
+# Defining the stub server
+# ----
+# 1. The server is a threaded HTTP/1.1 server (keep-alive, like the ipinfo.io API) listening on the loopback interface, on a free port by default.
+# 2. Each request is delayed by the latency (plus a uniform jitter), and then fails with an HTTP 429 (rate limit) or an HTTP 500 (error) at the configured rates, or else gets the canned response for the requested IP address.
+# 3. The server counts the requests served per HTTP status, so that the benchmarks can report how many requests actually reached it.
+# ----
+class StubServer:
+	""" This class contains the local stub server standing in for the ipinfo.io API. Below are some of the steps to use the server :
+	* To start the server -> server = StubServer(latency = 0.02, errorRate = 0.01, rateLimitRate = 0.01).start()
+	* To point the lookups at it -> with stubbed(server): ... (see stubbed())
+	* To fetch the number of requests served per status -> server.stats()
+	* To stop the server -> server.stop() """
+
+	def __init__(self, latency = 0.0, jitter = 0.0, errorRate = 0.0, rateLimitRate = 0.0, retryAfter = 1, port = 0, seed = None):
+		""" The constructor takes the latency and the jitter of the responses (in seconds), the shares (0 to 1) of the requests failing with errors and with rate limits, the Retry-After value (in seconds) sent along with the rate limits, the port (0 for a free port) and the seed of the random failures. """
+
+		self.latency = latency
+		self.jitter = jitter
+		self.errorRate = errorRate
+		self.rateLimitRate = rateLimitRate
+		self.retryAfter = retryAfter
+		self.random = random.Random(seed)
+		self.lock = Lock()
+		self.counters = {}
+		self.server = ThreadingHTTPServer(('127.0.0.1', port), self.handler())
+		self.server.daemon_threads = True
+		self.thread = None
+
+	@property
+	def host(self):
+		""" This property returns the 'host:port' of the server, as expected by the ConnectionPool class. """
+
+		return f'127.0.0.1:{self.server.server_address[1]}'
+
+	def handler(self):
+		""" This method returns the request handler class bound to this server. """
+
+		stub = self
+
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = 'HTTP/1.1'
+			disable_nagle_algorithm = True  # The headers and the body are written separately, thus Nagle's algorithm would add the delayed-ACK wait to each response
+
+			def do_GET(self):
+				status, headers, body = stub.respond(self.path)
+				self.send_response(status)
+				self.send_header('Content-Type', 'application/json; charset=utf-8')
+				self.send_header('Content-Length', str(len(body)))
+				for key, value in headers.items():
+					self.send_header(key, value)
+				self.end_headers()
+				self.wfile.write(body)
+
+			def log_message(self, format, *arguments):
+				# The requests are not logged to the console
+				pass
+
+		return Handler
+
+	def respond(self, path):
+		""" This method returns the tuple (status, headers, body) of the response for the path mentioned in the arguments, after the configured latency. """
+
+		with self.lock:
+			chance = self.random.random()
+			delay = self.latency + self.random.uniform(0, self.jitter)
+		if delay > 0:
+			sleep(delay)
+
+		if chance < self.rateLimitRate:
+			status, headers, body = 429, {"Retry-After" : str(self.retryAfter)}, {"error" : {"title" : "Rate limit exceeded", "message" : "Too many requests, retry later."}}
+		elif chance < self.rateLimitRate + self.errorRate:
+			status, headers, body = 500, {}, {"error" : {"title" : "Internal error", "message" : "The stub server failed this request on purpose."}}
+		else:
+			status, headers, body = 200, {}, dict(CANNED_RESPONSE, ip = path.strip('/').split('?')[0])
+
+		with self.lock:
+			self.counters[status] = self.counters.get(status, 0) + 1
+		return status, headers, dumps(body).encode()
+
+	def start(self):
+		""" This method starts serving the requests in a background thread, and returns the server itself. """
+
+		self.thread = Thread(target = self.server.serve_forever, name = 'stub-server', daemon = True)
+		self.thread.start()
+		return self
+
+	def stats(self):
+		""" This method returns the number of the requests served per HTTP status (the keys are strings, for the JSON output), and resets the counters. """
+
+		with self.lock:
+			stats = {str(status) : count for status, count in sorted(self.counters.items())}
+			self.counters = {}
+		return stats
+
+	def stop(self):
+		""" This method stops the server. """
+
+		self.server.shutdown()
+		self.server.server_close()
+
+@contextmanager
+def stubbed(server, directory, rate = None, burst = 10, retries = 0):
+	""" This function (a context manager) points the lookups at the stub server mentioned in the arguments, with a fresh response cache (stored in the directory mentioned in the arguments), a fresh request coalescing layer and a provider with its own connection pool and request scheduler (no rate limit and no retries by default, so that the raw behaviour is measured). The originals are restored on exit, thus the benchmarks never touch the live API or the cache of the user. """
+
+	original = (iptracker.lookup.provider, iptracker.lookup.cache, iptracker.lookup.flight)
+	iptracker.lookup.provider = IpinfoProvider(pool = ConnectionPool(host = server.host, maxIdle = 64), scheduler = RequestScheduler(rate = rate, burst = burst, retries = retries, backoff = 0.05))
+	iptracker.lookup.cache = ResponseCache(filename = os.path.join(directory, 'cache.db'))
+	iptracker.lookup.flight = SingleFlight()
+	try:
+		yield
+	finally:
+		iptracker.lookup.provider.close()
+		iptracker.lookup.provider, iptracker.lookup.cache, iptracker.lookup.flight = original
+
+def publicIps(count, start = '11.0.0.0'):
+	""" This function returns the list of the distinct public IPv4 addresses mentioned in the arguments (count), starting from the start address. Distinct addresses make each lookup a cache miss. """
+
+	start = int(IPv4Address(start))
+	return [str(IPv4Address(start + index)) for index in range(count)]
+
+def percentiles(samples):
+	""" This function returns the summary (count, mean, p50, p95, p99, max in milliseconds) of the durations (in seconds) mentioned in the arguments. """
+
+	if len(samples) == 0:
+		return {"count" : 0}
+	samples = sorted(samples)
+
+	def at(fraction):
+		return round(samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000, 3)
+
+	return {"count" : len(samples), "mean_ms" : round(sum(samples) / len(samples) * 1000, 3), "p50_ms" : at(0.50), "p95_ms" : at(0.95), "p99_ms" : at(0.99), "max_ms" : round(samples[-1] * 1000, 3)}
+
+def benchmarkSingle(server, count = 200):
+	""" This function measures the latency of the single lookups, one at a time : first for the distinct IP addresses (cache misses, each one is a request to the server), and then for the same IP addresses again (cache hits). """
+
+	results = {}
+	ipAddresses = publicIps(count, start = '11.0.0.0')
+	for name in ('miss', 'hit'):
+		samples, errors = [], 0
+		for ipAddress in ipAddresses:
+			startTime = perf_counter()
+			try:
+				lookupIp(ipAddress)
+			except Exception:
+				errors += 1
+			samples.append(perf_counter() - startTime)
+		results[name] = percentiles(samples)
+		results[name]["errors"] = errors
+		results[name]["server"] = server.stats()
+	return results
+
+def benchmarkBatch(server, count = 1000, concurrency = (1, 4, 8, 16, 32)):
+	""" This function measures the throughput of the batch lookups (lookupMany) at each level of concurrency mentioned in the arguments. Each level resolves its own distinct IP addresses, thus all the lookups are cache misses. """
+
+	results = []
+	for number, workers in enumerate(concurrency):
+		ipAddresses = publicIps(count, start = str(IPv4Address('12.0.0.0') + number * count))
+		errors = 0
+		startTime = perf_counter()
+		for ipAddress, response, age, error in lookupMany(ipAddresses, workers = workers):
+			errors += error is not None
+		elapsed = perf_counter() - startTime
+		results.append({"concurrency" : workers, "lookups" : count, "seconds" : round(elapsed, 4), "lookups_per_sec" : round(count / elapsed, 1), "errors" : errors, "server" : server.stats()})
+	return results
+
+def benchmarkHistory(directory, count = 10000):
+	""" This function measures the cost of recording the lookups to the history log (per record), the save path on exit (closing the log, which syncs it to the disk) and the indexing of the log by the history store. """
+
+	filename = os.path.join(directory, 'history.jsonl')
+	log = HistoryLog(filename = filename, legacyFilename = os.path.join(directory, 'data.json'))
+	ipAddresses = publicIps(count)
+	now = datetime.now().timestamp()
+
+	startTime = perf_counter()
+	for index, ipAddress in enumerate(ipAddresses):
+		log.append({"ip" : ipAddress, "timestamp" : now + index})
+	appendTime = perf_counter() - startTime
+
+	startTime = perf_counter()
+	log.close()
+	closeTime = perf_counter() - startTime
+
+	index = HistoryIndex(log, filename = os.path.join(directory, 'history.db'))
+	startTime = perf_counter()
+	index.query(limit = 1)
+	indexTime = perf_counter() - startTime
+
+	startTime = perf_counter()
+	index.query(limit = 50)
+	queryTime = perf_counter() - startTime
+
+	return {"records" : count, "append_us_per_record" : round(appendTime / count * 1e6, 3), "exit_save_ms" : round(closeTime * 1000, 3), "index_build_ms" : round(indexTime * 1000, 3), "page_query_ms" : round(queryTime * 1000, 3), "file_bytes" : os.path.getsize(filename)}
+
+def benchmarkRender(count = 1000, rows = 10000):
+	""" This function measures the time of arranging a result as text, and (if a display is available) the time of displaying a result in a result pane and of appending rows to the virtualized results table. The tkinter parts are reported as skipped if there is no display. """
+
+	response = dict(CANNED_RESPONSE, ip = '11.0.0.1')
+	samples = []
+	for index in range(count):
+		startTime = perf_counter()
+		formatText(response)
+		samples.append(perf_counter() - startTime)
+	results = {"format_text" : percentiles(samples)}
+
+	try:
+		from tkinter import Tk, TclError
+	except ImportError as e:
+		results["tk"] = {"skipped" : f'{e}'}
+		return results
+
+	try:
+		window = Tk()
+	except TclError as e:
+		# If there is no display available, then we skip the tkinter measurements
+
+		results["tk"] = {"skipped" : f'{e}'}
+		return results
+
+	try:
+		from iptracker import gui
+
+		gui.win = gui.theme.window(window)
+		gui.theme.styleTtk()
+		text = formatText(response)
+		samples = []
+		for index in range(count // 10 or 1):
+			startTime = perf_counter()
+			pane = gui.result_panes.acquire()
+			pane.show('Information about the IP address', text, status = 'Fetched from ipinfo.io just now')
+			window.update_idletasks()
+			samples.append(perf_counter() - startTime)
+			pane.close()
+		results["tk"] = {"result_pane" : percentiles(samples)}
+
+		table = gui.VirtualTable(window, gui.BatchLookup.columns)
+		table.frame.pack()
+		row = ('11.0.0.1',) + tuple(response.get(column, '') for column in gui.BatchLookup.columns[1:-1]) + ('',)
+		startTime = perf_counter()
+		for index in range(rows):
+			table.append(row)
+		window.update()
+		elapsed = perf_counter() - startTime
+		results["tk"]["table_append"] = {"rows" : rows, "seconds" : round(elapsed, 4), "rows_per_sec" : round(rows / elapsed, 1)}
+	finally:
+		window.destroy()
+	return results
+
+def runBenchmarks(latency = 0.02, jitter = 0.005, errorRate = 0.0, rateLimitRate = 0.0, single = 200, batch = 1000, concurrency = (1, 4, 8, 16, 32), history = 10000, render = 1000, rate = None, retries = 0, suites = ('single', 'batch', 'history', 'render')):
+	""" This function runs the benchmark suites mentioned in the arguments against a fresh stub server (with the latency, the jitter and the failure rates mentioned in the arguments), and returns the results as a dict, ready to be dumped as JSON. The sizes of the suites (number of lookups, records, renders) can be adjusted through the arguments, along with the rate limit and the retries of the request scheduler (none by default). """
+
+	report = {
+		"benchmark" : "iptracker",
+		"timestamp" : datetime.now().isoformat(timespec = 'seconds'),
+		"python" : platform.python_version(),
+		"platform" : platform.platform(),
+		"config" : {"latency" : latency, "jitter" : jitter, "error_rate" : errorRate, "rate_limit_rate" : rateLimitRate, "single" : single, "batch" : batch, "concurrency" : list(concurrency), "history" : history, "render" : render, "rate" : rate, "retries" : retries},
+		"results" : {},
+	}
+	server = StubServer(latency = latency, jitter = jitter, errorRate = errorRate, rateLimitRate = rateLimitRate, seed = 0).start()
+	try:
+		with TemporaryDirectory(prefix = 'iptracker-benchmark-') as directory:
+			with stubbed(server, directory, rate = rate, burst = max(1, int(rate or 1)), retries = retries):
+				if 'single' in suites:
+					report["results"]["single"] = benchmarkSingle(server, single)
+				if 'batch' in suites:
+					report["results"]["batch"] = benchmarkBatch(server, batch, concurrency)
+			if 'history' in suites:
+				report["results"]["history"] = benchmarkHistory(directory, history)
+	finally:
+		server.stop()
+	if 'render' in suites:
+		report["results"]["render"] = benchmarkRender(render)
+	return report
@@ -0,0 +1,138 @@
+"""
+IP Tracker - Response cache
+
+This module contains the two-tier response cache which sits in front of the ipinfo.io requests.
+"""
+
+# Importing the required functions and modules
+from json import loads, dumps
+from datetime import datetime
+from threading import Lock
+from collections import OrderedDict
+import sqlite3
+
+from iptracker.validation import normalizeIp
+
+# Defining the response cache which sits in front of the ipinfo.io requests
+# ----
+# 1. The cache has two tiers : an in-memory LRU (least recently used) tier and an on-disk tier stored in a SQLite database file named 'cache.db' in the current working directory. The in-memory tier is checked first, then the on-disk tier, and only then the request is sent to the server.
+# 2. The entries are keyed by the normalized IP address and expire after the configured TTL (time to live, in seconds). Both the tiers evict the oldest entries once they reach their configured maximum size.
+# 3. The cache is shared by the worker threads of the lookup engine, thus all the accesses are guarded by a lock.
+# ----
+class ResponseCache:
+	""" This class contains the two-tier response cache of the application. Below are some of the steps to use the cache :
+	* To fetch a cached response -> cache.get(ipAddress), returns the tuple (response, age in seconds) or None on a miss
+	* To store a response -> cache.put(ipAddress, response)
+	* To clear the cache -> cache.clear()
+	* To fetch the hit / miss counters -> cache.stats() """
+
+	def __init__(self, filename = 'cache.db', ttl = 86400, maxMemoryEntries = 1024, maxDiskEntries = 100000):
+		""" The constructor takes the filename of the on-disk tier, the TTL of the entries (in seconds) and the maximum number of entries for both the tiers. The database file is opened lazily on the first access. """
+
+		self.filename = filename
+		self.ttl = ttl
+		self.maxMemoryEntries = maxMemoryEntries
+		self.maxDiskEntries = maxDiskEntries
+		self.memory = OrderedDict()
+		self.connection = None
+		self.lock = Lock()
+		self.writes = 0
+		self.counters = {"memory_hits" : 0, "disk_hits" : 0, "misses" : 0, "evictions" : 0}
+
+	def database(self):
+		""" This method returns the connection to the on-disk tier, opening (and creating the table if required) on the first call. """
+
+		if self.connection is None:
+			self.connection = sqlite3.connect(self.filename, check_same_thread = False)
+			self.connection.execute('CREATE TABLE IF NOT EXISTS cache (ip TEXT PRIMARY KEY, response TEXT NOT NULL, timestamp REAL NOT NULL)')
+			self.connection.execute('CREATE INDEX IF NOT EXISTS cache_timestamp ON cache (timestamp)')
+			self.connection.commit()
+		return self.connection
+
+	def get(self, ipAddress):
+		""" This method returns the cached response of the IP address mentioned in the arguments along with its age (in seconds) as a tuple, or None if the IP address is not cached (or the cached entry has expired). """
+
+		key = normalizeIp(ipAddress)
+		now = datetime.now().timestamp()
+		with self.lock:
+			# Checking the in-memory tier first
+			item = self.memory.get(key)
+			if item is not None:
+				response, timestamp = item
+				if now - timestamp < self.ttl:
+					self.memory.move_to_end(key)
+					self.counters["memory_hits"] += 1
+					return response, now - timestamp
+				del self.memory[key]
+
+			# Checking the on-disk tier
+			try:
+				row = self.database().execute('SELECT response, timestamp FROM cache WHERE ip = ?', (key,)).fetchone()
+			except sqlite3.Error:
+				# If the on-disk tier is unusable, then we continue as a miss
+
+				row = None
+			if row is not None and now - row[1] < self.ttl:
+				response, timestamp = loads(row[0]), row[1]
+				self.remember(key, response, timestamp)
+				self.counters["disk_hits"] += 1
+				return response, now - timestamp
+
+			self.counters["misses"] += 1
+			return None
+
+	def put(self, ipAddress, response):
+		""" This method stores the response of the IP address mentioned in the arguments into both the tiers of the cache. """
+
+		key = normalizeIp(ipAddress)
+		timestamp = datetime.now().timestamp()
+		with self.lock:
+			self.remember(key, response, timestamp)
+			try:
+				connection = self.database()
+				connection.execute('INSERT OR REPLACE INTO cache (ip, response, timestamp) VALUES (?, ?, ?)', (key, dumps(response), timestamp))
+
+				# Evicting the expired and the oldest entries from the on-disk tier once in every 100 writes
+				self.writes += 1
+				if self.writes % 100 == 0:
+					cursor = connection.execute('DELETE FROM cache WHERE timestamp < ? OR ip NOT IN (SELECT ip FROM cache ORDER BY timestamp DESC LIMIT ?)', (timestamp - self.ttl, self.maxDiskEntries))
+					self.counters["evictions"] += cursor.rowcount
+				connection.commit()
+			except sqlite3.Error:
+				# If the on-disk tier is unusable, then we continue with the in-memory tier only
+
+				pass
+
+	def remember(self, key, response, timestamp):
+		""" This method stores an entry into the in-memory tier, evicting the least recently used entries once the tier is full. The caller must hold the lock. """
+
+		self.memory[key] = (response, timestamp)
+		self.memory.move_to_end(key)
+		while len(self.memory) > self.maxMemoryEntries:
+			self.memory.popitem(last = False)
+			self.counters["evictions"] += 1
+
+	def clear(self):
+		""" This method removes all the entries from both the tiers of the cache. """
+
+		with self.lock:
+			self.memory.clear()
+			self.database().execute('DELETE FROM cache')
+			self.connection.commit()
+
+	def stats(self):
+		""" This method returns the hit / miss counters of the cache along with the number of entries in each tier. """
+
+		with self.lock:
+			stats = dict(self.counters)
+			stats["memory_entries"] = len(self.memory)
+			try:
+				stats["disk_entries"] = self.database().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+			except sqlite3.Error:
+				stats["disk_entries"] = 0
+		lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+		stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups > 0 else 0
+		return stats
+
+# The response cache is shared by all the lookups of the application
+cache = ResponseCache()
@@ -0,0 +1,448 @@
+"""
+IP Tracker - Command line interface
+
+This module contains the headless command line interface of the tool. Below are listed the commands served :
+1. python3 main.py                          -> Launches the graphical interface (same as the 'gui' command)
+2. python3 main.py lookup IP [IP ...]       -> Looks up the IP addresses and prints the results as JSON (or NDJSON / CSV using --format ndjson / csv)
+3. python3 main.py batch FILE               -> Looks up the IP addresses listed in a text / CSV file concurrently and streams the results as NDJSON (or CSV using --format csv)
+4. python3 main.py batch -                  -> Same as above, but the IP addresses are streamed from the standard input
+5. python3 main.py offline-import CSV FILE  -> Imports the ranges of IP addresses (start, end, country, city, org) from a CSV file into an offline database file
+6. --offline FILE (lookup, batch)           -> Resolves the IP addresses locally from the offline database file, instead of ipinfo.io
+7. --provider SPEC, --hedge SPEC (lookup, batch) -> Chooses the provider of the lookups (ipinfo, ip-api, server:HOST:PORT, offline:FILE, or any http(s) endpoint), and optionally hedges the slow lookups with a second provider
+8. --rate N, --burst N, --retries N (lookup, batch) -> Sets the limits of the request scheduler
+9. --save (lookup, batch)                   -> Also saves the successful results to the saved results store
+10. --metrics FILE, --trace FILE (lookup, batch) -> Writes the phase timings of the lookups as a Prometheus text file, or traces each lookup to an NDJSON file
+11. python3 main.py saved IP [IP ...]       -> Prints the saved results of the IP addresses as JSON
+12. python3 main.py benchmark               -> Runs the benchmark suite against a local stub server and prints the results as JSON
+13. python3 main.py stub-server             -> Runs the local stub server (standing in for ipinfo.io) in the foreground
+14. python3 main.py export history|saved FILE -> Streams the overall history or the saved results to a CSV, NDJSON, Parquet or Arrow IPC file (the format is inferred from the extension, or set using --format)
+15. python3 main.py analytics                 -> Prints the analytics of the overall history (top IP addresses, countries and organizations, lookups per hour) as JSON
+16. python3 main.py ingest LOG              -> Extracts the IP addresses from a log file (or '-' for the standard input) in parallel, and looks up the unique public ones while the log is still being parsed (the same options as batch, plus --counts FILE and --no-lookup)
+17. python3 main.py sweep CIDR              -> Looks up the hosts of a network, inferring the results of the hosts covered by the network range of a result instead of looking them up, and reports the upstream calls saved (the same options as batch, plus --assume-prefix N)
+18. python3 main.py serve                   -> Serves the lookups as a local JSON API (GET /lookup/IP, POST /batch, POST /stream as NDJSON, GET /stats) backed by one shared cache and rate-limited client, for many concurrent clients (main.py gui --server HOST:PORT uses it as the backend)
+19. --profile DIR (before the command)     -> Profiles each action (the startup phases, menu commands and lookups of the graphical interface, or the whole command) using cProfile and tracemalloc, and writes the .pstats files and the memory snapshots to the directory
+
+The core modules are imported only by the commands which need them, and tkinter only by the 'gui' command, so that the cold start of the command line interface stays fast.
+"""
+
+# Importing the required functions and modules
+import sys
+from argparse import ArgumentParser
+
+def parser():
+	""" This function returns the argument parser of the command line interface. """
+
+	parser = ArgumentParser(prog = 'main.py', description = 'IP Tracker - Fetches the information about public IP addresses from ipinfo.io. Launches the graphical interface if no command is specified.')
+	parser.add_argument('--profile', metavar = 'DIR', help = 'profile each action (the startup phases, the menu commands and the lookups of the graphical interface, or the command) using cProfile and tracemalloc, writing the .pstats files and the memory snapshots to the directory')
+	commands = parser.add_subparsers(dest = 'command', metavar = 'command')
+
+	gui = commands.add_parser('gui', help = 'launch the graphical interface')
+	gui.add_argument('--server', metavar = 'HOST:PORT', help = "send the lookups to a local API server (see the 'serve' command) instead of the upstream API")
+
+	lookup = commands.add_parser('lookup', help = 'look up one or more IP addresses')
+	lookup.add_argument('ip', nargs = '+', help = 'the IP addresses to look up')
+	lookup.add_argument('--format', choices = ('json', 'ndjson', 'csv'), default = 'json', help = 'the output format (default : json)')
+
+	batch = commands.add_parser('batch', help = 'look up the IP addresses listed in a file (or the standard input) concurrently')
+	batch.add_argument('file', help = "a text file (one IP address per line) or a CSV file (IP addresses in the first column), or '-' for the standard input")
+	batch.add_argument('--csv', action = 'store_true', help = 'parse the input as CSV (implied for files ending with .csv)')
+	batch.add_argument('--format', choices = ('json', 'ndjson', 'csv'), default = 'ndjson', help = 'the output format (default : ndjson, streamed as the lookups complete, like csv)')
+
+	ingest = commands.add_parser('ingest', help = 'extract the IP addresses from a log file in parallel, and look up the unique public ones')
+	ingest.add_argument('file', help = "the log file (nginx, sshd, firewall, ...), or '-' for the standard input")
+	ingest.add_argument('--format', choices = ('json', 'ndjson', 'csv'), default = 'ndjson', help = 'the output format of the lookups (default : ndjson, streamed as the lookups complete)')
+	ingest.add_argument('--processes', type = int, help = 'the number of the processes parsing the log (default : the number of CPUs)')
+	ingest.add_argument('--chunk-size', type = int, default = 16, metavar = 'MB', help = 'the size of the chunks of the log handed to the processes, in megabytes (default : 16)')
+	ingest.add_argument('--counts', metavar = 'FILE', help = 'write the number of occurrences of each IP address found (public or not) to the file, as CSV')
+	ingest.add_argument('--no-lookup', action = 'store_true', help = 'only count the IP addresses, without any lookup (the counts are written to the standard output unless --counts is specified)')
+
+	sweep = commands.add_parser('sweep', help = 'look up every host of a network (CIDR), inferring the results of the hosts covered by the range of a result')
+	sweep.add_argument('network', help = 'the network to be swept, like 8.8.8.0/24 (at most 65536 hosts)')
+	sweep.add_argument('--format', choices = ('json', 'ndjson', 'csv'), default = 'ndjson', help = 'the output format (default : ndjson, streamed as the lookups complete)')
+	sweep.add_argument('--assume-prefix', type = int, metavar = 'N', help = 'when a result holds no network range (like the free ipinfo.io responses), assume it applies to the whole /N network around the address')
+
+	serve = commands.add_parser('serve', help = 'serve the lookups as a local JSON API (shared cache and rate-limited client for many clients)')
+	serve.add_argument('--host', default = '127.0.0.1', help = 'the address to listen on (default : 127.0.0.1, use 0.0.0.0 to serve the other machines)')
+	serve.add_argument('--port', type = int, default = 8000, help = 'the port to listen on (default : 8000)')
+	serve.add_argument('--workers', type = int, default = 32, help = 'the number of the worker threads shared by the batch lookups of all the clients (default : 32)')
+	serve.add_argument('--per-request', type = int, default = 8, help = 'the maximum number of lookups in flight per batch request (default : 8)')
+
+	for command in (lookup, batch, ingest, sweep):
+		command.add_argument('--workers', type = int, default = 8, help = 'the maximum number of lookups in flight (default : 8)')
+		command.add_argument('--offline', metavar = 'FILE', help = 'resolve the IP addresses locally from an offline database file (see offline-import)')
+		command.add_argument('--stats', action = 'store_true', help = 'print the cache and the request coalescing counters to the standard error at the end')
+		command.add_argument('--metrics', metavar = 'FILE', help = 'write the phase timings of the lookups (p50 / p95 / p99), the outcome counters and the gauges to the file at the end, in the Prometheus text format')
+		command.add_argument('--trace', metavar = 'FILE', help = 'append the trace of each lookup (the duration of each phase) to the file, as NDJSON')
+		command.add_argument('--save', action = 'store_true', help = 'save the successful results to the saved results store (saved.db)')
+
+	for command in (lookup, batch, ingest, sweep, serve):
+		command.add_argument('--no-history', action = 'store_true', help = 'do not record the lookups to the overall history')
+		command.add_argument('--provider', default = 'ipinfo', metavar = 'SPEC', help = "the provider of the lookups : ipinfo, ipinfo:TOKEN, ip-api, server:HOST:PORT, offline:FILE or an http(s)://HOST/PATH template containing {ip} (default : ipinfo)")
+		command.add_argument('--hedge', metavar = 'SPEC', help = 'send the lookups slower than the latency budget to this second provider too, and take the first answer')
+		command.add_argument('--hedge-budget', type = float, default = 0.5, metavar = 'SECONDS', help = 'the latency budget before hedging, in seconds (default : 0.5)')
+		command.add_argument('--rate', type = float, default = 20, help = 'the maximum rate of the requests to the server, per second (default : 20, 0 for no limit)')
+		command.add_argument('--burst', type = int, default = 40, help = 'the number of requests which can be sent at once before the rate applies (default : 40)')
+		command.add_argument('--retries', type = int, default = 4, help = 'the number of retries of a request on a rate limit or a temporary failure (default : 4)')
+
+	saved = commands.add_parser('saved', help = 'print the saved results of one or more IP addresses')
+	saved.add_argument('ip', nargs = '+', help = 'the IP addresses to find in the saved results store')
+
+	benchmark = commands.add_parser('benchmark', help = 'run the benchmark suite against a local stub server and print the results as JSON')
+	benchmark.add_argument('--output', metavar = 'FILE', help = 'write the results to the file instead of the standard output')
+	benchmark.add_argument('--suite', action = 'append', choices = ('single', 'batch', 'history', 'render'), help = 'run only this suite (can be repeated, default : all)')
+	benchmark.add_argument('--single', type = int, default = 200, help = 'the number of single lookups (default : 200)')
+	benchmark.add_argument('--batch', type = int, default = 1000, help = 'the number of lookups per concurrency level (default : 1000)')
+	benchmark.add_argument('--concurrency', default = '1,4,8,16,32', help = 'the comma separated concurrency levels of the batch suite (default : 1,4,8,16,32)')
+	benchmark.add_argument('--history', type = int, default = 10000, help = 'the number of history records (default : 10000)')
+	benchmark.add_argument('--render', type = int, default = 1000, help = 'the number of renders (default : 1000)')
+	benchmark.add_argument('--rate', type = float, default = 0, help = 'the rate limit of the request scheduler, per second (default : 0, no limit)')
+	benchmark.add_argument('--retries', type = int, default = 0, help = 'the number of retries of the request scheduler (default : 0)')
+
+	stubServer = commands.add_parser('stub-server', help = 'run the local stub server standing in for ipinfo.io, in the foreground')
+	stubServer.add_argument('--port', type = int, default = 8080, help = 'the port to listen on (default : 8080)')
+
+	for command in (benchmark, stubServer):
+		command.add_argument('--latency', type = float, default = 0.02, help = 'the latency of the responses in seconds (default : 0.02)')
+		command.add_argument('--jitter', type = float, default = 0.005, help = 'the maximum random extra latency in seconds (default : 0.005)')
+		command.add_argument('--error-rate', type = float, default = 0.0, help = 'the share of the requests failing with HTTP 500 (default : 0)')
+		command.add_argument('--rate-limit-rate', type = float, default = 0.0, help = 'the share of the requests failing with HTTP 429 (default : 0)')
+
+	export = commands.add_parser('export', help = 'stream the overall history or the saved results to a CSV, NDJSON, Parquet or Arrow IPC file')
+	export.add_argument('source', choices = ('history', 'saved'), help = 'the records to be exported')
+	export.add_argument('output', help = "the output file, or '-' for the standard output (CSV and NDJSON only)")
+	export.add_argument('--format', choices = ('csv', 'ndjson', 'parquet', 'arrow'), help = 'the output format (default : inferred from the extension of the output file, else ndjson). The parquet and arrow formats need pyarrow')
+
+	analytics = commands.add_parser('analytics', help = 'print the analytics of the overall history (top IP addresses, countries, organizations and lookups per hour) as JSON')
+	analytics.add_argument('--top', type = int, default = 10, help = 'the number of the top IP addresses, countries and organizations (default : 10)')
+	analytics.add_argument('--ip', nargs = '+', default = [], help = 'also print the estimated number of lookups of these IP addresses')
+
+	offlineImport = commands.add_parser('offline-import', help = 'import a CSV file of IP ranges (start, end, country, city, org) into an offline database file')
+	offlineImport.add_argument('csv', help = 'the CSV file of the IP ranges')
+	offlineImport.add_argument('output', help = 'the offline database file to be created')
+	return parser
+
+def record(ipAddress, response, age, error):
+	""" This function returns the output record (dict) of a lookup. """
+
+	item = {"ip" : ipAddress}
+	if error is None:
+		item["data"] = response
+		item["cached"] = age is not None
+		item["age"] = age
+	else:
+		item["error"] = f'{error}'
+	return item
+
+def offlineMany(database, ipAddresses):
+	""" This function resolves the IP addresses mentioned in the arguments from the offline database, and yields the tuples (ipAddress, response, age, error) in the same shape as the lookupMany() pipeline. """
+
+	for ipAddress, response in database.lookupStream(ipAddresses):
+		if response is None:
+			yield ipAddress, None, None, LookupError('The IP address is not covered by the offline database.')
+		else:
+			yield ipAddress, response, None, None
+
+def configure(arguments):
+	""" This function configures the request scheduler (rate, burst, retries) and the provider of the lookups (along with the hedging) from the arguments. """
+
+	from iptracker.scheduler import scheduler
+
+	scheduler.configure(rate = arguments.rate or None, burst = arguments.burst, retries = arguments.retries)
+	if arguments.provider != 'ipinfo' or arguments.hedge:
+		# If another provider (or the hedging) is requested, then we make it the provider of the lookups
+		from iptracker.lookup import useProvider, currentProvider
+		from iptracker.providers import createProvider, HedgedProvider
+
+		provider = currentProvider() if arguments.provider == 'ipinfo' else createProvider(arguments.provider)
+		if arguments.hedge:
+			provider = HedgedProvider(provider, createProvider(arguments.hedge), budget = arguments.hedge_budget)
+		useProvider(provider)
+
+def resolve(ipAddresses, arguments, sweep = None):
+	""" This function resolves the IP addresses mentioned in the arguments through the core lookup pipeline, writes the results to the standard output in the requested format and returns the exit code (1 if any lookup failed). If a subnet sweep is specified, then the addresses are taken from the sweep instead, and the inferred results are streamed along with the looked up ones. """
+
+	from json import dumps
+	from iptracker.lookup import lookupMany
+	from iptracker.history import history_log, historyItem
+	from iptracker.validation import screenIps
+	from iptracker.metrics import metrics
+
+	failed = False
+	collected = []
+	unsaved = []
+	writer = None
+	if arguments.format == 'csv':
+		from iptracker.export import CsvWriter, RESULT_COLUMNS, resultRow
+
+		writer = CsvWriter(sys.stdout, RESULT_COLUMNS + ((('inferred_from', 'string'),) if sweep is not None else ()))
+
+	def save():
+		# Saving the buffered results to the saved results store in one transaction
+		from iptracker.saved import saved_results
+
+		saved_results.saveMany(unsaved)
+		unsaved.clear()
+
+	def emit(ipAddress, response, age, error):
+		# Writing (or collecting, for the JSON format) the output record of a lookup
+		nonlocal failed
+		failed = failed or error is not None
+		if arguments.format == 'ndjson':
+			sys.stdout.write(dumps(record(ipAddress, response, age, error)) + '\n')
+			sys.stdout.flush()
+		elif writer is not None:
+			writer.write(resultRow(ipAddress, response, age, error))
+			sys.stdout.flush()
+		else:
+			collected.append(record(ipAddress, response, age, error))
+
+	def screened(ipAddresses):
+		# Streaming the IP addresses through the validation stage (deduplicated), the rejected ones are reported without any lookup
+		for ipAddress, error in screenIps(ipAddresses):
+			if error is None:
+				yield ipAddress
+			else:
+				emit(ipAddress, None, None, ValueError(error))
+
+	if arguments.offline:
+		# If the offline database is specified, then we resolve the IP addresses locally from it
+		from iptracker.offline import OfflineDatabase
+
+		results = offlineMany(OfflineDatabase(arguments.offline), screened(ipAddresses))
+	else:
+		from iptracker.scheduler import INTERACTIVE, BATCH
+
+		configure(arguments)
+		if sweep is not None:
+			results = sweep.results(workers = arguments.workers, priority = BATCH)
+		else:
+			results = lookupMany(screened(ipAddresses), workers = arguments.workers, priority = INTERACTIVE if arguments.command == 'lookup' else BATCH)
+
+	if arguments.trace:
+		metrics.openTrace(arguments.trace)
+	try:
+		for ipAddress, response, age, error in results:
+			# Iterating through the lookups as they complete
+
+			# The inferred results of a sweep are not lookups, thus they are neither recorded nor saved
+			inferred = error is None and "inferred_from" in response
+			if error is None and not inferred and not arguments.no_history:
+				history_log.append(historyItem(ipAddress, response))
+			if error is None and not inferred and arguments.save:
+				unsaved.append(response)
+				if len(unsaved) >= 1000:
+					save()
+			emit(ipAddress, response, age, error)
+	finally:
+		history_log.close()
+		metrics.closeTrace()
+		if unsaved:
+			save()
+		if arguments.metrics:
+			metrics.writePrometheus(arguments.metrics)
+
+	if arguments.format == 'json':
+		sys.stdout.write(dumps(collected[0] if len(collected) == 1 else collected, indent = 2) + '\n')
+	if arguments.stats:
+		from iptracker.cache import cache
+		from iptracker.lookup import flight
+		from iptracker.scheduler import scheduler
+
+		stats = cache.stats()
+		stats.update(flight.stats())
+		stats.update({f'scheduler_{key}' : value for key, value in scheduler.stats().items()})
+		sys.stderr.write(dumps(stats) + '\n')
+	if sweep is not None:
+		stats = sweep.stats()
+		sys.stderr.write(f'Swept {stats["hosts"]} hosts of {sweep.network} : {stats["fetched"]} fetched, {stats["cached"]} from the cache, {stats["inferred"]} inferred, {stats["errors"]} failed, {stats["skipped"]} skipped as not public ({stats["calls_saved"]} upstream calls saved)\n')
+	return 1 if failed else 0
+
+def export(source, output, format = None):
+	""" This function streams the overall history or the saved results (source) to the output file in the requested format, and returns the exit code. The number of records exported is reported on the standard error. """
+
+	from iptracker.export import exportRows, historyRows, savedRows, HISTORY_COLUMNS, SAVED_COLUMNS
+
+	if source == 'history':
+		count = exportRows(historyRows(), output, HISTORY_COLUMNS, format)
+	else:
+		count = exportRows(savedRows(), output, SAVED_COLUMNS, format)
+	if output != '-':
+		sys.stderr.write(f'Exported {count} records to {output}\n')
+	return 0
+
+def ingest(arguments):
+	""" This function extracts the IP addresses from the log file mentioned in the arguments, and feeds the unique public ones to the lookup pipeline as they are found (unless --no-lookup is specified). The counts of all the addresses are written as CSV at the end, and a summary is reported on the standard error. It returns the exit code. """
+
+	from csv import writer as csvWriter
+	from iptracker.ingest import LogIngestion
+
+	ingestion = LogIngestion(sys.stdin.buffer if arguments.file == '-' else arguments.file, workers = arguments.processes, chunkSize = arguments.chunk_size * 1024 * 1024)
+	if arguments.no_lookup:
+		ingestion.run()
+		code = 0
+	else:
+		code = resolve(ingestion.addresses(), arguments)
+
+	if arguments.counts or arguments.no_lookup:
+		file = open(arguments.counts, 'w', newline = '') if arguments.counts else sys.stdout
+		try:
+			writer = csvWriter(file)
+			writer.writerow(('ip', 'count'))
+			writer.writerows(ingestion.top(None))
+		finally:
+			if file is not sys.stdout:
+				file.close()
+
+	stats = ingestion.stats()
+	sys.stderr.write(f'Scanned {stats["bytes_read"]} bytes : {stats["unique"]} unique IP addresses, {stats["rejected"]} of them not public\n')
+	return code
+
+def sweep(arguments):
+	""" This function sweeps the network (CIDR) mentioned in the arguments : the hosts are looked up from the coarse to the fine, and the results of the hosts covered by the range of a result are inferred instead of looked up. With an offline database, every host is resolved locally (there is no upstream call to save). It returns the exit code. """
+
+	from iptracker.sweep import SubnetSweep
+
+	subnetSweep = SubnetSweep(arguments.network, assumePrefix = arguments.assume_prefix)
+	if arguments.offline:
+		return resolve((subnetSweep.address(index) for index in range(subnetSweep.count)), arguments)
+	return resolve(None, arguments, sweep = subnetSweep)
+
+def saved(ipAddresses):
+	""" This function prints the saved results of the IP addresses mentioned in the arguments as JSON, and returns the exit code (1 if any of the IP addresses has no saved result). """
+
+	from json import dumps
+	from datetime import datetime
+	from iptracker.saved import saved_results
+
+	collected, missing = [], False
+	for ipAddress in ipAddresses:
+		results = saved_results.find(ipAddress)
+		missing = missing or len(results) == 0
+		for recordId, timestamp, response in results:
+			collected.append({"id" : recordId, "ip" : ipAddress.strip(), "saved" : datetime.fromtimestamp(timestamp).isoformat(), "data" : response})
+	sys.stdout.write(dumps(collected, indent = 2) + '\n')
+	return 1 if missing else 0
+
+def serve(arguments):
+	""" This function runs the local JSON API server in the foreground, until CTRL+C is pressed. It returns the exit code. """
+
+	from iptracker.server import ApiServer
+
+	configure(arguments)
+	server = ApiServer(host = arguments.host, port = arguments.port, workers = arguments.workers, perRequest = arguments.per_request, history = not arguments.no_history)
+	sys.stderr.write(f'Serving the lookup API at http://{server.address}/ (GET /lookup/IP, POST /batch, POST /stream, GET /stats, press CTRL+C to stop)\n')
+	try:
+		server.serveForever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.stop()
+	return 0
+
+def gui(server = None):
+	""" This function launches the graphical interface, optionally using the local API server mentioned in the arguments as the backend of the lookups. tkinter is imported only here. """
+
+	from iptracker.profiling import profiler
+
+	with profiler.profile('startup.import'):
+		from iptracker import gui
+
+	try:
+		gui.main(server = server)
+	except KeyboardInterrupt:
+		# If the user presses CTRL+C key combo, then we exit
+
+		gui.exit()
+	except Exception as e:
+		# If any errors encountered during the process, then we display the error message on the console screen
+
+		input(f'\n[ Error : {e} ]\nPress enter key to continue...')
+	return 0
+
+def run(argv = None):
+	""" This function parses the command line arguments (sys.argv by default), executes the requested command and returns the exit code. """
+
+	arguments = parser().parse_args(sys.argv[1:] if argv is None else argv)
+
+	if arguments.profile:
+		# If the profiling mode is requested, then we turn it on before anything else, so that the startup is profiled too
+		from iptracker.profiling import profiler
+
+		profiler.enable(arguments.profile)
+
+	if arguments.command in (None, 'gui'):
+		return gui(getattr(arguments, 'server', None))
+	if arguments.profile:
+		with profiler.profile(f'command.{arguments.command}'):
+			code = execute(arguments)
+		for record in profiler.slowest(1):
+			sys.stderr.write(f'Profiled {record["name"]} : {1000 * record["seconds"]:.1f} ms ({1000 * record["cpu_seconds"]:.1f} ms CPU), peak {record["peak_bytes"] / 1048576:.1f} MB -> {record["pstats"]}\n')
+		return code
+	return execute(arguments)
+
+def execute(arguments):
+	""" This function executes the command (other than 'gui') mentioned in the parsed arguments, and returns the exit code. """
+
+	try:
+		if arguments.command == 'lookup':
+			return resolve(arguments.ip, arguments)
+		elif arguments.command == 'benchmark':
+			from json import dumps
+			from iptracker.benchmark import runBenchmarks
+
+			report = runBenchmarks(latency = arguments.latency, jitter = arguments.jitter, errorRate = arguments.error_rate, rateLimitRate = arguments.rate_limit_rate, single = arguments.single, batch = arguments.batch, concurrency = [int(level) for level in arguments.concurrency.split(',')], history = arguments.history, render = arguments.render, rate = arguments.rate or None, retries = arguments.retries, suites = arguments.suite or ('single', 'batch', 'history', 'render'))
+			if arguments.output:
+				with open(arguments.output, 'w') as file:
+					file.write(dumps(report, indent = 2) + '\n')
+			else:
+				sys.stdout.write(dumps(report, indent = 2) + '\n')
+			return 0
+		elif arguments.command == 'stub-server':
+			from iptracker.benchmark import StubServer
+
+			server = StubServer(latency = arguments.latency, jitter = arguments.jitter, errorRate = arguments.error_rate, rateLimitRate = arguments.rate_limit_rate, port = arguments.port)
+			sys.stderr.write(f'Serving the stub ipinfo.io API at http://{server.host}/ (press CTRL+C to stop)\n')
+			try:
+				server.server.serve_forever()
+			except KeyboardInterrupt:
+				pass
+			finally:
+				server.server.server_close()
+			return 0
+		elif arguments.command == 'saved':
+			return saved(arguments.ip)
+		elif arguments.command == 'export':
+			return export(arguments.source, arguments.output, arguments.format)
+		elif arguments.command == 'ingest':
+			return ingest(arguments)
+		elif arguments.command == 'sweep':
+			return sweep(arguments)
+		elif arguments.command == 'serve':
+			return serve(arguments)
+		elif arguments.command == 'analytics':
+			from json import dumps
+			from iptracker.analytics import analytics
+
+			report = analytics.snapshot(top = arguments.top)
+			if arguments.ip:
+				report["estimates"] = {ipAddress : analytics.estimate(ipAddress) for ipAddress in arguments.ip}
+			sys.stdout.write(dumps(report, indent = 2) + '\n')
+			return 0
+		elif arguments.command == 'offline-import':
+			from iptracker.offline import importRanges
+
+			count4, count6, records = importRanges(arguments.csv, arguments.output)
+			sys.stderr.write(f'Imported {count4} IPv4 ranges and {count6} IPv6 ranges ({records} unique records) into {arguments.output}\n')
+			return 0
+		elif arguments.command == 'batch':
+			from iptracker.formatting import readIps
+
+			if arguments.file == '-':
+				return resolve(readIps(sys.stdin, csv = arguments.csv), arguments)
+			with open(arguments.file, 'r', newline = '') as file:
+				return resolve(readIps(file, csv = arguments.csv or arguments.file.lower().endswith('.csv')), arguments)
+	except KeyboardInterrupt:
+		return 130
+	except (OSError, ValueError, RuntimeError) as e:
+		sys.stderr.write(f'[ Error : {e} ]\n')
+		return 1
@@ -0,0 +1,209 @@
+"""
+IP Tracker - Exports
+
+This module contains the streaming exporters of the overall history, the saved results and the lookup results. The records are pulled from generators and written one at a time (or one fixed-size chunk at a time, for the columnar formats), thus exporting millions of records uses a constant amount of memory. The supported formats are CSV, NDJSON, and the columnar Parquet and Arrow IPC formats when pyarrow is installed.
+"""
+
+# Importing the required functions and modules
+from json import dumps
+from datetime import datetime
+from csv import writer as csvWriter
+import sys
+
+from iptracker.providers import FIELDS
+
+try:
+	import pyarrow
+	import pyarrow.ipc
+	import pyarrow.parquet
+except ImportError:
+	# pyarrow is optional, only the columnar formats (Parquet, Arrow IPC) need it
+
+	pyarrow = None
+
+# The export formats, along with the file extensions they are inferred from
+FORMATS = ('csv', 'ndjson', 'parquet', 'arrow')
+EXTENSIONS = {".csv" : 'csv', ".ndjson" : 'ndjson', ".jsonl" : 'ndjson', ".parquet" : 'parquet', ".arrow" : 'arrow', ".feather" : 'arrow', ".ipc" : 'arrow'}
+
+# The columns (name, type) of each kind of export. The CSV and the columnar formats hold only these columns, while the NDJSON format keeps each record as it is.
+HISTORY_COLUMNS = (('ip', 'string'), ('timestamp', 'float'), ('datetime', 'string'), ('country', 'string'), ('org', 'string'))
+SAVED_COLUMNS = (('id', 'int'), ('saved', 'string')) + tuple((field, 'string') for field in FIELDS) + (('provider', 'string'),)
+RESULT_COLUMNS = tuple((field, 'string') for field in FIELDS) + (('provider', 'string'), ('cached', 'bool'), ('age', 'float'), ('error', 'string'))
+
+def availableFormats():
+	""" This function returns the export formats usable in the current environment (the columnar formats only if pyarrow is installed). """
+
+	return FORMATS if pyarrow is not None else FORMATS[:2]
+
+def formatFor(filename, default = 'ndjson'):
+	""" This function returns the export format inferred from the extension of the filename mentioned in the arguments, or the default format if the extension is unknown. """
+
+	for extension, format in EXTENSIONS.items():
+		if filename.lower().endswith(extension):
+			return format
+	return default
+
+def isoformat(timestamp):
+	""" This function returns the UNIX timestamp mentioned in the arguments as an ISO 8601 local date and time, or None if it is not a number. """
+
+	if not isinstance(timestamp, (int, float)):
+		return None
+	return datetime.fromtimestamp(timestamp).isoformat(timespec = 'seconds')
+
+def historyRows(log = None):
+	""" This function streams the records of the overall history (the history_log by default) as the export rows (ip, timestamp, datetime, country, org). """
+
+	if log is None:
+		from iptracker.history import history_log as log
+
+	for item in log:
+		yield {"ip" : item.get("ip"), "timestamp" : item.get("timestamp"), "datetime" : isoformat(item.get("timestamp")), "country" : item.get("country"), "org" : item.get("org")}
+
+def savedRows(store = None):
+	""" This function streams the saved results (of the saved_results store by default) as the export rows : the id of the record and the time of saving, followed by all the fields of the response. """
+
+	if store is None:
+		from iptracker.saved import saved_results as store
+
+	for recordId, timestamp, response in store.iterate():
+		yield {"id" : recordId, "saved" : isoformat(timestamp), **response}
+
+def resultRow(ipAddress, response, age, error):
+	""" This function returns the export row of a lookup result, i.e., the fields of the response flattened along with the cache status and the error (if any). """
+
+	row = dict(response) if error is None else {}
+	row["ip"] = ipAddress
+	row["cached"] = age is not None if error is None else None
+	row["age"] = age
+	row["error"] = None if error is None else f'{error}'
+	return row
+
+class CsvWriter:
+	""" This class writes the export rows to a CSV file : a header row, followed by one row per record holding the exported columns (the empty cells stand for the missing values). """
+
+	def __init__(self, file, columns):
+		""" The constructor takes the text file object to write to, and the columns (name, type) of the export. """
+
+		self.file = file
+		self.names = [name for name, kind in columns]
+		self.writer = csvWriter(file)
+		self.writer.writerow(self.names)
+
+	def write(self, row):
+		""" This method writes a record (dict) as a CSV row. """
+
+		self.writer.writerow(['' if row.get(name) is None else row.get(name) for name in self.names])
+
+	def close(self):
+		""" This method flushes the rows written. """
+
+		self.file.flush()
+
+class NdjsonWriter:
+	""" This class writes the export rows to an NDJSON file, one JSON record per line. The records are kept as they are, thus no field is dropped. """
+
+	def __init__(self, file, columns = None):
+		""" The constructor takes the text file object to write to. The columns are not used, the argument is there for the same interface as the other writers. """
+
+		self.file = file
+
+	def write(self, row):
+		""" This method writes a record (dict) as a line of JSON. """
+
+		self.file.write(dumps(row, separators = (',', ':')) + '\n')
+
+	def close(self):
+		""" This method flushes the records written. """
+
+		self.file.flush()
+
+# Defining the columnar writer
+# ----
+# 1. The records are buffered column by column, and the buffer is written as one record batch (a Parquet row group, or an Arrow IPC record batch) each time it holds chunkSize records. Thus, the memory used is bounded by the size of one chunk, whatever the number of records exported.
+# 2. The values are converted to the type of their column (string, float, int or bool), and the missing or unconvertible values are written as nulls.
+# ----
+class ColumnarWriter:
+	""" This class writes the export rows to a Parquet or an Arrow IPC file, using pyarrow. To write -> ColumnarWriter(filename, columns, 'parquet'), then write(row) for each record and close() at the end. """
+
+	# The pyarrow types of the column types, along with the conversion of the values
+	types = {"string" : ('string', str), "float" : ('float64', float), "int" : ('int64', int), "bool" : ('bool_', bool)}
+
+	def __init__(self, filename, columns, format = 'parquet', chunkSize = 65536):
+		""" The constructor takes the filename of the output, the columns (name, type) of the export, the format ('parquet' or 'arrow') and the number of records per record batch. RuntimeError is raised if pyarrow is not installed. """
+
+		if pyarrow is None:
+			raise RuntimeError(f'pyarrow is required for exporting to the {format} format (pip install pyarrow), use the csv or the ndjson format instead.')
+
+		self.columns = columns
+		self.chunkSize = chunkSize
+		self.schema = pyarrow.schema([(name, getattr(pyarrow, self.types[kind][0])()) for name, kind in columns])
+		self.buffers = [[] for column in columns]
+		self.size = 0
+		if format == 'parquet':
+			self.writer = pyarrow.parquet.ParquetWriter(filename, self.schema)
+		else:
+			self.writer = pyarrow.ipc.new_file(filename, self.schema)
+
+	def convert(self, value, kind):
+		""" This method converts the value mentioned in the arguments to the type of its column, or returns None if it is missing or unconvertible. """
+
+		if value is None or value == '':
+			return None
+		try:
+			return self.types[kind][1](value)
+		except (TypeError, ValueError):
+			return None
+
+	def write(self, row):
+		""" This method adds a record (dict) to the buffer, and writes the buffer as a record batch once it is full. """
+
+		for buffer, (name, kind) in zip(self.buffers, self.columns):
+			buffer.append(self.convert(row.get(name), kind))
+		self.size += 1
+		if self.size >= self.chunkSize:
+			self.flush()
+
+	def flush(self):
+		""" This method writes the buffered records as one record batch, and empties the buffer. """
+
+		if self.size == 0:
+			return
+		batch = pyarrow.record_batch([pyarrow.array(buffer, type = field.type) for buffer, field in zip(self.buffers, self.schema)], schema = self.schema)
+		self.writer.write_batch(batch)
+		self.buffers = [[] for column in self.columns]
+		self.size = 0
+
+	def close(self):
+		""" This method writes the remaining records and closes the file. """
+
+		self.flush()
+		self.writer.close()
+
+def exportRows(rows, filename, columns, format = None, progress = None):
+	""" This function streams the rows mentioned in the arguments (any iterable of dicts, like historyRows() or savedRows()) to the file, in the format inferred from its extension unless specified. The filename '-' stands for the standard output (CSV and NDJSON only). The progress(count) callback, if specified, is called every 10000 records. It returns the number of records exported. """
+
+	format = format or formatFor(filename)
+	if format not in FORMATS:
+		raise ValueError(f"Unknown export format '{format}' (expected one of {', '.join(FORMATS)}).")
+
+	file = None
+	if format in ('parquet', 'arrow'):
+		if filename == '-':
+			raise ValueError(f'The {format} format cannot be written to the standard output.')
+		writer = ColumnarWriter(filename, columns, format)
+	else:
+		file = sys.stdout if filename == '-' else open(filename, 'w', encoding = 'utf-8', newline = '')
+		writer = (CsvWriter if format == 'csv' else NdjsonWriter)(file, columns)
+
+	count = 0
+	try:
+		for row in rows:
+			writer.write(row)
+			count += 1
+			if progress is not None and count % 10000 == 0:
+				progress(count)
+	finally:
+		writer.close()
+		if file is not None and file is not sys.stdout:
+			file.close()
+	return count
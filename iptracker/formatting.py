@@ -0,0 +1,45 @@
+"""
+IP Tracker - Formatting
+
+This module contains the helper functions for reading the lists of IP addresses from the files and arranging the fetched information as text.
+"""
+
+# Importing the required functions and modules
+from csv import reader as csvReader
+
+def formatAge(seconds):
+	""" This function returns the age (in seconds) mentioned in the arguments as a human readable string. Like : 42 seconds, 5 minutes, 3 hours, 2 days. """
+
+	for unit, size in (('days', 86400), ('hours', 3600), ('minutes', 60)):
+		if seconds >= size:
+			return f'{int(seconds // size)} {unit}'
+	return f'{int(seconds)} seconds'
+
+def formatText(response):
+	""" This function arranges the fetched information (response) as the text to be displayed, one '[#] KEY : value' line per field. """
+
+	return ''.join(['[#] %-20s   :   %-30s\n' %(str(key).upper(), str(value)) for key, value in response.items()])
+
+def readIps(file, csv = False):
+	""" This function streams the IP addresses from the file object mentioned in the arguments, one at a time. The file can either be a plain text file (one IP address per line), or a CSV file (the IP address in the first column of each row). Blank lines, comments (lines starting with '#') and a header row (first column named 'ip') are skipped. As the file is read lazily, this function can also be used with the standard input. """
+
+	if csv:
+		rows = csvReader(file)
+	else:
+		rows = ([line] for line in file)
+
+	for row in rows:
+		# Iterating through each row of the file and picking the first column
+
+		if len(row) == 0:
+			continue
+		ipAddress = row[0].strip()
+		if ipAddress == '' or ipAddress.startswith('#') or ipAddress.lower() == 'ip':
+			continue
+		yield ipAddress
+
+def readIpList(filename):
+	""" This function reads the list of IP addresses from the file mentioned in the arguments and returns them as a list. The CSV format is chosen when the filename ends with '.csv'. """
+
+	with open(filename, 'r', newline = '') as file:
+		return list(readIps(file, csv = filename.lower().endswith('.csv')))
@@ -0,0 +1,1801 @@
+"""
+IP Tracker - Graphical interface
+
+This module contains the tkinter interface of the application : the main window, the menubar commands, the output windows, the batch lookup window and the history viewer. The lookups are executed by the core modules of the package, off the tkinter event loop. This module (and thus tkinter) is imported only when the graphical interface is launched.
+"""
+
+# Importing the required functions and modules
+try:
+	from datetime import datetime
+	from webbrowser import open as webOpen
+	from time import monotonic
+	from queue import Queue, Empty
+	from threading import Thread
+	from concurrent.futures import ThreadPoolExecutor
+	from multiprocessing import get_context
+
+	# Importing all the required functions and classes from the tkinter library
+	from tkinter import Tk, Toplevel, mainloop
+	from tkinter import Frame, Label, Button, Entry, Menu, Scrollbar
+	from tkinter import X, Y, LEFT, RIGHT, BOTH, GROOVE, StringVar, BooleanVar, TclError
+	from tkinter import messagebox as mb
+	from tkinter import filedialog as fd
+	from tkinter.ttk import Treeview, Style, Combobox
+	from bisect import insort
+	from weakref import WeakKeyDictionary
+
+	# Importing the core modules of the package
+	from iptracker.lookup import lookupIp, flight, useProvider, currentProvider
+	from iptracker.providers import IpApiProvider, ServerProvider, HedgedProvider
+	from iptracker.scheduler import scheduler, INTERACTIVE, BATCH
+	from iptracker.cache import cache
+	from iptracker.history import history_log, history_index, historyItem, SessionHistory
+	from iptracker.analytics import analytics
+	from iptracker.saved import saved_results
+	from iptracker.metrics import metrics
+	from iptracker.formatting import formatAge, formatText, readIpList
+	from iptracker.ingest import LogIngestion
+	from iptracker.sweep import SubnetSweep
+	from iptracker.export import exportRows, historyRows, savedRows, availableFormats, HISTORY_COLUMNS, SAVED_COLUMNS
+	from iptracker.validation import validateIp, screenIps
+	from iptracker.profiling import profiler
+except Exception as e:
+	# If there are any errors while the importing of modules, then we display the error message on the console screen
+
+	input(f'\n[ Error : {e} ]\nPress enter key to continue...')
+	exit()
+
+# The graphical interface starts here
+
+# Defining some properties for the application (tkinter window as well as the entire tool). These properties are declared as a variable with global scope.
+# ----
+# The container which will hold the history logs of all the searches done using the application in the current session. As obvious, the container will be reseted on relaunching this main script. [ Therefore, we need to store the session history to an external file / database in order to store the overall application history ]. The container keeps the records packed in flat buffers (see iptracker.history.SessionHistory), thus a session running all day with batch lookups stays small in memory, while it is iterated and appended just like the list of dicts it replaces.
+session_history = SessionHistory()
+
+# Defining the color scheme property for the tkinter window.
+# The color_theme dict currently holds the foreground and background colors for the labels and buttons only. The foreground and background color theme of the buttons are interchanged in the case of active (when cursor is over the button widget, or the button is simply clicked).
+color_theme = {
+	"foreground" : "white",
+	"background" : "black",
+	"button_foreground" : "black",
+	"button_background" : "white",
+}
+
+# Defining the style registry of the application
+# ----
+# 1. All the themed widgets are created through (or registered with) the style registry, which applies the colors of the color_theme dict to them as per their role (window, frame, label, button). Thus, the color kwargs are defined at only one place instead of being repeated on each widget.
+# 2. The registry keeps weak references to the widgets, so that the destroyed widgets are dropped automatically. Changing the color theme restyles all the existing widgets in place (a single redraw), without tearing down any window or losing the lookups in progress.
+# 3. A color specified as None means the default color of tkinter for that widget, which is looked up once from a temporary widget of the same class.
+# ----
+class StyleRegistry:
+	""" This class contains the style registry of the application. Below are some of the steps to use the registry :
+	* To create a themed widget -> theme.label(master, **options), theme.button(master, **options), theme.frame(master, **options)
+	* To theme a window -> theme.window(Toplevel(master))
+	* To switch the color theme of all the existing widgets -> theme.apply(foreground = ..., background = ..., button_foreground = ..., button_background = ...) """
+
+	# The widget options set for each role, mapped to the keys of the color_theme dict
+	roles = {
+		"window" : {"background" : "background"},
+		"frame" : {"background" : "background"},
+		"label" : {"foreground" : "foreground", "background" : "background"},
+		"button" : {"foreground" : "button_foreground", "background" : "button_background", "activeforeground" : "button_background", "activebackground" : "button_foreground"},
+		}
+
+	def __init__(self, colors):
+		""" The constructor takes the color_theme dict, which is updated in place on applying a new theme. """
+
+		self.colors = colors
+		self.widgets = WeakKeyDictionary()
+		self.defaults = {}
+		self.ttkDefaults = None
+
+	def register(self, widget, role):
+		""" This method registers the widget mentioned in the arguments with the role (window, frame, label, button), styles it as per the current theme and returns it. """
+
+		self.widgets[widget] = role
+		self.style(widget, role)
+		return widget
+
+	def default(self, widget, option):
+		""" This method returns the default (tkinter) value of the option for the class of the widget mentioned in the arguments. """
+
+		widgetClass = Frame if isinstance(widget, (Tk, Toplevel)) else type(widget)
+		key = (widgetClass, option)
+		if key not in self.defaults:
+			temporary = widgetClass(widget)
+			self.defaults[key] = temporary.cget(option)
+			temporary.destroy()
+		return self.defaults[key]
+
+	def style(self, widget, role):
+		""" This method configures the colors of the widget as per its role and the current theme. """
+
+		options = {}
+		for option, key in self.roles[role].items():
+			color = self.colors.get(key)
+			options[option] = color if color is not None else self.default(widget, option)
+		widget.config(**options)
+
+	def apply(self, **colors):
+		""" This method updates the color theme and restyles all the registered widgets in place, along with the ttk widgets (Treeview) through the ttk styles. """
+
+		self.colors.update(colors)
+		for widget, role in list(self.widgets.items()):
+			try:
+				self.style(widget, role)
+			except TclError:
+				# If the widget has been destroyed in the meantime, then we skip it
+
+				pass
+		self.styleTtk()
+
+	def styleTtk(self):
+		""" This method applies the current theme to the ttk widgets (the tables) using the ttk styles. The ttk defaults are restored for the colors specified as None. """
+
+		try:
+			style = Style()
+		except TclError:
+			return 0
+		if self.ttkDefaults is None:
+			self.ttkDefaults = {option : style.lookup('Treeview', option) for option in ('foreground', 'background', 'fieldbackground')}
+		foreground, background = self.colors.get('foreground'), self.colors.get('background')
+		style.configure(
+			'Treeview',
+			foreground = foreground if foreground is not None else self.ttkDefaults['foreground'],
+			background = background if background is not None else self.ttkDefaults['background'],
+			fieldbackground = background if background is not None else self.ttkDefaults['fieldbackground'],
+			)
+
+	def window(self, window):
+		""" This method registers a tkinter window (Tk or Toplevel) and returns it. """
+
+		return self.register(window, 'window')
+
+	def frame(self, master, **options):
+		""" This method creates a themed Frame widget. """
+
+		return self.register(Frame(master, **options), 'frame')
+
+	def label(self, master, **options):
+		""" This method creates a themed Label widget. """
+
+		return self.register(Label(master, **options), 'label')
+
+	def button(self, master, **options):
+		""" This method creates a themed Button widget. """
+
+		return self.register(Button(master, **options), 'button')
+
+# The style registry is shared by all the windows of the application
+theme = StyleRegistry(color_theme)
+
+def recordLookup(ipAddress, response = None):
+	""" This function records a lookup of the IP address mentioned in the arguments to the current session history as well as to the overall history log. The key fields of the response (country, org) are recorded to the overall history log too, for the analytics. """
+
+	item = historyItem(ipAddress, response)
+	session_history.append(item)
+	try:
+		history_log.append(item)
+	except Exception as e:
+		# If the history log could not be written, then we display the error to the user without failing the lookup
+
+		mb.showerror('Failed to save the history', f'{e}')
+
+# The thread running the exports, so that writing a large export does not freeze the tkinter windows. The exports run one at a time.
+exporter = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = 'export')
+
+def exportRecords(master, title, rows, columns):
+	""" This function asks the user for the file to export the records to (the format is chosen by its extension : CSV, NDJSON, and Parquet / Arrow IPC if pyarrow is installed), and then streams the rows (an iterable of dicts) to the file on the export thread. The tkinter thread only polls for the completion, and reports the number of records exported. """
+
+	filetypes = {"csv" : ('CSV', '*.csv'), "ndjson" : ('NDJSON', '*.ndjson'), "parquet" : ('Parquet', '*.parquet'), "arrow" : ('Arrow IPC', '*.arrow')}
+	filename = fd.asksaveasfilename(parent = master, title = title, defaultextension = '.csv', filetypes = [filetypes[format] for format in availableFormats()])
+	if not filename:
+		return 0
+
+	future = exporter.submit(exportRows, rows, filename, columns)
+
+	def poll():
+		# Checking whether the export has completed, and reporting the result to the user
+		if not future.done():
+			master.after(200, poll)
+		elif future.exception() is not None:
+			mb.showerror('Failed to export', f'{future.exception()}', parent = master)
+		else:
+			mb.showinfo('Export completed', f'{future.result()} records exported to {filename}.', parent = master)
+
+	master.after(200, poll)
+
+# Defining the functions which serves as the commands in the menubar of the tkinter application
+# ----
+# 1. All the functions are contained inside a class named 'MenubarFunctions' for the sake of collectivity and readablity.
+# 2. Each functions may or may not serve multiple tasks (commands). The functions which serves multiple tasks (commands), their tasks are specified through the arguments.
+# ----
+class MenubarFunctions:
+	""" This class contains all the functions which serves the commands at the menubar of the tkinter application. """
+
+	def history(fetch = False, clear = False, save = False, session = True):
+		""" This function serves the history related commands in the tools menu of the tkinter application. This function currently serves the tasks : (1) Fetch the current session history, (2) Fetch the overall history, (3) Clear the session history, (4) Clear the overall history. The tasks are specified using the arguments of the function. Below are given proper instructions on how to call the function in order to execute a particular task :
+
+		* To fetch the current session history -> MenubarFunctions.history(fetch = True, session = True)
+		* To clear the current session history -> MenubarFunctions.history(clear = True, session = True)
+		* To fetch the overall history -> MenubarFunctions.history(fetch = True, session = False)
+		* To clear the overall history -> MenubarFunctions.history(clear = True, session = False) 
+		* To save the current session history to a file (NDJSON, or the compact binary format) -> MenubarFunctions.history(save = True, session = True)
+
+		Currently, we are displaying the session history details on the console screen, and the overall history in the history viewer window. """
+
+		if fetch:
+			# If the argument is specified for fetching the history, then we continue to check whether for current session or overall
+
+			if session:
+				# If the argument is specified for fetching the history for the current session, then we continue to do so
+
+				print('\n==========[ SESSION HISTORY ]==========')
+				if len(session_history) == 0:
+					# If the session history data is empty, then we print the empty message
+
+					print('\nThere are no history recorded for the current session.\n')
+				else:
+					# If the session history data is not empty, then we print the history items (logs) in a loop
+				
+					for index, item in enumerate(session_history, 1):
+						# Iterating through each history items
+
+						print(f'[{index}] IP : {item["ip"]} | Datetime : {datetime.fromtimestamp(item["timestamp"]).ctime()}')
+				print('==========[       END       ]==========')
+			else:
+				# If the argument is specified for fetching the overall history, then we continue to do so
+
+				# Displaying the overall history in the paginated history viewer window
+				HistoryViewer(win)
+		elif clear:
+			# If the argument is specified for clearing the history, then we continue to check whether for current session or overall
+
+			if session:
+				# If the argument is specified for clearing the history for the current session, then we continue to do so
+
+				# Removing all the records of the session history
+				session_history.clear()
+				mb.showinfo('Session history cleared!', 'The session history has been cleared.')
+				return 0
+			else:
+				# If the argument is specified for clearing the overall history, then we continue to do so
+
+				try:
+					# Truncating the overall history log
+					history_log.clear()
+					mb.showinfo('Overall history cleared!', 'The overall history has been cleared.')
+					return 0
+				except Exception as e:
+					# If there are any errors encountered during the process, then we display the error to the user
+
+					mb.showerror('Error!', f'{e}')
+					return 0
+		elif save and session:
+			# If the argument is specified for saving the session history, then we ask the user for the file, and write the records straight from the buffers of the session history
+
+			filename = fd.asksaveasfilename(title = 'Save the session history', defaultextension = '.ndjson', filetypes = [('NDJSON', '*.ndjson'), ('Session history (binary)', '*.session')])
+			if not filename:
+				return 0
+
+			try:
+				if filename.lower().endswith('.session'):
+					with open(filename, 'wb') as file:
+						session_history.dump(file)
+				else:
+					with open(filename, 'w', encoding = 'utf-8') as file:
+						session_history.writeNdjson(file)
+			except Exception as e:
+				mb.showerror('Error!', f'{e}')
+			else:
+				mb.showinfo('Session history saved', f'{len(session_history)} records saved to {filename}.')
+		else:
+			# If the argument(s) specfieid does not clarifies whether to fetch history or clear history, then we leave it blank over here
+
+			return 0
+
+	def setColorTheme(foreground = 'white', background = 'black', button_foreground = 'black', button_background = 'white'):
+		""" This function serves the command of changing the color theme of the tkinter application (window and widgets). The user can specify the color formats using the arguments that are taken by this function :
+		* foreground -> The foreground color of the widgets like Label, etc.
+		* background -> The background color of the widgets like Label, Frame, etc and also the background color of the tkinter windows.
+		* button_foreground -> The foreground color for the Button widget. This color swaps for the active background color of the button when active (mouse cursor over the button).
+		* button_background -> The background color for the Button widget. This color swaps for the active foreground color of the button when active (mouse cursor over the button).
+
+		The user is provided pre-set color themes by the script, as well as options to custom enter the colors.
+		"""
+
+		# Updating the color_theme dictionary (the color property of this tkinter application) and restyling all the existing widgets in place
+		theme.apply(
+			foreground = foreground,
+			background = background,
+			button_foreground = button_foreground,
+			button_background = button_background,
+			)
+
+	def about(tool = False, author = False):
+		""" This function serves the commands at the helpmenu related, and those commands are : About the author, About the tool. The function executes the task as per the arguments specified. To call for the specific commands using the function, the syntax are given below :
+		* Display about the author information : MenubarFunctions.about(author = True)
+		* Display about the tool information : MenubarFunctions.about(tool = True)
+
+		This function uses the tkinter.messagebox to display the required information to the user.
+		For further more information, check out the documentation. """
+
+		# Declaring an empty variable for storing the contents of the tkinter window as well as another variable for the heading
+		text = """"""
+		heading = ''
+
+		# Checking the task specified
+		if tool:
+			# If the function was called to display the about information of the tool, then we continue
+
+			heading = 'About IP-Tracker'
+			text = """
+This tool serves the feature of fetching information about any public server or computer
+device connected to the internet. The tool requires the public IP address of that device.
+In order to properly fetch all the required information, the tool needs some of the below
+mentioned requirements :
+[!] Internet connection
+[!] Valid and a public IP address
+
+The tool fetches the information from an external API at the website "http://ipinfo.io/".
+Thus, all backend credits goes to the creators and developer of that API, and this tool
+just provides an interface to fetch and read the information properly with an ease. The
+tool is developed in Python3 programming language. The tool also requires tkinter library
+to be installed. Thus, this makes this tool as a GUI application. This tool is also the
+GUI adaptation of the CLI tool with same name. For more info check out the docs.
+			"""
+		elif author:
+			# If the function was called to display the about information of the author, then we continue
+
+			heading = 'About the author'
+			text = """
+This tool is created by Rishav Das (https://github.com/rdofficial/). When the project
+was first initialized by the author, means me, I was in high school and the time was
+of the lockdown due to COVID-19. Thus, I created many small tools with different
+programming languages, and each of the tools serving different features, like this tool
+serves the feature of fetching information of an public IP address. I created serveral
+command line tools as well as several other graphical versions of those cli tools. The
+command line version of the tools are generally stable, light, and can be easily handled
+by the user as they do not contain extra functions like color themes or any upper GUI
+layer. The projects do not have my own complete credits, many contributions are made by
+other developers across the globe. Below are some of my contact details, for further
+information or reaching me :
+[*] Mail : rdofficial192@gmail.com
+[*] Github : rdofficial (http://github.com/rdofficial/)
+			"""
+
+		# Displaying the information to the user using the messagebox
+		mb.showinfo(heading, text)
+
+	def help(usage = False, documentation = False, report = False):
+		""" This function serves the commands at the help menu of the application. The functions serves a few commands as per listed : documentation, usage, report. The function serves the tasks as per the arguments specified. Below are mentioned all those steps to execute a particular tasks using this function :
+		* Usage -> MenubarFunctions.help(usage = True)
+		* Documentation -> MenubarFunctions.help(documentation = True)
+		* Report -> MenubarFunctions.help(report = True) 
+
+		For further more information, check out the documentation for this tool. """
+
+		# Checking the task specified
+		if usage:
+			# If the function was called to display the usage of this tool, then we continue to do so
+
+			# Giving the user the proper instructions on the usage for this function
+			mb.showinfo(
+				'Usage - IP-Tracker (Python3)',
+				"""
+Below are listed the steps for properly using this tool.
+	1. On launching the tool, either using terminal (command : python3 main.py), or by direct execution. The first screen that is loaded is a form asking us to enter the required IP address to track.
+	2. Enter the IP address on the input box and press the continue button. The required information will be loaded via a new window. Note all the information.
+	3. The application also tracks the history of search i.e. List of all the IP addresses ever tracked using this tool. To view the history, check the tools menu.
+	4. Each search is saved to the history as soon as it is done, thus the tool can be closed either using the exit command on the menubar or the close window button.
+
+For more in-depth information, check out the documentation.
+				""",
+				)
+		elif documentation:
+			# If the function was called to display the documentation, then we continue to do so
+
+			# Asking the user whether to redirect to the documentation pages available on the github mirror of this project's repository
+			choice = mb.askyesno('Redirection to documentation', 'To get the documentation of this tool, we will be redirecting to an external link (https://github.com/wsb-org/ip-tracker-gui-py/). Press yes to continue, and no to abort.')
+			if choice:
+				# If the user choosed to redirect to the documentation, then we continue
+
+				webOpen('https://github.com/wsb-org/ip-tracker-gui-py/blob/main/docs/')
+		elif report:
+			# If the function was called to submit a report, then we continue to do so
+
+			# Giving the user proper instructions on submitting a report
+			mb.showinfo(
+				'Submitting a report - IP-Tracker (Python3)',
+				"""
+In order to submit a proper report, first your report must be of a valid reason like bugs, errors, etc. If you are concerned with what errors might occur or already occured, then you can proceed to submit a report. Also, you can submit a report if you are unsatisfied of the features or any function of this tool. Follow the below steps to submit report. There are two ways to submit a report, both are listed below :
+1. Via Github Issue :
+In order to submit a report, there is a way of doing so by creating a github issue on this repository at https://github.com/wsb-org/ip-tracker-gui-py/. For executing this task, you would also require a github account.
+
+2. Via E-Mail :
+In order to submit a report, there is a way of doing so by sending a proper email to the author. All the points should be mentioned and also the mail should be send in a proper way otherwise the mail would be considered as spam and ignored. Send the report via mail at the address - rdofficial192@gmail.com.
+				""",
+				)
+
+	def responseCache(stats = False, clear = False):
+		""" This function serves the response cache related commands in the tools menu. The tasks are specified using the arguments of the function :
+		* To display the cache statistics (hit / miss counters) -> MenubarFunctions.responseCache(stats = True)
+		* To clear the cache -> MenubarFunctions.responseCache(clear = True) """
+
+		if stats:
+			# If the function was called to display the cache statistics, then we continue to do so
+
+			try:
+				data = cache.stats()
+				data.update(flight.stats())
+				data.update({f'scheduler_{key}' : value for key, value in scheduler.stats().items()})
+			except Exception as e:
+				mb.showerror('Error!', f'{e}')
+				return 0
+
+			text = ''
+			for key, value in data.items():
+				text += '[#] %-20s   :   %-10s\n' %(str(key).replace('_', ' ').upper(), f'{value:.1%}' if key == 'hit_rate' else str(value))
+			mb.showinfo('Cache statistics', text)
+		elif clear:
+			# If the function was called to clear the cache, then we continue to do so
+
+			try:
+				cache.clear()
+			except Exception as e:
+				mb.showerror('Error!', f'{e}')
+			else:
+				mb.showinfo('Cache cleared!', 'The response cache has been cleared.')
+
+	def lookupMetrics(show = False, export = False):
+		""" This function serves the lookup metrics related commands in the tools menu. The tasks are specified using the arguments of the function :
+		* To display the percentiles (p50 / p95 / p99) of each phase of the lookups, along with the outcome counters and the gauges -> MenubarFunctions.lookupMetrics(show = True)
+		* To export the metrics as a Prometheus text file (.prom) or the latest traces as NDJSON (.ndjson) -> MenubarFunctions.lookupMetrics(export = True) """
+
+		if show:
+			# If the function was called to display the metrics, then we arrange them as text
+			snapshot = metrics.snapshot()
+			text = '[#] %-10s   %8s   %10s   %10s   %10s\n' %('PHASE', 'COUNT', 'P50 (ms)', 'P95 (ms)', 'P99 (ms)')
+			for phase, values in snapshot["phases"].items():
+				text += '[#] %-10s   %8d   %10.2f   %10.2f   %10.2f\n' %(phase, values["count"], values["p50_ms"], values["p95_ms"], values["p99_ms"])
+			text += '\n'
+			for key, value in list(snapshot["outcomes"].items()) + [('in_flight', snapshot["in_flight"])] + list(snapshot["gauges"].items()):
+				text += '[#] %-20s   :   %-10s\n' %(key.replace('_', ' ').upper(), f'{value:.1%}' if key == 'cache_hit_rate' and value is not None else str(value))
+			result_panes.acquire().show('Lookup metrics', text, title = 'Lookup metrics - IP Tracker (Python3)')
+		elif export:
+			# If the function was called to export the metrics, then we ask the user for the file and its format
+			filename = fd.asksaveasfilename(title = 'Export the lookup metrics', defaultextension = '.prom', filetypes = [('Prometheus text', '*.prom'), ('NDJSON trace', '*.ndjson')])
+			if not filename:
+				return 0
+
+			try:
+				if filename.lower().endswith('.ndjson'):
+					count = metrics.writeTraces(filename)
+					message = f'The traces of the latest {count} lookups are exported to {filename}.'
+				else:
+					metrics.writePrometheus(filename)
+					message = f'The metrics are exported to {filename}.'
+			except Exception as e:
+				mb.showerror('Error!', f'{e}')
+			else:
+				mb.showinfo('Metrics exported', message)
+
+	def export(history = False, saved = False):
+		""" This function serves the export commands in the tools menu. The records are streamed to a CSV, NDJSON, Parquet or Arrow IPC file chosen by the user, without loading them in the memory :
+		* To export the overall history -> MenubarFunctions.export(history = True)
+		* To export the saved results -> MenubarFunctions.export(saved = True) """
+
+		if history:
+			exportRecords(win, 'Export the overall history', historyRows(), HISTORY_COLUMNS)
+		elif saved:
+			exportRecords(win, 'Export the saved results', savedRows(), SAVED_COLUMNS)
+
+	def historyAnalytics():
+		""" This function serves the history analytics command in the tools menu. It displays the most queried IP addresses, the top countries and organizations (ASN) and the lookups per hour over the latest 24 hours, rendered from the incrementally updated aggregates (see iptracker.analytics) instead of rescanning the overall history. """
+
+		try:
+			snapshot = analytics.snapshot(top = 10)
+		except Exception as e:
+			mb.showerror('Error!', f'{e}')
+			return 0
+
+		text = f'[#] TOTAL LOOKUPS          :   {snapshot["total"]}\n[#] LOOKUPS IN THE LAST HOUR :   {snapshot["last_hour"]}\n'
+		for title, key in (('MOST QUERIED IP ADDRESSES', 'top_ips'), ('COUNTRIES', 'countries'), ('ORGANIZATIONS (ASN)', 'orgs')):
+			text += f'\n{title}\n'
+			for name, count in snapshot[key]:
+				text += '[#] %-40s   %8d\n' %(name[:40], count)
+
+		# Drawing the lookups per hour as a bar chart made of text
+		peak = max([count for hour, count in snapshot["hourly"]] + [1])
+		text += '\nLOOKUPS PER HOUR (LATEST 24 HOURS)\n'
+		for hour, count in snapshot["hourly"]:
+			text += '[#] %-16s   %6d   %s\n' %(hour.replace('T', ' '), count, '#' * round(30 * count / peak))
+		result_panes.acquire().show('History analytics', text, title = 'History analytics - IP Tracker (Python3)')
+
+	def setProvider(name, hedge = False):
+		""" This function serves the provider commands in the tools menu. It makes the provider mentioned in the arguments ('ipinfo' for the ipinfo.io API, 'ip-api' for the ip-api.com API, 'server' for the local API server at server_address) the provider of all the lookups. If hedge is True, then the lookups slower than the latency budget (500 ms) are also sent to the other provider, and the first answer is taken. The providers are created once and reused. """
+
+		if not providers:
+			providers[('ipinfo', False)] = currentProvider()
+		if ('ip-api', False) not in providers:
+			providers[('ip-api', False)] = IpApiProvider()
+		if name == 'server' and ('server', False) not in providers:
+			providers[('server', False)] = ServerProvider(server_address)
+		if (name, hedge) not in providers:
+			other = 'ip-api' if name == 'ipinfo' else 'ipinfo'
+			providers[(name, hedge)] = HedgedProvider(providers[(name, False)], providers[(other, False)], budget = 0.5)
+		useProvider(providers[(name, hedge)])
+
+	def batchLookup():
+		""" This function serves the batch lookup command in the tools menu. The user is asked to choose a text file (one IP address per line) or a CSV file (IP addresses in the first column), and then all the IP addresses are resolved concurrently in a separate batch window. For further more information, check out the documentation. """
+
+		# Asking the user to choose the file containing the list of IP addresses
+		filename = fd.askopenfilename(title = 'Choose the list of IP addresses', filetypes = [('Text / CSV files', '*.txt *.csv'), ('All files', '*')])
+		if not filename:
+			# If the user did not choose any file, then we abort
+
+			return 0
+
+		try:
+			ipAddresses = readIpList(filename)
+		except Exception as e:
+			# If there are any errors encountered while reading the file, then we display the error message to the user
+
+			mb.showerror('Failed to read the file', f'{e}')
+			return 0
+
+		if len(ipAddresses) == 0:
+			mb.showerror('Error!', 'The chosen file does not contain any IP address.')
+			return 0
+
+		BatchLookup(win, ipAddresses)
+
+	def ingestLog():
+		""" This function serves the log ingestion command in the tools menu. The user is asked to choose a log file (like an access log of nginx or an auth log of sshd), the IP addresses are extracted from it in parallel, and the unique public ones are resolved in a batch window while the rest of the log is still being parsed. """
+
+		filename = fd.askopenfilename(title = 'Choose the log file', filetypes = [('Log files', '*.log *.txt'), ('All files', '*')])
+		if not filename:
+			return 0
+
+		try:
+			LogLookup(win, filename)
+		except Exception as e:
+			mb.showerror('Failed to read the log file', f'{e}')
+
+	def fetchedData(save = False, display = False, data = False):
+		""" This function serves the commands for saving the fetched data as well as displaying the already saved fetched data. To get the execution of the proper task, we need to mention the tasks through the arguments. Below are mentioned some of the steps for this purpose :
+		* To save a fetched data -> MenubarFunctions.fetchedData(save = True, data = {your-data-in-dict-format})
+		* To display the already saved data -> MenubarFunctions.fetchedData(display = True)
+
+		Note :
+		* The save task when executed adds the data as a new record to the saved results store (the file named 'saved.db' in the current working directory). The previously saved records are kept, thus any number of results can be saved. Also the save task can be directly executed via the output window save-button. Thus, we dont need to call it anytime.
+		* The display task opens the saved results viewer, which lists the saved records page by page and loads the full information of a record only when it is opened.
+		For further more information, check the documentation for this tool. """
+
+		# Checking the task specified
+		if save:
+			# If the function was called to save the fetched data, then we continue to do so
+
+			# Getting the fetched data specified in the arguments
+			if data == False:
+				# If the data is not defined, then we display the error message to the user
+
+				mb.showerror('Error', 'Failed to save the fetched data due to some internal error.')
+			else:
+				# If the data is properly defined, then we continue to save the data
+
+				try:
+					saved_results.save(data)
+				except Exception as e:
+					# If there are any errors encountered during the process, then we display the error message to the user
+
+					mb.showerror('Error in saving the data', f'{e}')
+				else:
+					# If there are no errors encountered during the process, then we display the success message to the user
+
+					mb.showinfo('Requested data saved', 'The requested data is saved to the saved results store (saved.db). Use Tools -> Display the saved data to view all the saved results.')
+				return 0
+		elif display:
+			# If the function was called to display the already saved data, then we open the saved results viewer
+
+			SavedViewer(win)
+
+	def profiling(enable = None, summary = False):
+		""" This function serves the profiling commands in the tools menu. The tasks are specified using the arguments of the function :
+		* To turn the profiling mode on / off -> MenubarFunctions.profiling(enable = True / False), the profiles of each action (menu command, lookup, startup phase) are then written to the 'profiles' directory (or the one given using --profile DIR)
+		* To display the summary of the slowest recent actions -> MenubarFunctions.profiling(summary = True) """
+
+		if enable is not None:
+			try:
+				if enable:
+					profiler.enable(profiler.directory or 'profiles')
+				else:
+					profiler.disable()
+			except Exception as e:
+				mb.showerror('Error!', f'{e}')
+		elif summary:
+			result_panes.acquire().show('Profiling summary (slowest recent actions)', profiler.report(10), title = 'Profiling summary - IP Tracker (Python3)')
+
+# Profiling every menu command, a flag check only unless the profiling mode is on (the profiling commands themselves are left out)
+for name, function in list(vars(MenubarFunctions).items()):
+	if callable(function) and not name.startswith('_') and name != 'profiling':
+		setattr(MenubarFunctions, name, profiler.profiled(f'menu.{name}')(function))
+
+# The providers created by the provider commands of the tools menu, keyed by the tuple (name, hedge)
+providers = {}
+
+# The address (host:port) of the local API server used as the remote backend by the 'server' provider (see iptracker.server), set using 'main.py gui --server HOST:PORT'
+server_address = '127.0.0.1:8000'
+
+# Re-defining the exit function with some additions
+def exit():
+	""" This function serves the command to exit the application and end the script execution. It replaces the built-in function of python i.e., exit(). The function carries the below mentioned changes :
+	1. Stops the lookup engine, and syncs the pending records of the history log to the disk. (The lookups are already written to the history log as they happen, thus there is nothing else to be saved.)
+	2. Ends the script execution which eventually closes all the active tkinter windows. This is done as the function calls another built-in python function 'quit()' to end the script execution.
+
+	To use this function, just directly call it. Like : exit. The function does not intakes any arguments. """
+
+	try:
+		# Stopping the lookup engine and closing the history log
+		engine.shutdown()
+		exporter.shutdown(wait = True)
+		for item in set(providers.values()):
+			item.close()
+		history_log.close()
+		metrics.closeTrace()
+	except Exception as e:
+		# If there are any other errors encountered during the process, then we display the error to the user
+
+		mb.showerror('Error!', f'{e}')
+	finally:
+		# After all the steps, wheter errors faced or not. We exit the script
+		quit()
+
+# Defining the lookup engine which runs the HTTP GET requests off the tkinter event loop
+# ----
+# 1. The requests are executed by a pool of worker threads, thus the tkinter windows does not freeze for the entire network round trip and several lookups can be in flight at once.
+# 2. The worker threads never touch any tkinter widget. The completed results are put into a queue, which is polled from the tkinter thread using the after() method of the main window.
+# 3. The lookups which are still pending can be cancelled, the results of the cancelled lookups are simply discarded when they arrive.
+# ----
+class LookupEngine:
+	""" This class contains the lookup engine of the application. The engine accepts the IP addresses to be looked up via the submit() method, executes the HTTP requests in the worker threads and hands over the results back to the tkinter thread by calling the callbacks specified while submitting. Below are some of the steps to use the engine :
+	* To attach the engine to a tkinter window -> engine.attach(window, statusVariable, timingVariable)
+	* To submit a lookup -> engine.submit(ipAddress, onSuccess, onError, priority), the priority being INTERACTIVE (default) or BATCH
+	* To cancel all the pending lookups -> engine.cancel()
+	* To stop the engine -> engine.shutdown() """
+
+	def __init__(self, workers = 8, interval = 100):
+		""" The constructor takes the number of worker threads (workers) and the interval (in milliseconds) at which the result queue is polled from the tkinter thread. The interactive lookups have two worker threads of their own, so that they never queue behind the batch lookups waiting for the request scheduler. """
+
+		self.workers = workers
+		self.executor = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = 'lookup')
+		self.interactive = ThreadPoolExecutor(max_workers = 2, thread_name_prefix = 'lookup-interactive')
+		self.results = Queue()
+		self.pending = {}
+		self.counter = 0
+		self.interval = interval
+		self.window = None
+		self.statusVariable = None
+		self.timingVariable = None
+		metrics.gauge('queue_depth', lambda : len(self.pending), 'Number of the lookups submitted from the graphical interface and not completed yet.')
+
+	def attach(self, window, statusVariable = None, timingVariable = None):
+		""" This method attaches the engine to a tkinter window, and starts polling the result queue using the after() method of that window. The statusVariable (a tkinter StringVar) if specified is used to display the pending indicator, and the timingVariable (a tkinter StringVar) if specified is used to display the phase timings of the last lookup (the status bar). Re-attaching the engine to another window stops the polling on the older window. """
+
+		self.window = window
+		self.statusVariable = statusVariable
+		self.timingVariable = timingVariable
+		self.updateStatus()
+		window.after(self.interval, self.poll, window)
+
+	def submit(self, ipAddress, onSuccess, onError, priority = INTERACTIVE):
+		""" This method submits a lookup for the IP address specified in the arguments. The onSuccess(ipAddress, response, age) callback is called with the parsed response and its age in the cache (None if fetched from the server), and the onError(ipAddress, error) callback is called with the exception raised. Both the callbacks are called from the tkinter thread. The priority (INTERACTIVE or BATCH) is the lane of the request in the scheduler. The method returns the id of the submitted lookup. """
+
+		self.counter += 1
+		lookupId = self.counter
+		executor = self.interactive if priority == INTERACTIVE else self.executor
+		future = executor.submit(self.worker, lookupId, ipAddress, priority)
+		self.pending[lookupId] = (ipAddress, future, onSuccess, onError)
+		self.updateStatus()
+		return lookupId
+
+	def worker(self, lookupId, ipAddress, priority):
+		""" This method is executed by the worker threads. It executes the lookup and puts the result (or the error encountered) into the result queue. In the profiling mode, the lookup is profiled on the worker thread itself (cProfile covers only the thread it runs in), while its display and its recording to the history are profiled on the tkinter thread (see displayIp()). """
+
+		try:
+			with profiler.profile('lookup' if priority == INTERACTIVE else 'lookup.batch'):
+				result = lookupIp(ipAddress, priority)
+		except Exception as e:
+			# If there are any errors encountered during the lookup, then we pass the error to the tkinter thread
+
+			self.results.put((lookupId, None, e, metrics.last()))
+		else:
+			self.results.put((lookupId, result, None, metrics.last()))
+
+	def cancel(self, lookupIds = None):
+		""" This method cancels the pending lookups whose ids are mentioned in the arguments (lookupIds), or all the pending lookups if no ids are mentioned. The lookups which are still waiting in the pool are cancelled directly, and the results of the lookups which are already running are discarded on arrival. The method returns the number of lookups cancelled. """
+
+		if lookupIds is None:
+			lookupIds = list(self.pending.keys())
+
+		count = 0
+		for lookupId in lookupIds:
+			item = self.pending.pop(lookupId, None)
+			if item is not None:
+				item[1].cancel()
+				count += 1
+		self.updateStatus()
+		return count
+
+	def poll(self, window):
+		""" This method drains the result queue and calls the callbacks of the completed lookups. It is called from the tkinter thread using the after() method, and it re-schedules itself as long as the engine is attached to the same window. """
+
+		if window is not self.window:
+			# If the engine has been attached to another window, then we stop polling on this one
+
+			return 0
+
+		while True:
+			try:
+				lookupId, result, error, trace = self.results.get_nowait()
+			except Empty:
+				break
+
+			# Discarding the results of the cancelled lookups
+			item = self.pending.pop(lookupId, None)
+			if item is None:
+				continue
+
+			ipAddress, future, onSuccess, onError = item
+			self.updateStatus()
+			try:
+				if error is None:
+					# Timing the callback, i.e., the building of the widgets displaying the result, as the last phase of the lookup
+					startTime = monotonic()
+					onSuccess(ipAddress, *result)
+					metrics.observe('widgets', monotonic() - startTime, trace)
+				else:
+					onError(ipAddress, error)
+			except Exception as e:
+				# If there are any errors encountered in the callbacks, then we display the error message to the user without stopping the poll loop
+
+				mb.showerror('Error!', f'{e}')
+			self.updateTiming(ipAddress, trace)
+
+		try:
+			window.after(self.interval, self.poll, window)
+		except Exception:
+			# If the window is already destroyed, then we stop polling
+
+			pass
+
+	def updateStatus(self):
+		""" This method updates the pending indicator (the statusVariable) with the number of lookups in flight. """
+
+		if self.statusVariable is None:
+			return 0
+
+		try:
+			if len(self.pending) == 0:
+				self.statusVariable.set('')
+			else:
+				self.statusVariable.set(f'Pending lookups : {len(self.pending)}')
+		except Exception:
+			# If the window holding the variable is already destroyed, then we pass
+
+			pass
+
+	def updateTiming(self, ipAddress, trace):
+		""" This method updates the status bar (the timingVariable) with the phase timings of the lookup mentioned in the arguments, along with the cache hit rate and the queue depth. """
+
+		if self.timingVariable is None or trace is None:
+			return 0
+
+		try:
+			hitRate = cache.stats()["hit_rate"]
+			self.timingVariable.set(f'Last lookup ({ipAddress}, {trace.outcome}) : {trace.summary()}   |   Cache hit rate : {hitRate * 100:.0f}%   |   Queue : {len(self.pending)}')
+		except Exception:
+			# If the window holding the variable is already destroyed, then we pass
+
+			pass
+
+	def shutdown(self):
+		""" This method cancels all the pending lookups and stops the worker threads. """
+
+		self.cancel()
+		self.executor.shutdown(wait = False, cancel_futures = True)
+		self.interactive.shutdown(wait = False, cancel_futures = True)
+		currentProvider().close()
+
+# The lookup engine is shared by all the windows of the application
+engine = LookupEngine()
+
+# Defining the pool of the result panes
+# ----
+# 1. All the windows of the application are Toplevel windows of the single main (Tk) window, thus there is only one tcl interpreter and one mainloop for the entire application.
+# 2. The result panes are not destroyed on closing. They are withdrawn (hidden) and put back into a small pool, and the next result is displayed by re-configuring the widgets of a pooled pane instead of building a new window. The panes beyond the pool size are destroyed on closing.
+# ----
+class ResultPane:
+	""" This class contains a result pane, i.e., a Toplevel window displaying a heading, the fetched information, a status line and the Save data / Close buttons. The pane is built once and re-configured for each result using the show() method. """
+
+	def __init__(self, pool):
+		""" The constructor builds the widgets of the pane, styled as per the current color theme. """
+
+		self.pool = pool
+		self.save = None
+		self.window = theme.window(Toplevel(win))
+		self.window.resizable(0, 0)  # Making the tkinter window's size to remain fixed, i.e., it cannot change.
+		self.window.protocol('WM_DELETE_WINDOW', self.close)
+
+		# Definining the heading label, the output label and the status label
+		self.heading = theme.label(
+			self.window,
+			font = ('Arial', 13, 'bold', 'italic'),
+			justify = 'left',
+			)
+		self.heading.pack(padx = 5, pady = 5)
+		self.body = theme.label(
+			self.window,
+			font = ('Arial', 11, ''),
+			justify = 'left',
+			)
+		self.body.pack(padx = 5, pady = 5)
+		self.status = theme.label(
+			self.window,
+			font = ('Arial', 10, 'italic'),
+			justify = 'left',
+			)
+		self.status.pack(padx = 5, pady = 0)
+
+		# Defining the frame which contains the buttons for saving data as wel as closing the window
+		frame = theme.frame(self.window)
+		frame.pack(expand = True, fill = X, padx = 5, pady = 10)
+		self.saveButton = theme.button(
+			frame,
+			text = 'Save data',
+			font = ('Arial', 12, 'bold'),
+			relief = GROOVE,
+			command = lambda : self.save(),
+			)
+		theme.button(
+			frame,
+			text = 'Close',
+			font = ('Arial', 12, 'bold'),
+			relief = GROOVE,
+			command = self.close,
+			).pack(side = RIGHT, padx = 5, pady = 5)
+
+	def show(self, heading, text, status = '', save = None, title = 'Output - IP Tracker (Python3)'):
+		""" This method displays the result mentioned in the arguments in the pane. The Save data button is displayed only if the save callback is specified. """
+
+		self.window.title(title)
+		self.heading.config(text = heading)
+		self.body.config(text = text)
+		self.status.config(text = status)
+		self.save = save
+		if save is None:
+			self.saveButton.pack_forget()
+		else:
+			self.saveButton.pack(side = LEFT, padx = 5, pady = 5)
+		self.window.deiconify()
+		self.window.lift()
+
+	def close(self):
+		""" This method hides the pane and hands it back to the pool. """
+
+		self.save = None
+		self.window.withdraw()
+		self.pool.release(self)
+
+class ResultPanes:
+	""" This class contains the pool of the result panes. Below are some of the steps to use the pool :
+	* To get a pane (a pooled one if available, else a new one) -> result_panes.acquire()
+	* To hand a closed pane back -> result_panes.release(pane) (done by the pane itself on closing) """
+
+	def __init__(self, size = 4):
+		""" The constructor takes the maximum number of the idle panes kept in the pool. """
+
+		self.size = size
+		self.idle = []
+
+	def acquire(self):
+		""" This method returns an idle pane from the pool, or builds a new one if the pool is empty. """
+
+		while self.idle:
+			pane = self.idle.pop()
+			try:
+				if pane.window.winfo_exists():
+					return pane
+			except Exception:
+				# If the pane belongs to an already destroyed main window, then we drop it
+
+				pass
+		return ResultPane(self)
+
+	def release(self, pane):
+		""" This method puts the closed pane back into the pool, or destroys it if the pool is already full. """
+
+		if len(self.idle) < self.size:
+			self.idle.append(pane)
+		else:
+			pane.window.destroy()
+
+# The pool of the result panes is shared by the entire application
+result_panes = ResultPanes()
+
+@profiler.profiled('fetchIp.dispatch')
+def fetchIp(ipAddress, assumePrefix = None):
+	""" This function submits the lookup of the IP address mentioned in the arguments to the lookup engine, and returns immediately. The result (the fetched information about the IP address) is displayed in a new tkinter window once the lookup completes. If a network (CIDR, like 8.8.8.0/24) is entered instead, then the network is swept in a sweep window, assuming the results without any network range apply to the /assumePrefix network around the address (if specified). """
+
+	if '/' in ipAddress:
+		# If the user entered a network, then we sweep it
+		try:
+			SweepLookup(win, ipAddress.strip(), assumePrefix = assumePrefix)
+		except ValueError as e:
+			mb.showerror('Invalid network', f'{e}')
+		return 0
+
+	# Validating the user entered IP address before submitting, so that the invalid and the private / reserved addresses are reported right away
+	try:
+		ipAddress = validateIp(ipAddress)
+	except ValueError as e:
+		mb.showerror('Invalid IP address', f'{e}')
+		return 0
+
+	engine.submit(ipAddress, displayIp, lambda ipAddress, error : mb.showerror('Error!', f'{error}'))
+
+@profiler.profiled('displayIp')
+def displayIp(ipAddress, response, age = None):
+	""" This function displays the fetched information (response) about the IP address mentioned in the arguments in a result pane drawn from the pool. It is called by the lookup engine from the tkinter thread, once the lookup completes. The age (in seconds) is specified if the response came from the cache. """
+
+	# Arranging the output text to be displayed
+	text = formatText(response)
+
+	# Saving the current search to the session history and the overall history log
+	recordLookup(ipAddress, response)
+
+	# Displaying the result, along with whether the information came from the cache and how old it is, or else the provider it was fetched from (the one which answered, for the hedged lookups)
+	source = response.get("provider") or currentProvider().name
+	result_panes.acquire().show(
+		'Information fetched',
+		text,
+		status = f'Fetched live from {source}' if age is None else f'Fetched from cache ({formatAge(age)} old)',
+		save = lambda : MenubarFunctions.fetchedData(save = True, data = response),
+		)
+
+# Defining the virtualized table used for displaying the large number of rows
+# ----
+# 1. The rows are kept in a plain python list (the model), and only the rows visible on the screen are materialized as Treeview items. On scrolling, the same few items are re-filled from the model, thus the cost of scrolling does not depend on the number of rows.
+# 2. The table can be sorted by any column (click on the heading, click again to reverse) and filtered by a case-insensitive text on any column (or all the columns). Sorting and filtering work on a list of row indexes (the view), without touching the rows themselves. The rows appended while sorted are inserted at their sorted position using binary search.
+# 3. The appended rows do not redraw the table one by one, the redraw is scheduled once for all the rows appended in the meantime.
+# ----
+class VirtualTable:
+	""" This class contains the virtualized table widget. Below are some of the steps to use the table :
+	* To create the table -> table = VirtualTable(master, columns, height), and then pack / grid table.frame
+	* To append a row (a tuple of strings, in the order of the columns) -> table.append(row)
+	* To sort by a column -> table.sort(column), to filter -> table.filter(column, text) """
+
+	def __init__(self, master, columns, height = 20, widths = None):
+		""" The constructor takes the master widget, the names of the columns, the number of the visible rows and an optional dict of the column widths. """
+
+		self.columns = tuple(columns)
+		self.height = height
+		self.rows = []
+		self.view = None  # The list of the row indexes (sorted ascending / filtered), or None for all the rows in their order of arrival
+		self.offset = 0
+		self.sortColumn = None
+		self.descending = False
+		self.filterColumn = None
+		self.filterText = ''
+		self.scheduled = False
+
+		self.frame = theme.frame(master)
+
+		# Defining the filter bar (column chooser and the filter text)
+		bar = theme.frame(self.frame)
+		bar.pack(fill = X, pady = (0, 5))
+		theme.label(bar, text = 'Filter', font = ('Arial', 11)).pack(side = LEFT, padx = 5)
+		self.filterColumnVariable = StringVar(self.frame, value = 'all')
+		Combobox(bar, textvariable = self.filterColumnVariable, values = ('all',) + self.columns, state = 'readonly', width = 10).pack(side = LEFT, padx = 5)
+		self.filterTextVariable = StringVar(self.frame)
+		Entry(bar, textvariable = self.filterTextVariable, font = ('Arial', 11), width = 24).pack(side = LEFT, padx = 5)
+		self.filterColumnVariable.trace_add('write', lambda *arguments : self.onFilter())
+		self.filterTextVariable.trace_add('write', lambda *arguments : self.onFilter())
+		self.countLabel = theme.label(bar, font = ('Arial', 10, 'italic'))
+		self.countLabel.pack(side = RIGHT, padx = 5)
+
+		# Defining the tree (only the visible rows) along with the scrollbar controlling the offset
+		self.tree = Treeview(self.frame, columns = self.columns, show = 'headings', height = height)
+		for column in self.columns:
+			self.tree.heading(column, text = column.upper(), command = lambda column = column : self.sort(column))
+			self.tree.column(column, width = (widths or {}).get(column, 120))
+		self.scrollbar = Scrollbar(self.frame, command = self.onScrollbar)
+		self.scrollbar.pack(side = RIGHT, fill = Y)
+		self.tree.pack(side = LEFT, expand = True, fill = BOTH)
+		for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+			self.tree.bind(sequence, self.onWheel)
+
+	def __len__(self):
+		""" This method returns the number of rows in the current view (after the filter). """
+
+		return len(self.rows) if self.view is None else len(self.view)
+
+	def matches(self, row):
+		""" This method returns whether the row mentioned in the arguments passes the current filter. """
+
+		if not self.filterText:
+			return True
+		if self.filterColumn is None:
+			return any(self.filterText in value.lower() for value in row)
+		return self.filterText in row[self.filterColumn].lower()
+
+	def append(self, row):
+		""" This method appends a row to the table. The redraw is scheduled, not done right away. """
+
+		row = tuple(str(value) for value in row)
+		self.rows.append(row)
+		if self.view is not None and self.matches(row):
+			if self.sortColumn is None:
+				self.view.append(len(self.rows) - 1)
+			else:
+				column = self.sortColumn
+				insort(self.view, len(self.rows) - 1, key = lambda index : self.rows[index][column])
+		self.schedule()
+
+	def schedule(self):
+		""" This method schedules a redraw of the table, once for all the changes made in the meantime. """
+
+		if not self.scheduled:
+			self.scheduled = True
+			self.frame.after_idle(self.refresh)
+
+	def rebuild(self):
+		""" This method rebuilds the view (the list of the row indexes) for the current sort column and filter. """
+
+		if self.sortColumn is None and not self.filterText:
+			self.view = None
+			return
+
+		indexes = range(len(self.rows))
+		if self.filterText:
+			indexes = [index for index in indexes if self.matches(self.rows[index])]
+		if self.sortColumn is not None:
+			column, rows = self.sortColumn, self.rows
+			indexes = sorted(indexes, key = lambda index : rows[index][column])
+		self.view = list(indexes)
+
+	def sort(self, column):
+		""" This method sorts the table by the column mentioned in the arguments. Sorting again by the same column reverses the order. """
+
+		column = self.columns.index(column)
+		if self.sortColumn == column:
+			self.descending = not self.descending
+		else:
+			self.sortColumn, self.descending = column, False
+			self.rebuild()
+		for index, name in enumerate(self.columns):
+			arrow = (' \u25bc' if self.descending else ' \u25b2') if index == column else ''
+			self.tree.heading(name, text = name.upper() + arrow)
+		self.offset = 0
+		self.schedule()
+
+	def filter(self, column, text):
+		""" This method filters the table by the text mentioned in the arguments (case-insensitive, matched anywhere in the value) on the column, or on all the columns if the column is None or 'all'. """
+
+		self.filterColumn = None if column in (None, 'all') else self.columns.index(column)
+		self.filterText = text.strip().lower()
+		self.rebuild()
+		self.offset = 0
+		self.schedule()
+
+	def onFilter(self):
+		""" This method is called when the filter bar is changed. """
+
+		self.filter(self.filterColumnVariable.get(), self.filterTextVariable.get())
+
+	def row(self, position):
+		""" This method returns the row at the position mentioned in the arguments, in the current view. """
+
+		if self.view is None:
+			return self.rows[position]
+		if self.descending:
+			position = len(self.view) - 1 - position
+		return self.rows[self.view[position]]
+
+	def refresh(self):
+		""" This method redraws the visible rows and the scrollbar. """
+
+		self.scheduled = False
+		try:
+			total = len(self)
+			self.offset = max(0, min(self.offset, total - self.height))
+			visible = range(self.offset, min(total, self.offset + self.height))
+
+			# Re-filling the existing items, and adding / removing items only if the number of visible rows changed
+			items = self.tree.get_children()
+			for item, position in zip(items, visible):
+				self.tree.item(item, values = self.row(position))
+			if len(items) > len(visible):
+				self.tree.delete(*items[len(visible):])
+			for position in visible[len(items):]:
+				self.tree.insert('', 'end', values = self.row(position))
+
+			if total == 0:
+				self.scrollbar.set(0, 1)
+			else:
+				self.scrollbar.set(self.offset / total, (self.offset + len(visible)) / total)
+			self.countLabel.config(text = f'{total} of {len(self.rows)} rows')
+		except TclError:
+			# If the table is already destroyed, then we pass
+
+			pass
+
+	def scrollTo(self, offset):
+		""" This method scrolls the table to the offset (the position of the first visible row) mentioned in the arguments. """
+
+		self.offset = int(offset)
+		self.refresh()
+
+	def onScrollbar(self, action, amount, unit = None):
+		""" This method is called by the scrollbar, either with ('moveto', fraction) or with ('scroll', count, 'units' / 'pages'). """
+
+		if action == 'moveto':
+			self.scrollTo(float(amount) * len(self))
+		elif action == 'scroll':
+			self.scrollTo(self.offset + int(amount) * (self.height if unit == 'pages' else 1))
+
+	def onWheel(self, event):
+		""" This method scrolls the table on the mouse wheel events. """
+
+		if event.num == 4 or event.delta > 0:
+			self.scrollTo(self.offset - 3)
+		else:
+			self.scrollTo(self.offset + 3)
+		return 'break'
+
+class BatchLookup:
+	""" This class serves the batch lookup feature of the application. It resolves a list of IP addresses through the lookup engine, while keeping only a bounded number of lookups in flight at once, and streams each result as a row into a table in a separate window as soon as it completes. The window also displays the progress, the throughput (lookups/sec) and an error column for the failed lookups. To start a batch lookup -> BatchLookup(master, ipAddresses). """
+
+	# The columns of the results table, the keys are the same as those of the ipinfo.io response
+	columns = ('ip', 'hostname', 'city', 'region', 'country', 'org', 'error')
+
+	def __init__(self, master, ipAddresses, concurrency = None):
+		""" The constructor takes the master tkinter window, the list of IP addresses to be resolved and the maximum number of lookups in flight (defaults to the number of worker threads of the lookup engine). The IP addresses are validated and deduplicated first, the rejected ones are listed in the table with their errors without any lookup. """
+
+		# Screening the IP addresses through the validation stage
+		screened = list(screenIps(ipAddresses))
+		self.ipAddresses = [ipAddress for ipAddress, error in screened if error is None]
+		self.rejected = [(ipAddress, error) for ipAddress, error in screened if error is not None]
+		self.duplicates = len(ipAddresses) - len(screened)
+		self.concurrency = concurrency or engine.workers
+		self.position = 0
+		self.completed = 0
+		self.errors = 0
+		self.inFlight = set()
+		self.startTime = monotonic()
+		self.responses = []  # The successful responses not saved yet, for the save results button
+
+		# Creating the tkinter window to display the results
+		self.window = theme.window(Toplevel(master))
+		self.window.title('Batch lookup - IP Tracker (Python3)')
+		self.window.protocol('WM_DELETE_WINDOW', self.close)
+
+		# Defining the progress label, which displays the number of completed lookups along with the throughput
+		self.progress = StringVar(self.window)
+		theme.label(
+			self.window,
+			textvariable = self.progress,
+			font = ('Arial', 11, 'bold'),
+			justify = 'left',
+			).pack(padx = 5, pady = 5)
+
+		# Defining the results table (virtualized, thus it stays smooth for the batches of any size)
+		self.table = VirtualTable(self.window, self.columns, height = 20, widths = {"error" : 220})
+		self.table.frame.pack(expand = True, fill = BOTH, padx = 5, pady = 5)
+		for ipAddress, error in self.rejected:
+			self.table.append([ipAddress] + [''] * (len(self.columns) - 2) + [error])
+
+		# Defining the frame which contains the buttons for cancelling the batch as well as closing the window
+		frame = theme.frame(self.window)
+		frame.pack(fill = X, padx = 5, pady = 10)
+		for text, command, side in (('Cancel', self.cancel, LEFT), ('Save results', self.save, LEFT), ('Export', self.export, LEFT), ('Close', self.close, RIGHT)):
+			theme.button(
+				frame,
+				text = text,
+				font = ('Arial', 12, 'bold'),
+				relief = GROOVE,
+				command = command,
+				).pack(side = side, padx = 5, pady = 5)
+
+		# Starting the pipeline
+		self.updateProgress()
+		self.feed()
+
+	def feed(self):
+		""" This method submits the next IP addresses of the list to the lookup engine, until the number of lookups in flight reaches the concurrency limit or the list is exhausted. """
+
+		while len(self.inFlight) < self.concurrency and self.position < len(self.ipAddresses):
+			ipAddress = self.ipAddresses[self.position]
+			self.position += 1
+			lookupId = engine.submit(ipAddress, self.onSuccess, self.onError, BATCH)
+			self.inFlight.add(lookupId)
+
+	def onSuccess(self, ipAddress, response, age = None):
+		""" This method is called by the lookup engine (from the tkinter thread) when a lookup of the batch completes successfully. """
+
+		recordLookup(ipAddress, response)
+		self.responses.append(response)
+		self.addRow([ipAddress] + [str(response.get(column, '')) for column in self.columns[1:-1]] + [''])
+
+	def onError(self, ipAddress, error):
+		""" This method is called by the lookup engine (from the tkinter thread) when a lookup of the batch fails. """
+
+		self.errors += 1
+		self.addRow([ipAddress] + [''] * (len(self.columns) - 2) + [f'{error}'])
+
+	def addRow(self, values):
+		""" This method appends a row to the results table, updates the progress and feeds the pipeline with the next IP addresses. """
+
+		self.completed += 1
+		self.inFlight = {lookupId for lookupId in self.inFlight if lookupId in engine.pending}
+		try:
+			self.table.append(values)
+			self.updateProgress()
+		except Exception:
+			# If the batch window is already destroyed, then we stop the batch
+
+			self.cancel()
+			return 0
+		self.feed()
+
+	def updateProgress(self):
+		""" This method updates the progress label with the number of completed lookups, the throughput and the number of errors. """
+
+		elapsed = monotonic() - self.startTime
+		rate = self.completed / elapsed if elapsed > 0 else 0
+		self.progress.set(f'Completed : {self.completed} / {len(self.ipAddresses)}   |   Throughput : {rate:.1f} lookups/sec   |   Errors : {self.errors}   |   Rejected : {len(self.rejected)}   |   Duplicates skipped : {self.duplicates}')
+
+	def save(self):
+		""" This method saves the successful results of the batch (those not saved yet) to the saved results store, in one transaction. """
+
+		try:
+			count = saved_results.saveMany(self.responses)
+		except Exception as e:
+			mb.showerror('Error in saving the data', f'{e}', parent = self.window)
+			return 0
+		self.responses = []
+		mb.showinfo('Results saved', f'{count} results saved to the saved results store (saved.db).', parent = self.window)
+
+	def export(self):
+		""" This method exports the rows of the results table (all of them, as completed so far, in the order of completion) to a file chosen by the user. """
+
+		rows = list(self.table.rows)
+		exportRecords(self.window, 'Export the batch results', (dict(zip(self.columns, row)) for row in rows), tuple((column, 'string') for column in self.columns))
+
+	def extend(self, ipAddresses):
+		""" This method appends more IP addresses (already validated and deduplicated) to the batch while it runs, and feeds the pipeline with them. """
+
+		self.ipAddresses.extend(ipAddresses)
+		self.updateProgress()
+		self.feed()
+
+	def cancel(self):
+		""" This method cancels the remaining lookups of the batch. """
+
+		self.position = len(self.ipAddresses)
+		engine.cancel(self.inFlight)
+		self.inFlight = set()
+
+	def close(self):
+		""" This method cancels the remaining lookups of the batch and closes the batch window. """
+
+		self.cancel()
+		self.window.destroy()
+
+class LogLookup(BatchLookup):
+	""" This class serves the log ingestion feature of the application. The IP addresses are extracted from the log file by the ingestion pipeline (see iptracker.ingest) on a background thread, and each unique public address is appended to the batch as soon as it is found, thus the lookups overlap with the parsing of the log. The progress label also displays the progress of the parsing and the most frequent addresses. To start -> LogLookup(master, filename). """
+
+	def __init__(self, master, filename):
+		""" The constructor takes the master tkinter window and the filename of the log. """
+
+		# The worker processes are spawned rather than forked, as forking this multi-threaded process (tkinter, the lookup workers) may deadlock the children on a lock held by another thread
+		self.ingestion = LogIngestion(filename, context = get_context('spawn'))
+		self.found = Queue()
+		super().__init__(master, [])
+		self.window.title(f'Log ingestion ({filename}) - IP Tracker (Python3)')
+
+		# Running the ingestion on a background thread, the addresses found are handed over through the queue
+		Thread(target = self.ingest, name = 'ingest', daemon = True).start()
+		self.window.after(200, self.drain)
+
+	def ingest(self):
+		""" This method runs the ingestion (on the background thread), and puts the addresses found into the queue. None is put at the end. """
+
+		try:
+			for ipAddress in self.ingestion.addresses():
+				self.found.put(ipAddress)
+		finally:
+			self.found.put(None)
+
+	def drain(self):
+		""" This method moves the addresses found so far from the queue to the batch (from the tkinter thread), and polls again until the ingestion ends. """
+
+		ipAddresses, finished = [], False
+		try:
+			while True:
+				ipAddress = self.found.get_nowait()
+				if ipAddress is None:
+					finished = True
+					break
+				ipAddresses.append(ipAddress)
+		except Empty:
+			pass
+
+		try:
+			if self.position < len(self.ipAddresses) or not self.ingestion.cancelled:
+				self.extend(ipAddresses)
+			else:
+				self.updateProgress()
+			if not finished:
+				self.window.after(200, self.drain)
+		except TclError:
+			# If the window is already destroyed, then we stop the ingestion
+
+			self.ingestion.cancel()
+
+	def updateProgress(self):
+		""" This method updates the progress label with the progress of the lookups, followed by the progress of the parsing and the most frequent addresses. """
+
+		super().updateProgress()
+		stats = self.ingestion.stats()
+		parsed = f'{stats["bytes_read"] / 1048576:.1f} / {stats["bytes_total"] / 1048576:.1f} MB' if stats["bytes_total"] else f'{stats["bytes_read"] / 1048576:.1f} MB'
+		top = ', '.join(f'{ipAddress} ({count})' for ipAddress, count in self.ingestion.top(3))
+		self.progress.set(self.progress.get() + f'\nParsed : {parsed}{" (done)" if stats["done"] else ""}   |   Unique addresses : {stats["unique"]} ({stats["rejected"]} not public)   |   Most frequent : {top}')
+
+	def cancel(self):
+		""" This method stops the ingestion, along with the remaining lookups of the batch. """
+
+		self.ingestion.cancel()
+		super().cancel()
+
+class SweepLookup(BatchLookup):
+	""" This class serves the subnet sweep feature of the application. The hosts of the network are probed from the coarse to the fine (see iptracker.sweep), with a bounded number of lookups in flight, and once a result holds the network range the address belongs to, the rows of all the other hosts of that range are inferred from it instead of being looked up (the 'inferred_from' column). The progress label also displays the number of upstream calls saved. To start -> SweepLookup(master, '8.8.8.0/24'). """
+
+	# The columns of the results table, along with the address each inferred row was inferred from
+	columns = BatchLookup.columns[:-1] + ('inferred_from', 'error')
+
+	def __init__(self, master, network, assumePrefix = None):
+		""" The constructor takes the master tkinter window, the network (CIDR) to be swept and the prefix length assumed for the results holding no network range. ValueError is raised for the invalid, non-public or too large networks. """
+
+		self.sweep = SubnetSweep(network, assumePrefix = assumePrefix)
+		super().__init__(master, [])
+		self.window.title(f'Subnet sweep ({self.sweep.network}) - IP Tracker (Python3)')
+
+	def feed(self):
+		""" This method submits the next hosts to be probed to the lookup engine, until the number of lookups in flight reaches the concurrency limit or there is no host left. """
+
+		while len(self.inFlight) < self.concurrency:
+			ipAddress = self.sweep.next()
+			if ipAddress is None:
+				break
+			self.inFlight.add(engine.submit(ipAddress, self.onSuccess, self.onError, BATCH))
+
+	def onSuccess(self, ipAddress, response, age = None):
+		""" This method is called by the lookup engine (from the tkinter thread) when a probe completes successfully. The rows inferred from the result are appended right after its own row. The inferred results are neither recorded to the history nor saved, as they are not lookups. """
+
+		inferred = self.sweep.record(ipAddress, response, age)
+		super().onSuccess(ipAddress, response, age)
+		try:
+			for address, result in inferred:
+				self.table.append([address] + [str(result.get(column, '')) for column in self.columns[1:-1]] + [''])
+			self.updateProgress()
+		except TclError:
+			self.cancel()
+
+	def onError(self, ipAddress, error):
+		""" This method is called by the lookup engine (from the tkinter thread) when a probe fails. """
+
+		self.sweep.fail(ipAddress)
+		super().onError(ipAddress, error)
+
+	def updateProgress(self):
+		""" This method updates the progress label with the counters of the sweep : the hosts probed and inferred, the errors, and the upstream calls saved. """
+
+		stats = self.sweep.stats()
+		elapsed = monotonic() - self.startTime
+		rate = self.completed / elapsed if elapsed > 0 else 0
+		self.progress.set(f'Hosts : {stats["fetched"] + stats["cached"] + stats["inferred"] + stats["errors"] + stats["skipped"]} / {stats["hosts"]}   |   Fetched : {stats["fetched"]}   |   From cache : {stats["cached"]}   |   Inferred : {stats["inferred"]}   |   Errors : {stats["errors"]}   |   Skipped (not public) : {stats["skipped"]}\nThroughput : {rate:.1f} lookups/sec   |   Upstream calls saved : {stats["calls_saved"]}')
+
+	def cancel(self):
+		""" This method stops the sweep, along with the probes in flight. """
+
+		self.sweep.cancel()
+		super().cancel()
+
+class HistoryViewer:
+	""" This class serves the history viewer window of the application. The window displays the overall history page by page (from the newest to the oldest lookups) using the indexed history store, and the history can be filtered by the IP address prefix and the range of dates. To open the viewer -> HistoryViewer(master). """
+
+	def __init__(self, master, pageSize = 50):
+		""" The constructor takes the master tkinter window and the number of rows per page. """
+
+		self.pageSize = pageSize
+		self.pages = []  # The keyset cursors of the pages visited so far, used for the previous button
+		self.cursor = None
+		self.last = None
+		self.full = False
+
+		# Creating the tkinter window of the viewer
+		self.window = theme.window(Toplevel(master))
+		self.window.title('Overall history - IP Tracker (Python3)')
+
+		# Defining the filter form (IP prefix, from date, to date) along with the search button
+		frame = theme.frame(self.window)
+		frame.pack(fill = X, padx = 5, pady = 5)
+		self.prefix, self.start, self.end = StringVar(self.window), StringVar(self.window), StringVar(self.window)
+		for text, variable in (('IP prefix', self.prefix), ('From (YYYY-MM-DD)', self.start), ('To (YYYY-MM-DD)', self.end)):
+			theme.label(
+				frame,
+				text = text,
+				font = ('Arial', 11),
+				).pack(side = LEFT, padx = 5, pady = 5)
+			Entry(frame, textvariable = variable, font = ('Arial', 11), width = 14).pack(side = LEFT, padx = 5, pady = 5)
+		self.button(frame, 'Search', self.search).pack(side = LEFT, padx = 5, pady = 5)
+
+		# Defining the history table
+		self.table = Treeview(self.window, columns = ('ip', 'datetime'), show = 'headings', height = pageSize if pageSize < 25 else 25)
+		self.table.heading('ip', text = 'IP')
+		self.table.heading('datetime', text = 'DATETIME')
+		self.table.column('ip', width = 260)
+		self.table.column('datetime', width = 260)
+		self.table.pack(expand = True, fill = BOTH, padx = 5, pady = 5)
+
+		# Defining the frame which contains the pagination buttons and the page label
+		frame = theme.frame(self.window)
+		frame.pack(fill = X, padx = 5, pady = 10)
+		self.button(frame, 'Previous', self.previous).pack(side = LEFT, padx = 5, pady = 5)
+		self.button(frame, 'Next', self.next).pack(side = RIGHT, padx = 5, pady = 5)
+		self.pageLabel = StringVar(self.window)
+		theme.label(
+			frame,
+			textvariable = self.pageLabel,
+			font = ('Arial', 11, 'italic'),
+			).pack(padx = 5, pady = 5)
+
+		self.search()
+
+	def button(self, master, text, command):
+		""" This method returns a button styled as per the color theme of the application. """
+
+		return theme.button(
+			master,
+			text = text,
+			font = ('Arial', 12, 'bold'),
+			relief = GROOVE,
+			command = command,
+			)
+
+	def filters(self):
+		""" This method returns the filters (prefix, start, end) entered in the form, the dates being converted to timestamps. The to date is inclusive. """
+
+		start = end = None
+		if self.start.get().strip():
+			start = datetime.strptime(self.start.get().strip(), '%Y-%m-%d').timestamp()
+		if self.end.get().strip():
+			end = datetime.strptime(self.end.get().strip(), '%Y-%m-%d').timestamp() + 86400
+		return self.prefix.get().strip(), start, end
+
+	def load(self, cursor):
+		""" This method loads the page starting after the cursor mentioned in the arguments into the table. It returns False if the page is empty. """
+
+		try:
+			prefix, start, end = self.filters()
+			rows = history_index.query(prefix, start, end, after = cursor, limit = self.pageSize)
+		except Exception as e:
+			mb.showerror('Error!', f'{e}', parent = self.window)
+			return False
+
+		if len(rows) == 0 and cursor is not None:
+			return False
+
+		self.table.delete(*self.table.get_children())
+		for rowId, ipAddress, timestamp in rows:
+			self.table.insert('', 'end', values = (ipAddress, datetime.fromtimestamp(timestamp).ctime()))
+		self.cursor = cursor
+		self.last = (rows[-1][2], rows[-1][0]) if rows else None
+		self.full = len(rows) == self.pageSize
+		self.pageLabel.set(f'Page {len(self.pages) + 1}' if rows else 'There are no history recorded.')
+		return True
+
+	def search(self):
+		""" This method loads the first page for the filters entered in the form. """
+
+		self.pages = []
+		self.load(None)
+
+	def next(self):
+		""" This method loads the next (older) page. """
+
+		if self.last is None or not self.full:
+			return 0
+		cursor = self.cursor
+		self.pages.append(cursor)
+		if not self.load(self.last):
+			self.pages.pop()
+
+	def previous(self):
+		""" This method loads the previous (newer) page. """
+
+		if len(self.pages) == 0:
+			return 0
+		self.load(self.pages.pop())
+
+class SavedViewer(HistoryViewer):
+	""" This class serves the saved results viewer window of the application. The window lists the saved results page by page (from the newest to the oldest) with their summary (country, city, org), and the full information of a record is loaded from the store only when it is opened (double click or the Open button). The list can be filtered by the IP address prefix. To open the viewer -> SavedViewer(master). """
+
+	# The columns of the table, the keys are the same as those of the ipinfo.io response
+	columns = ('ip', 'saved', 'country', 'city', 'org')
+
+	def __init__(self, master, pageSize = 50):
+		""" The constructor takes the master tkinter window and the number of rows per page. """
+
+		self.pageSize = pageSize
+		self.pages = []  # The keyset cursors of the pages visited so far, used for the previous button
+		self.cursor = None
+		self.last = None
+		self.full = False
+
+		# Creating the tkinter window of the viewer
+		self.window = theme.window(Toplevel(master))
+		self.window.title('Saved results - IP Tracker (Python3)')
+
+		# Defining the filter form (IP prefix) along with the search button
+		frame = theme.frame(self.window)
+		frame.pack(fill = X, padx = 5, pady = 5)
+		self.prefix = StringVar(self.window)
+		theme.label(
+			frame,
+			text = 'IP prefix',
+			font = ('Arial', 11),
+			).pack(side = LEFT, padx = 5, pady = 5)
+		Entry(frame, textvariable = self.prefix, font = ('Arial', 11), width = 20).pack(side = LEFT, padx = 5, pady = 5)
+		self.button(frame, 'Search', self.search).pack(side = LEFT, padx = 5, pady = 5)
+
+		# Defining the saved results table, the row ids of the items are the ids of the records
+		self.table = Treeview(self.window, columns = self.columns, show = 'headings', height = pageSize if pageSize < 25 else 25)
+		for column in self.columns:
+			self.table.heading(column, text = column.upper())
+			self.table.column(column, width = 200 if column in ('saved', 'org') else 120)
+		self.table.bind('<Double-1>', lambda event : self.open())
+		self.table.pack(expand = True, fill = BOTH, padx = 5, pady = 5)
+
+		# Defining the frame which contains the pagination buttons, the open / delete buttons and the page label
+		frame = theme.frame(self.window)
+		frame.pack(fill = X, padx = 5, pady = 10)
+		self.button(frame, 'Previous', self.previous).pack(side = LEFT, padx = 5, pady = 5)
+		self.button(frame, 'Open', self.open).pack(side = LEFT, padx = 5, pady = 5)
+		self.button(frame, 'Delete', self.delete).pack(side = LEFT, padx = 5, pady = 5)
+		self.button(frame, 'Next', self.next).pack(side = RIGHT, padx = 5, pady = 5)
+		self.pageLabel = StringVar(self.window)
+		theme.label(
+			frame,
+			textvariable = self.pageLabel,
+			font = ('Arial', 11, 'italic'),
+			).pack(padx = 5, pady = 5)
+
+		self.search()
+
+	def load(self, cursor):
+		""" This method loads the page starting after the cursor (the id of the last record of the previous page) mentioned in the arguments into the table. It returns False if the page is empty. """
+
+		try:
+			rows = saved_results.query(self.prefix.get().strip(), after = cursor, limit = self.pageSize)
+		except Exception as e:
+			mb.showerror('Error!', f'{e}', parent = self.window)
+			return False
+
+		if len(rows) == 0 and cursor is not None:
+			return False
+
+		self.table.delete(*self.table.get_children())
+		for recordId, ipAddress, timestamp, country, city, org in rows:
+			self.table.insert('', 'end', iid = str(recordId), values = (ipAddress, datetime.fromtimestamp(timestamp).ctime(), country, city, org))
+		self.cursor = cursor
+		self.last = rows[-1][0] if rows else None
+		self.full = len(rows) == self.pageSize
+		self.pageLabel.set(f'Page {len(self.pages) + 1}' if rows else 'There are no saved results.')
+		return True
+
+	def open(self):
+		""" This method loads the full information of the selected record from the store and displays it in a result pane. """
+
+		for item in self.table.selection():
+			data = saved_results.get(int(item))
+			if data is not None:
+				result_panes.acquire().show('Saved information', formatText(data), title = 'Data saved - IP Tracker (Python3)')
+
+	def delete(self):
+		""" This method deletes the selected records from the store, after asking the user. """
+
+		selection = self.table.selection()
+		if len(selection) == 0 or not mb.askyesno('Delete saved results', f'Delete {len(selection)} saved result(s)?', parent = self.window):
+			return 0
+		for item in selection:
+			saved_results.delete(int(item))
+		self.load(self.cursor)
+
+def main(server = None):
+	# Making some variables defined inside this function have global access
+	global win, server_address
+
+	# If the address of a local API server is specified, then the lookups are sent to it (the remote backend) instead of the upstream API
+	if server:
+		server_address = server
+		MenubarFunctions.setProvider('server')
+
+	# Defining the main tkinter window (the startup is profiled phase by phase in the profiling mode)
+	profiler.phase('startup.window')
+	win = theme.window(Tk())
+	win.title('IP Tracker (Python3)')
+	win.resizable(0, 0)
+	theme.styleTtk()
+	win.protocol('WM_DELETE_WINDOW', exit)  # Closing the main window also stops the lookup engine and syncs the history log
+
+	# Changing the font format configuration for the messagebox
+	win.option_add('*Dialog.msg.font', 'Arial 11')
+
+	# Defining the heading label
+	profiler.phase('startup.widgets')
+	theme.label(
+		win,
+		text = 'IP Tracker',
+		font = ('Arial', 15, 'bold', 'italic'),
+		).pack(padx = 5, pady = (10, 20))
+
+	# Defining the input box form for the user to enter the IP address
+	# ----
+	# 1. We will inlcude the form inside a tkinter Frame widget with variable name 'frame'.
+	# 2. We will define a label asking the user to enter the IP address of the target, and an Entrybox widget for the user to enter the value of IP address.
+	# 3. We will use a textvariable 'ipAddress' with String type to store the user entered input.
+	# 4. The continue button will be placed outside the frame.
+	# ----
+	ipAddress = StringVar(win)
+
+	# Defining the frame to contain the form elements
+	frame = theme.frame(win)
+	frame.pack(expand = True, fill = X, padx = 5, pady = 10)
+
+	# Defining the inner contents of the frame, i.e., the form elements (Label, and entry box)
+	theme.label(
+		frame,
+		text = 'Enter the IP address (or network) of target',
+		font = ('Arial', 12),
+		).pack(side = LEFT, padx = 5, pady = 5)
+	Entry(
+		frame,
+		textvariable = ipAddress,
+		font = ('Arial', 12),
+		).pack(side = RIGHT, padx = 5, pady = 5)
+
+	# Defining the frame which contains the continue and cancel buttons
+	buttonsFrame = theme.frame(win)
+	buttonsFrame.pack(padx = 5, pady = 10)
+
+	# Defining the continue button widget
+	theme.button(
+		buttonsFrame,
+		text = 'Continue',
+		font = ('Arial', 12, 'bold'),
+		relief = GROOVE,
+		command = lambda : fetchIp(ipAddress.get(), 24 if sweepInfer.get() else None)
+		).pack(side = LEFT, padx = 5)
+
+	# Defining the cancel button widget, which cancels all the pending lookups
+	theme.button(
+		buttonsFrame,
+		text = 'Cancel',
+		font = ('Arial', 12, 'bold'),
+		relief = GROOVE,
+		command = engine.cancel,
+		).pack(side = LEFT, padx = 5)
+
+	# Defining the pending indicator label, which displays the number of lookups in flight
+	lookupStatus = StringVar(win)
+	theme.label(
+		win,
+		textvariable = lookupStatus,
+		font = ('Arial', 10, 'italic'),
+		).pack(padx = 5, pady = (0, 5))
+	# ----
+
+	# Defining the status bar, which displays the phase timings of the last lookup along with the cache hit rate and the queue depth
+	timingStatus = StringVar(win)
+	theme.label(
+		win,
+		textvariable = timingStatus,
+		font = ('Arial', 9),
+		anchor = 'w',
+		justify = 'left',
+		wraplength = 520,
+		).pack(fill = X, side = 'bottom', padx = 5, pady = (0, 3))
+
+	# The option of the subnet sweeps (a network entered in the input box) : whether the results holding no network range are assumed to apply to their whole /24 network
+	sweepInfer = BooleanVar(win, value = False)
+
+	# Attaching the lookup engine to the main window, so that the results of the lookups are handed over to this window
+	engine.attach(win, lookupStatus, timingStatus)
+
+	# Defining the menubar of the tkitner window
+	profiler.phase('startup.menus')
+	# ----
+	# 1. We will define a main menubar, which will contain all the sub-menus like toolsmenu, helpmenu, etc.
+	# 2. Further more we will separate commands in each menu using the separator.
+	# 3. Also there will be another sub-menus in each menu for making the commands more grouped. Like colorsmenu.
+	# ----
+	menubar = Menu(win)
+	win.config(menu = menubar)  # Configuring the main tkinter window to use the menubar
+
+	# Defining the toolsmenu
+	toolsmenu = Menu(menubar, font = ('Arial', 11), tearoff = 0)
+	menubar.add_cascade(label = 'Tools', font = ('Arial', 11), menu = toolsmenu)  # Configuring the toolsmenu with the main menubar
+	toolsmenu.add_command(label = 'Session history', command = lambda : MenubarFunctions.history(fetch = True, session = True))
+	toolsmenu.add_command(label = 'Clear session history', command = lambda : MenubarFunctions.history(clear = True, session = True))
+	toolsmenu.add_command(label = 'Save session history', command = lambda : MenubarFunctions.history(save = True, session = True))
+	toolsmenu.add_command(label = 'Overall history', command = lambda : MenubarFunctions.history(fetch = True, session = False))
+	toolsmenu.add_command(label = 'Clear Overall history', command = lambda : MenubarFunctions.history(clear = True, session = False))
+	toolsmenu.add_command(label = 'History analytics', command = MenubarFunctions.historyAnalytics)
+	toolsmenu.add_separator()
+	toolsmenu.add_command(label = 'Batch lookup', command = MenubarFunctions.batchLookup)
+	toolsmenu.add_command(label = 'Ingest a log file', command = MenubarFunctions.ingestLog)
+	toolsmenu.add_checkbutton(label = 'Sweeps : infer the results per /24 when no range is known', variable = sweepInfer)
+	toolsmenu.add_command(label = 'Export overall history', command = lambda : MenubarFunctions.export(history = True))
+	toolsmenu.add_command(label = 'Export saved results', command = lambda : MenubarFunctions.export(saved = True))
+	toolsmenu.add_separator()
+	toolsmenu.add_command(label = 'Cache statistics', command = lambda : MenubarFunctions.responseCache(stats = True))
+	toolsmenu.add_command(label = 'Clear cache', command = lambda : MenubarFunctions.responseCache(clear = True))
+	toolsmenu.add_command(label = 'Lookup metrics', command = lambda : MenubarFunctions.lookupMetrics(show = True))
+	toolsmenu.add_command(label = 'Export metrics', command = lambda : MenubarFunctions.lookupMetrics(export = True))
+	profilingMode = BooleanVar(win, value = profiler.enabled)
+	toolsmenu.add_checkbutton(label = 'Profiling mode', variable = profilingMode, command = lambda : MenubarFunctions.profiling(enable = profilingMode.get()))
+	toolsmenu.add_command(label = 'Profiling summary', command = lambda : MenubarFunctions.profiling(summary = True))
+	toolsmenu.add_separator()
+
+	# Defining the providers sub-menu for the toolsmenu (the backend of the lookups, along with the hedging option)
+	providerName, providerHedge = StringVar(win, value = 'server' if server else 'ipinfo'), BooleanVar(win, value = False)
+	providersmenu = Menu(toolsmenu, font = ('Arial', 11), tearoff = 0)
+	toolsmenu.add_cascade(label = 'Provider', menu = providersmenu)  # Configuring the providersmenu with the toolsmenu
+	providersmenu.add_radiobutton(label = 'ipinfo.io', variable = providerName, value = 'ipinfo', command = lambda : MenubarFunctions.setProvider(providerName.get(), providerHedge.get()))
+	providersmenu.add_radiobutton(label = 'ip-api.com', variable = providerName, value = 'ip-api', command = lambda : MenubarFunctions.setProvider(providerName.get(), providerHedge.get()))
+	providersmenu.add_radiobutton(label = f'Local API server ({server_address})', variable = providerName, value = 'server', command = lambda : MenubarFunctions.setProvider(providerName.get(), providerHedge.get()))
+	providersmenu.add_separator()
+	providersmenu.add_checkbutton(label = 'Hedge slow lookups (after 500 ms) with the other provider', variable = providerHedge, command = lambda : MenubarFunctions.setProvider(providerName.get(), providerHedge.get()))
+	toolsmenu.add_separator()
+
+	# Defining the colors sub-menu for the toolsmenu (This menu will show as a side menu in the tools menu and displays the list of the colors themes available for the tkinter window).
+	colorsmenu = Menu(toolsmenu, font = ('Arial', 11), tearoff = 0)
+	toolsmenu.add_cascade(label = 'Color Themes', menu = colorsmenu)  # Configuring the colorsmenu with the toolsmenu
+	colorsmenu.add_command(label = 'Default', command = lambda : MenubarFunctions.setColorTheme(foreground = 'white', background = 'black', button_foreground = 'black', button_background = 'white'))
+	colorsmenu.add_command(label = 'Tkinter Original', command = lambda : MenubarFunctions.setColorTheme(foreground = 'black', background = None, button_foreground = None, button_background = None))
+	colorsmenu.add_command(label = 'Black-White', command = lambda : MenubarFunctions.setColorTheme(foreground = 'black', background = 'white', button_foreground = 'white', button_background = 'black'))
+	colorsmenu.add_command(label = 'Green-Black', command = lambda : MenubarFunctions.setColorTheme(foreground = 'green', background = 'black', button_foreground = 'black', button_background = 'green'))
+	colorsmenu.add_command(label = 'Red-Black', command = lambda : MenubarFunctions.setColorTheme(foreground = 'red', background = 'black', button_foreground = 'black', button_background = 'red'))
+
+	# Defining the command for displaying the saved fetched data (in the saved results store)
+	toolsmenu.add_separator()
+	toolsmenu.add_command(label = 'Display the saved data', command = lambda : MenubarFunctions.fetchedData(display = True))
+
+	# Defining the helpmenu
+	helpmenu = Menu(menubar, font = ('Arial', 11), tearoff = 0)
+	menubar.add_cascade(label = 'Help', font = ('Arial', 11), menu = helpmenu)  # Configuring the colorsmenu with the toolsmenu
+	helpmenu.add_command(label = 'Documentation', command = lambda : MenubarFunctions.help(documentation = True))
+	helpmenu.add_command(label = 'About the author', command = lambda : MenubarFunctions.about(author = True))
+	helpmenu.add_command(label = 'Report a bug', command = lambda : MenubarFunctions.help(report = True))
+	helpmenu.add_separator()
+	helpmenu.add_command(label = 'About IP Tracker', command = lambda : MenubarFunctions.about(tool = True))
+	helpmenu.add_command(label = 'Usage', command = lambda : MenubarFunctions.help(usage = True))
+
+	# Defining the exit command on the menubar
+	menubar.add_command(label = 'Exit', font = ('Arial', 11), command = exit)
+	# ----
+
+	profiler.phase(None)
+	mainloop()
@@ -0,0 +1,470 @@
+"""
+IP Tracker - History
+
+This module contains the history of the application : the append-only history log and the indexed history store built from it (the overall history), along with the compact in-memory container of the current session history.
+"""
+
+# Importing the required functions and modules
+from json import loads, dumps
+from time import monotonic
+from datetime import datetime
+from threading import Lock
+from array import array
+from math import isfinite
+from socket import inet_pton, inet_ntop, AF_INET, AF_INET6
+import os
+import sys
+import struct
+import sqlite3
+
+# The key fields of the response recorded with each lookup in the overall history, for the analytics
+RECORDED_FIELDS = ('country', 'org')
+
+def historyItem(ipAddress, response = None, timestamp = None):
+	""" This function returns the history record (dict) of a lookup : the IP address, the timestamp (now by default) and the key fields of the response (if specified). """
+
+	item = {"ip" : ipAddress, "timestamp" : datetime.now().timestamp() if timestamp is None else timestamp}
+	if response is not None:
+		for field in RECORDED_FIELDS:
+			if response.get(field):
+				item[field] = response[field]
+	return item
+
+# Defining the overall history log of the application
+# ----
+# 1. The overall history is stored in an append-only log file named 'history.jsonl' in the current working directory, with one JSON record per line. Each lookup is written to the log as soon as it happens, thus closing the window or a crash does not lose the session history.
+# 2. Each record is flushed to the operating system right away, while the (costlier) fsync to the disk is batched : it is done once every few records or seconds, and on closing the log.
+# 3. Reading the log streams the file line by line, instead of parsing one giant JSON array. The truncated / corrupt lines (for example, a half-written record after a crash) are skipped, and dropped on the next compaction.
+# 4. The log is compacted (rewritten with only the valid records, and only the latest maxRecords records if a limit is set) periodically after a number of appends.
+# 5. The history stored in the older data.json file is migrated into the log on the first opening.
+# ----
+class HistoryLog:
+	""" This class contains the append-only history log of the application. Below are some of the steps to use the log :
+	* To record a lookup -> history_log.append(historyItem(ipAddress, response)), i.e., {"ip" : ..., "timestamp" : ..., "country" : ..., "org" : ...}
+	* To iterate through the overall history -> for item in history_log: ...
+	* To clear the overall history -> history_log.clear()
+	* To flush and close the log -> history_log.close() """
+
+	def __init__(self, filename = 'history.jsonl', legacyFilename = 'data.json', syncEvery = 32, syncInterval = 2.0, compactEvery = 10000, maxRecords = None):
+		""" The constructor takes the filename of the log, the filename of the older data.json history (to be migrated), the number of records / seconds after which the fsync is done, the number of appends after which the log is compacted and the maximum number of records to be retained (None for unlimited). The log file is opened lazily on the first access. """
+
+		self.filename = filename
+		self.legacyFilename = legacyFilename
+		self.syncEvery = syncEvery
+		self.syncInterval = syncInterval
+		self.compactEvery = compactEvery
+		self.maxRecords = maxRecords
+		self.file = None
+		self.unsynced = 0
+		self.lastSync = monotonic()
+		self.appends = 0
+		self.lock = Lock()
+
+	def open(self):
+		""" This method opens the log file in the append mode, after migrating the older data.json history. The caller must hold the lock. """
+
+		if self.file is None:
+			self.migrate()
+			self.file = open(self.filename, 'a', encoding = 'utf-8')
+
+			# If the last record was left half-written (for example after a crash), then we terminate its line so that the next record starts on a fresh line
+			with open(self.filename, 'rb') as file:
+				file.seek(0, os.SEEK_END)
+				if file.tell() > 0:
+					file.seek(-1, os.SEEK_END)
+					if file.read(1) != b'\n':
+						self.file.write('\n')
+		return self.file
+
+	def migrate(self):
+		""" This method appends the records of the older data.json history file (if exists) to the log, and then renames the older file so that it is not migrated again. If the older file is empty or corrupt (not a JSON list of records), then it is renamed aside to data.json.corrupt and nothing is migrated. Returns the number of migrated records. """
+
+		try:
+			with open(self.legacyFilename, 'r', encoding = 'utf-8') as file:
+				data = loads(file.read())
+			if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+				raise TypeError('The older history file does not contain a list of records')
+		except FileNotFoundError:
+			return 0
+		except (ValueError, TypeError):
+			# The corrupt file is kept aside for a manual recovery, thus the opening of the log does not fail on every start
+			os.replace(self.legacyFilename, self.legacyFilename + '.corrupt')
+			return 0
+
+		with open(self.filename, 'a', encoding = 'utf-8') as file:
+			for item in data:
+				file.write(dumps(item) + '\n')
+			file.flush()
+			os.fsync(file.fileno())
+		os.replace(self.legacyFilename, self.legacyFilename + '.migrated')
+		return len(data)
+
+	def append(self, item):
+		""" This method appends a record (dict) to the log. The record is flushed right away, and synced to the disk in batches. """
+
+		with self.lock:
+			file = self.open()
+			file.write(dumps(item) + '\n')
+			file.flush()
+			self.unsynced += 1
+			self.appends += 1
+			if self.unsynced >= self.syncEvery or monotonic() - self.lastSync >= self.syncInterval:
+				self.sync()
+			if self.appends >= self.compactEvery:
+				self.sync()
+				self.file.close()
+				self.file = None
+				self.compact()
+				self.appends = 0
+
+	def sync(self):
+		""" This method syncs the written records to the disk. The caller must hold the lock. """
+
+		if self.file is not None and self.unsynced > 0:
+			os.fsync(self.file.fileno())
+		self.unsynced = 0
+		self.lastSync = monotonic()
+
+	def records(self, filename = None):
+		""" This method streams the valid records of the log file line by line, skipping the corrupt lines. """
+
+		try:
+			file = open(filename or self.filename, 'r', encoding = 'utf-8')
+		except FileNotFoundError:
+			return
+
+		with file:
+			for line in file:
+				try:
+					item = loads(line)
+				except ValueError:
+					# If the line is corrupt (like a half-written record), then we skip it
+
+					continue
+				if isinstance(item, dict):
+					yield item
+
+	def __iter__(self):
+		""" This method streams all the records of the overall history. """
+
+		with self.lock:
+			if self.file is None:
+				self.open()
+			else:
+				self.file.flush()
+		return self.records()
+
+	def compact(self):
+		""" This method rewrites the log file with only the valid records (and only the latest maxRecords records, if a limit is set). The new file is written to a temporary file first and then atomically moved over the log, thus a crash during the compaction does not lose the history. The caller must hold the lock, with the log file closed. """
+
+		if not os.path.exists(self.filename):
+			return 0
+
+		# Counting the valid records first, in order to find out how many records to skip for the retention limit
+		skip = 0
+		if self.maxRecords is not None:
+			skip = max(0, sum(1 for item in self.records()) - self.maxRecords)
+
+		temporary = self.filename + '.tmp'
+		with open(temporary, 'w', encoding = 'utf-8') as file:
+			for index, item in enumerate(self.records()):
+				if index >= skip:
+					file.write(dumps(item) + '\n')
+			file.flush()
+			os.fsync(file.fileno())
+		os.replace(temporary, self.filename)
+
+	def clear(self):
+		""" This method removes all the records of the log. """
+
+		with self.lock:
+			self.migrate()
+			if self.file is not None:
+				self.file.close()
+				self.file = None
+			open(self.filename + '.tmp', 'w').close()
+			os.replace(self.filename + '.tmp', self.filename)
+			self.unsynced = 0
+
+	def flush(self):
+		""" This method flushes the written records to the operating system, so that they are visible to the readers of the log file. """
+
+		with self.lock:
+			if self.file is not None:
+				self.file.flush()
+
+	def close(self):
+		""" This method syncs the pending records to the disk and closes the log file. """
+
+		with self.lock:
+			if self.file is not None:
+				self.sync()
+				self.file.close()
+				self.file = None
+
+# The overall history log is shared by the entire application
+history_log = HistoryLog()
+
+# Defining the indexed history store, which serves the queries on the overall history
+# ----
+# 1. The history log stays the crash-safe record of the history, while the store is an index built from it. The store is a SQLite database file named 'history.db' in the current working directory, with indexes on the IP address and the timestamp.
+# 2. The store remembers up to which byte of the log it has indexed, thus only the newly appended records are read and indexed before each query. If the log has been replaced (compacted or cleared), then the store is rebuilt from scratch.
+# 3. The queries are paginated using the keyset method (the timestamp and id of the last row of the previous page), thus a page is fetched in the same time no matter how big the history is or how deep the page is.
+# ----
+class HistoryIndex:
+	""" This class contains the indexed history store of the application. Below are some of the steps to use the store :
+	* To fetch a page of the history -> history_index.query(prefix, start, end, after, limit), returns a list of rows (id, ip, timestamp) ordered from the newest to the oldest
+	* To fetch the next page -> history_index.query(..., after = (timestamp, id) of the last row of the current page) """
+
+	def __init__(self, log, filename = 'history.db'):
+		""" The constructor takes the history log to be indexed and the filename of the database. The database file is opened lazily on the first query. """
+
+		self.log = log
+		self.filename = filename
+		self.connection = None
+		self.lock = Lock()
+
+	def database(self):
+		""" This method returns the connection to the database, creating the tables and the indexes on the first call. """
+
+		if self.connection is None:
+			self.connection = sqlite3.connect(self.filename, check_same_thread = False)
+			self.connection.executescript("""
+				CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY, ip TEXT NOT NULL, timestamp REAL NOT NULL);
+				CREATE INDEX IF NOT EXISTS history_ip ON history (ip, timestamp);
+				CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp);
+				CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+			""")
+		return self.connection
+
+	def refresh(self):
+		""" This method indexes the records appended to the log since the last refresh. The caller must hold the lock. """
+
+		connection = self.database()
+		meta = dict(connection.execute('SELECT key, value FROM meta').fetchall())
+		self.log.flush()
+		try:
+			status = os.stat(self.log.filename)
+		except FileNotFoundError:
+			status = None
+
+		inode, offset = meta.get('inode'), meta.get('offset', 0)
+		if status is None or status.st_ino != inode or status.st_size < offset:
+			# If the log has been replaced (or removed), then we rebuild the store from scratch
+
+			connection.execute('DELETE FROM history')
+			inode, offset = (status.st_ino if status else 0), 0
+
+		if status is not None and status.st_size > offset:
+			rows = []
+			with open(self.log.filename, 'rb') as file:
+				file.seek(offset)
+				for line in file:
+					if not line.endswith(b'\n'):
+						# If the last record is still being written, then we leave it for the next refresh
+
+						break
+					offset += len(line)
+					try:
+						item = loads(line)
+						rows.append((str(item["ip"]), float(item["timestamp"])))
+					except (ValueError, KeyError, TypeError):
+						continue
+			connection.executemany('INSERT INTO history (ip, timestamp) VALUES (?, ?)', rows)
+
+		connection.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (('inode', inode), ('offset', offset)))
+		connection.commit()
+
+	def query(self, prefix = '', start = None, end = None, after = None, limit = 50):
+		""" This method returns a page of the overall history as a list of rows (id, ip, timestamp), ordered from the newest to the oldest. The rows can be filtered by the IP address prefix and the range of timestamps (start, end). The after argument is the (timestamp, id) of the last row of the previous page. """
+
+		conditions, parameters = [], []
+		if prefix:
+			# The prefix is matched using a range on the IP address, so that the index is used
+			conditions.append('ip >= ? AND ip < ?')
+			parameters += [prefix, prefix + '\uffff']
+		if start is not None:
+			conditions.append('timestamp >= ?')
+			parameters.append(start)
+		if end is not None:
+			conditions.append('timestamp < ?')
+			parameters.append(end)
+		if after is not None:
+			conditions.append('(timestamp < ? OR (timestamp = ? AND id < ?))')
+			parameters += [after[0], after[0], after[1]]
+
+		sql = 'SELECT id, ip, timestamp FROM history'
+		if conditions:
+			sql += ' WHERE ' + ' AND '.join(conditions)
+		sql += ' ORDER BY timestamp DESC, id DESC LIMIT ?'
+		parameters.append(limit)
+
+		with self.lock:
+			self.refresh()
+			return self.connection.execute(sql, parameters).fetchall()
+
+# The indexed history store is built from the overall history log
+history_index = HistoryIndex(history_log)
+
+# Defining the compact session history
+# ----
+# 1. The lookups of the current session are kept in flat buffers instead of one dict per lookup : the IP addresses packed into 16 bytes each (the IPv4 addresses in the first 4 bytes) in a bytearray, the IP versions in an array of bytes and the timestamps in an array of float64. Thus, a record takes 25 bytes, instead of the few hundred bytes of a dict holding two strings and a float.
+# 2. Iterating (or indexing) yields light record views (SessionRecord, with __slots__) which decode the IP address only when it is read. The views support the item access of the older dicts (item["ip"], item["timestamp"]), thus the code written for the list of dicts keeps working.
+# 3. The buffers are written to the disk as they are (a small header, then the raw bytes of each buffer), and read back the same way, without building any intermediate object per record. The buffers also support the buffer protocol, thus they can be wrapped by NumPy without a copy (like numpy.frombuffer(history.timestamps)).
+# 4. The values which are not IP addresses (unexpected, as the lookups are validated first) are kept aside in a dict keyed by their position, with the version 0.
+# ----
+class SessionRecord:
+	""" This class contains the view of one record of the session history. The IP address and the timestamp are read from the buffers of the history on access. """
+
+	__slots__ = ('history', 'index')
+
+	def __init__(self, history, index):
+		self.history = history
+		self.index = index
+
+	@property
+	def ip(self):
+		""" The IP address of the lookup, as a string. """
+
+		return self.history.address(self.index)
+
+	@property
+	def timestamp(self):
+		""" The time of the lookup, as a UNIX timestamp. """
+
+		return self.history.timestamps[self.index]
+
+	def __getitem__(self, key):
+		""" This method serves the item access of the older dict records (item["ip"], item["timestamp"]). """
+
+		if key == 'ip':
+			return self.ip
+		if key == 'timestamp':
+			return self.timestamp
+		raise KeyError(key)
+
+	def asdict(self):
+		""" This method returns the record as a dict {"ip" : ..., "timestamp" : ...}. """
+
+		return {"ip" : self.ip, "timestamp" : self.timestamp}
+
+	def __repr__(self):
+		return f'SessionRecord(ip = {self.ip!r}, timestamp = {self.timestamp!r})'
+
+class SessionHistory:
+	""" This class contains the compact container of the session history. Below are some of the steps to use the container :
+	* To record a lookup -> history.append({"ip" : ..., "timestamp" : ...}) or history.add(ipAddress, timestamp)
+	* To iterate through the records -> for item in history: ... (item.ip, item.timestamp, or item["ip"], item["timestamp"]), len(history), history[index]
+	* To write the history to a file and read it back -> history.dump(file), SessionHistory.load(file) (binary files), or history.writeNdjson(file) (text file)
+	* To clear the history -> history.clear() """
+
+	# The header of the binary files : the magic bytes, followed by the number of records
+	magic = b'IPTSESS1'
+	header = struct.Struct('<8sQ')
+
+	def __init__(self):
+		self.clear()
+
+	def clear(self):
+		""" This method removes all the records. """
+
+		self.addresses = bytearray()
+		self.versions = array('B')
+		self.timestamps = array('d')
+		self.others = {}
+
+	def add(self, ipAddress, timestamp):
+		""" This method appends the lookup of the IP address mentioned in the arguments, at the time mentioned (UNIX timestamp). """
+
+		try:
+			if ':' in ipAddress:
+				packed, version = inet_pton(AF_INET6, ipAddress), 6
+			else:
+				packed, version = inet_pton(AF_INET, ipAddress) + bytes(12), 4
+		except (OSError, TypeError):
+			# If the value is not an IP address, then we keep it aside
+			self.others[len(self.versions)] = ipAddress
+			packed, version = bytes(16), 0
+
+		self.addresses += packed
+		self.versions.append(version)
+		self.timestamps.append(timestamp)
+
+	def append(self, item):
+		""" This method appends a record {"ip" : ..., "timestamp" : ...} (dict, or a record view), like the list of dicts used to do. """
+
+		self.add(item["ip"], item["timestamp"])
+
+	def address(self, index):
+		""" This method returns the IP address of the record mentioned in the arguments (by its position), as a string. """
+
+		version = self.versions[index]
+		offset = index * 16
+		if version == 4:
+			return inet_ntop(AF_INET, bytes(self.addresses[offset : offset + 4]))
+		if version == 6:
+			return inet_ntop(AF_INET6, bytes(self.addresses[offset : offset + 16]))
+		return self.others[index]
+
+	def __len__(self):
+		return len(self.versions)
+
+	def __getitem__(self, index):
+		""" This method returns the view of the record mentioned in the arguments (by its position, negative positions count from the end). """
+
+		if index < 0:
+			index += len(self.versions)
+		if not 0 <= index < len(self.versions):
+			raise IndexError('session history index out of range')
+		return SessionRecord(self, index)
+
+	def __iter__(self):
+		""" This method iterates through the views of the records, from the oldest to the newest. """
+
+		for index in range(len(self.versions)):
+			yield SessionRecord(self, index)
+
+	def nbytes(self):
+		""" This method returns the number of bytes held by the buffers. """
+
+		return len(self.addresses) + self.versions.itemsize * len(self.versions) + self.timestamps.itemsize * len(self.timestamps)
+
+	def dump(self, file):
+		""" This method writes the history to the binary file object mentioned in the arguments : the header, followed by the raw bytes of the versions, the addresses and the timestamps (little endian), and the values kept aside (as JSON). """
+
+		timestamps = self.timestamps
+		if sys.byteorder == 'big':
+			timestamps = array('d', timestamps)
+			timestamps.byteswap()
+
+		file.write(self.header.pack(self.magic, len(self.versions)))
+		self.versions.tofile(file)
+		file.write(self.addresses)
+		timestamps.tofile(file)
+		file.write(dumps({str(index) : value for index, value in self.others.items()}).encode())
+
+	@classmethod
+	def load(cls, file):
+		""" This method reads a history written by dump() from the binary file object mentioned in the arguments, and returns it. ValueError is raised if the file is not a session history. """
+
+		magic, count = cls.header.unpack(file.read(cls.header.size))
+		if magic != cls.magic:
+			raise ValueError('The file is not a session history file.')
+
+		history = cls()
+		history.versions.fromfile(file, count)
+		history.addresses = bytearray(file.read(count * 16))
+		history.timestamps.fromfile(file, count)
+		if sys.byteorder == 'big':
+			history.timestamps.byteswap()
+		history.others = {int(index) : value for index, value in loads(file.read() or b'{}').items()}
+		return history
+
+	def writeNdjson(self, file):
+		""" This method writes the records to the text file object mentioned in the arguments as NDJSON (the same records as the overall history log), straight from the buffers. The non-finite timestamps are written as null. It returns the number of records written. """
+
+		for index in range(len(self.versions)):
+			# The non-finite timestamps (nan, inf) are written as null, as NaN / Infinity are not valid JSON
+			timestamp = self.timestamps[index]
+			file.write(dumps({"ip" : self.address(index), "timestamp" : timestamp if isfinite(timestamp) else None}, allow_nan = False) + '\n')
+		return len(self.versions)
@@ -0,0 +1,182 @@
+"""
+IP Tracker - Log ingestion
+
+This module contains the ingestion pipeline of the log files (like the access logs of nginx, the auth logs of sshd or the logs of a firewall). The IP addresses are extracted from the log in parallel (the file is split into chunks which are scanned by a pool of processes), counted, deduplicated and validated, and the unique public addresses are handed over to the lookups as soon as they are found, thus the lookups overlap with the parsing of the rest of the file.
+"""
+
+# Importing the required functions and modules
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from ipaddress import ip_address
+from threading import Lock
+import mmap
+import os
+import re
+
+from iptracker.validation import validateIp
+
+# The pattern of the candidate tokens in the logs : the runs of the characters an IP address is made of (hex digits, dots and colons). The pattern is kept this simple on purpose, as it is scanned over every byte of the log (the alternation of the exact IPv4 / IPv6 patterns is about 3 times slower). The tokens are verified afterwards, once per unique token (see canonicalAddress(), which also drops the colons absorbed next to an address).
+IP_PATTERN = re.compile(rb'[0-9A-Fa-f:.]{7,}')
+
+# The strict dotted form of the IPv4 addresses, used for verifying the tokens
+IPV4_PATTERN = re.compile(r'(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)')
+
+def canonicalAddress(token):
+	""" This function returns the IP address (canonical form) held by the token mentioned in the arguments, or None if the token is not an IP address (like a version number, a time or a hex string). As the pattern also absorbs the colons next to an address, an IPv4 address with a port (1.2.3.4:8080), after a label (client:1.2.3.4) or before a separator (1.2.3.4:), and an IPv6 address before or after a separator (2001:db8::1:) are accepted. """
+
+	token = token.rstrip('.')
+	if len(token) > 45:
+		return None
+	if ':' not in token:
+		return token if IPV4_PATTERN.fullmatch(token) else None
+	try:
+		return str(ip_address(token))
+	except ValueError:
+		pass
+
+	# Looking for an IPv4 address among the fields separated by the colons, and else for an IPv6 address once the outer colons are stripped
+	for field in token.split(':'):
+		if IPV4_PATTERN.fullmatch(field.rstrip('.')):
+			return field.rstrip('.')
+	stripped = token.strip(':')
+	if stripped != token and ':' in stripped:
+		try:
+			return str(ip_address(stripped))
+		except ValueError:
+			pass
+	return None
+
+def countAddresses(matches):
+	""" This function counts the IP addresses among the tokens matched in a chunk (list of bytes), and returns a dict mapping each address (canonical form) to its count. """
+
+	counts = {}
+	for token, count in Counter(matches).items():
+		ipAddress = canonicalAddress(token.decode('ascii'))
+		if ipAddress is not None:
+			counts[ipAddress] = counts.get(ipAddress, 0) + count
+	return counts
+
+def extractFile(filename, start, end):
+	""" This function scans the chunk [start, end) of the file mentioned in the arguments for the IP addresses, and returns their counts. The file is memory-mapped, thus the chunk is scanned without being copied. It runs in the worker processes. """
+
+	with open(filename, 'rb') as file, mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as data:
+		return countAddresses(IP_PATTERN.findall(data, start, end))
+
+def extractBytes(data):
+	""" This function scans the chunk (bytes) mentioned in the arguments for the IP addresses, and returns their counts. It runs in the worker processes, for the logs which cannot be memory-mapped (like the standard input). """
+
+	return countAddresses(IP_PATTERN.findall(data))
+
+# Defining the log ingestion pipeline
+# ----
+# 1. A regular file is memory-mapped and split into chunks of about chunkSize bytes, each chunk ending on a line break so that no address is cut in two. The workers map the file on their own, thus only the offsets and the counts cross the process boundary. The other inputs (pipes, the standard input) are streamed : the chunks are read in the main process and sent to the workers.
+# 2. At most two chunks per worker are in flight at once, thus the memory used stays bounded whatever the size of the log. The counts of the chunks are merged as they complete.
+# 3. Each address seen for the first time is validated, and yielded right away if it is a public one. Thus, the consumer (the lookup pipeline) starts the lookups while the rest of the file is still being parsed.
+# ----
+class LogIngestion:
+	""" This class contains the ingestion of a log file. Below are some of the steps to use it :
+	* To create the ingestion -> LogIngestion(filename, workers = 4), or LogIngestion(fileObject) for a stream opened in the binary mode
+	* To stream the unique public IP addresses as they are found -> for ipAddress in ingestion.addresses(): ...
+	* To fetch the counts -> ingestion.counts (all the addresses, public or not), ingestion.top(10), ingestion.stats()
+	* To stop the ingestion (from another thread) -> ingestion.cancel() """
+
+	def __init__(self, source, workers = None, chunkSize = 16 * 1024 * 1024, context = None):
+		""" The constructor takes the filename of the log (or a file object opened in the binary mode, for the streams), the number of the worker processes (the number of CPUs by default), the size of the chunks in bytes and the multiprocessing context starting the worker processes (the default one if None, the 'spawn' context is to be used from the multi-threaded processes). """
+
+		self.source = source
+		self.workers = workers or os.cpu_count() or 1
+		self.chunkSize = chunkSize
+		self.context = context
+		self.counts = {}
+		self.rejected = 0
+		self.bytesRead = 0
+		self.bytesTotal = os.path.getsize(source) if isinstance(source, str) else None
+		self.done = False
+		self.cancelled = False
+		self.lock = Lock()
+
+	def chunks(self):
+		""" This method yields the tasks of the chunks of the log as tuples (function, arguments, size), to be run in the worker processes. """
+
+		if isinstance(self.source, str):
+			if self.bytesTotal == 0:
+				return
+			with open(self.source, 'rb') as file, mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as data:
+				start = 0
+				while start < self.bytesTotal:
+					# Extending the chunk up to the next line break
+					end = data.find(b'\n', min(start + self.chunkSize, self.bytesTotal))
+					end = self.bytesTotal if end < 0 else end + 1
+					yield extractFile, (self.source, start, end), end - start
+					start = end
+		else:
+			while True:
+				data = self.source.read(self.chunkSize)
+				if not data:
+					return
+				data += self.source.readline()
+				yield extractBytes, (data,), len(data)
+
+	def addresses(self):
+		""" This method runs the ingestion, and yields each unique public IP address (canonical form) as soon as it is found. The addresses which are not public (private, reserved, ...) are counted but not yielded. """
+
+		with ProcessPoolExecutor(max_workers = self.workers, mp_context = self.context) as executor:
+			inFlight = {}
+			chunks = self.chunks()
+			exhausted = False
+			while True:
+				exhausted = exhausted or self.cancelled
+				while not exhausted and len(inFlight) < 2 * self.workers:
+					# Submitting the next chunks, until two chunks per worker are in flight
+					try:
+						function, arguments, size = next(chunks)
+					except StopIteration:
+						exhausted = True
+						break
+					inFlight[executor.submit(function, *arguments)] = size
+				if not inFlight:
+					break
+
+				done, pending = wait(inFlight, return_when = FIRST_COMPLETED)
+				for future in done:
+					size = inFlight.pop(future)
+					fresh = []
+					with self.lock:
+						for ipAddress, count in future.result().items():
+							if ipAddress not in self.counts:
+								fresh.append(ipAddress)
+							self.counts[ipAddress] = self.counts.get(ipAddress, 0) + count
+						self.bytesRead += size
+
+					for ipAddress in fresh:
+						if self.cancelled:
+							break
+						try:
+							yield validateIp(ipAddress)
+						except ValueError:
+							self.rejected += 1
+		self.done = True
+
+	def cancel(self):
+		""" This method stops the ingestion : no more chunks are submitted, and no more addresses are yielded. The chunks already in flight are left to complete. """
+
+		self.cancelled = True
+
+	def run(self):
+		""" This method runs the whole ingestion without yielding the addresses, and returns the counts. """
+
+		for ipAddress in self.addresses():
+			pass
+		return self.counts
+
+	def top(self, count = 10):
+		""" This method returns the most frequent IP addresses found so far, as a list of tuples (ipAddress, count). """
+
+		with self.lock:
+			return Counter(self.counts).most_common(count)
+
+	def stats(self):
+		""" This method returns the progress of the ingestion as a dict : the bytes read (and the size of the file, if known), the number of the unique addresses, the number of the unique addresses which are not public, and whether the ingestion is done. """
+
+		with self.lock:
+			return {"bytes_read" : self.bytesRead, "bytes_total" : self.bytesTotal, "unique" : len(self.counts), "rejected" : self.rejected, "done" : self.done}
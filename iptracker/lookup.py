@@ -0,0 +1,286 @@
+"""
+IP Tracker - Lookup
+
+This module contains the lookup logic of the application : the pool of persistent HTTP connections to the ipinfo.io API, the function sending the requests, the cached lookup function used by all the interfaces, and a bounded-concurrency pipeline for resolving many IP addresses at once.
+"""
+
+# Importing the required functions and modules
+from queue import LifoQueue, Empty, Full
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from threading import Lock
+from time import perf_counter
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import nullcontext
+import socket
+import ssl
+
+from iptracker.cache import cache
+from iptracker.validation import validateIp
+from iptracker.metrics import metrics
+from iptracker.scheduler import scheduler, INTERACTIVE, BATCH
+from iptracker.providers import IpinfoProvider
+
+# Defining the HTTP connection pool used for the requests to the ipinfo.io API
+# ----
+# 1. The pool keeps the connections to the server alive (HTTP/1.1 keep-alive) and hands them out to the worker threads of the lookup engine, so that the DNS resolution and the TCP (and TLS) handshake are paid only once per connection instead of once per lookup.
+# 2. The idle connections are kept in a LIFO queue, so the most recently used (and thus most likely still alive) connection is reused first.
+# 3. If the server has closed an idle connection in the meantime (stale socket), then the request is retried once on a freshly opened connection.
+# ----
+class ConnectionPool:
+	""" This class contains the pool of persistent HTTP connections to a single host. Below are some of the steps to use the pool :
+	* To send a GET request -> pool.get(path), returns the tuple (status, headers, body)
+	* To close all the idle connections -> pool.close() """
+
+	def __init__(self, host = 'ipinfo.io', https = False, maxIdle = 8, timeout = 10):
+		""" The constructor takes the host of the server, whether to use HTTPS, the maximum number of idle connections to be kept open and the timeout (in seconds) for the connections. """
+
+		self.host = host
+		self.https = https
+		self.timeout = timeout
+		self.idle = LifoQueue(maxsize = maxIdle)
+		self.context = ssl.create_default_context() if https else None
+		self.counters = {"opened" : 0, "reused" : 0, "reconnects" : 0}
+
+	def connect(self):
+		""" This method opens a new connection to the server. The DNS resolution, the TCP connect and the TLS handshake are done here step by step (instead of lazily by http.client), so that each step is timed as a phase of the current lookup. """
+
+		self.counters["opened"] += 1
+		if self.https:
+			connection = HTTPSConnection(self.host, timeout = self.timeout, context = self.context)
+		else:
+			connection = HTTPConnection(self.host, timeout = self.timeout)
+
+		# Resolving the host name
+		with metrics.timed('dns'):
+			addresses = socket.getaddrinfo(connection.host, connection.port, type = socket.SOCK_STREAM)
+
+		# Connecting to the first address which accepts the connection
+		with metrics.timed('connect'):
+			for number, (family, kind, protocol, name, address) in enumerate(addresses):
+				sock = socket.socket(family, kind, protocol)
+				try:
+					sock.settimeout(self.timeout)
+					sock.connect(address)
+					break
+				except OSError:
+					sock.close()
+					if number == len(addresses) - 1:
+						raise
+			sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+		if self.https:
+			with metrics.timed('tls'):
+				try:
+					sock = self.context.wrap_socket(sock, server_hostname = connection.host)
+				except Exception:
+					sock.close()
+					raise
+		connection.sock = sock
+		return connection
+
+	def get(self, path, headers = None):
+		""" This method sends the GET request for the path mentioned in the arguments on a pooled connection, and returns the tuple (status, headers, body). The connection is handed back to the pool once the response is read completely, unless the server asked to close it. """
+
+		headers = dict(headers or {})
+		headers.setdefault('Accept', 'application/json')
+		headers.setdefault('Connection', 'keep-alive')
+
+		try:
+			connection, reused = self.idle.get_nowait(), True
+			self.counters["reused"] += 1
+		except Empty:
+			connection, reused = self.connect(), False
+
+		try:
+			response = self.send(connection, path, headers)
+		except (HTTPException, ConnectionError, OSError):
+			# If the request fails on a reused connection, then the socket was most probably closed by the server while idle, thus we retry once on a fresh connection
+
+			connection.close()
+			if not reused:
+				raise
+			self.counters["reconnects"] += 1
+			connection = self.connect()
+			try:
+				response = self.send(connection, path, headers)
+			except Exception:
+				connection.close()
+				raise
+
+		status, responseHeaders, body = response
+		if responseHeaders.get('Connection', '').lower() == 'close':
+			connection.close()
+		else:
+			try:
+				self.idle.put_nowait(connection)
+			except Full:
+				# If the pool is already full of idle connections, then we close this one
+
+				connection.close()
+		return response
+
+	def send(self, connection, path, headers):
+		""" This method sends the request on the connection mentioned in the arguments and reads the entire response (which is required before the connection can be reused). """
+
+		startTime = perf_counter()
+		connection.request('GET', path, headers = headers)
+		response = connection.getresponse()
+		headersTime = perf_counter()
+		body = response.read()
+		metrics.mark('ttfb', headersTime - startTime)
+		metrics.mark('download', perf_counter() - headersTime)
+		return response.status, {key.title() : value for key, value in response.getheaders()}, body
+
+	def close(self):
+		""" This method closes all the idle connections of the pool. """
+
+		while True:
+			try:
+				self.idle.get_nowait().close()
+			except Empty:
+				break
+
+# The connection pool to the ipinfo.io API is shared by all the worker threads of the lookup engine
+pool = ConnectionPool()
+
+# Defining the single-flight layer, which coalesces the duplicate concurrent lookups
+# ----
+# 1. When several lookups of the same (normalized) IP address are in flight at once, only the first one (the leader) sends the request to the server. The others wait for the leader and receive the same response (or the same error).
+# 2. The counters record the number of upstream calls made by the leaders, and the number of calls saved by sharing their results.
+# ----
+class SingleFlight:
+	""" This class contains the single-flight layer of the lookups. To execute a function once for all the concurrent callers of the same key -> flight.do(key, function). The counters are returned by flight.stats(). """
+
+	def __init__(self):
+		""" The constructor initializes the table of the calls in flight and the counters. """
+
+		self.lock = Lock()
+		self.calls = {}
+		self.counters = {"upstream_calls" : 0, "coalesced_calls" : 0}
+
+	def do(self, key, function):
+		""" This method calls the function mentioned in the arguments and returns its result, unless a call for the same key is already in flight, in which case it waits for that call and returns its result instead. The errors are raised to all the waiting callers. """
+
+		with self.lock:
+			call = self.calls.get(key)
+			if call is None:
+				call = self.calls[key] = Future()
+				self.counters["upstream_calls"] += 1
+				leader = True
+			else:
+				self.counters["coalesced_calls"] += 1
+				leader = False
+
+		if not leader:
+			return call.result()
+
+		try:
+			result = function()
+		except BaseException as e:
+			with self.lock:
+				del self.calls[key]
+			call.set_exception(e)
+			raise
+		with self.lock:
+			del self.calls[key]
+		call.set_result(result)
+		return result
+
+	def stats(self):
+		""" This method returns a copy of the counters. """
+
+		with self.lock:
+			return dict(self.counters)
+
+# The single-flight layer is shared by all the lookups of the application
+flight = SingleFlight()
+
+# The provider of the lookups, the ipinfo.io API on the shared connection pool by default (see useProvider())
+provider = IpinfoProvider(pool = pool)
+
+# Registering the gauges of the lookup layer with the metrics registry (read only on export)
+metrics.gauge('cache_hit_rate', lambda : cache.stats()["hit_rate"], 'Share of the lookups served from the response cache.')
+metrics.gauge('upstream_calls', lambda : flight.stats()["upstream_calls"], 'Number of the requests sent to the server.')
+metrics.gauge('coalesced_calls', lambda : flight.stats()["coalesced_calls"], 'Number of the lookups which shared a request already in flight.')
+metrics.gauge('scheduler_retries', lambda : scheduler.stats()["retries"], 'Number of the requests retried by the scheduler.')
+metrics.gauge('scheduler_rate_limited', lambda : scheduler.stats()["rate_limited"], 'Number of the rate limited (HTTP 429) responses.')
+metrics.gauge('hedged_requests', lambda : provider.stats()["hedged"], 'Number of the requests also sent to the secondary provider (hedged provider only).')
+metrics.gauge('hedge_secondary_wins', lambda : provider.stats()["secondary_wins"], 'Number of the hedged requests answered first by the secondary provider (hedged provider only).')
+metrics.gauge('scheduler_waiting', lambda : scheduler.stats()["waiting"], 'Number of the requests waiting for the scheduler.')
+
+def requestIp(ipAddress, priority = INTERACTIVE):
+	""" This function fetches the information about the IP address mentioned in the arguments from the current provider (the ipinfo.io API by default, see useProvider()), and returns it as a python dict in the normalized schema. The HTTP providers send the request through the scheduler, in the priority lane mentioned in the arguments (INTERACTIVE or BATCH), thus it is paced, retried on the temporary failures and rate limits, and served after the requests of the higher lanes. The function does not create or touch any tkinter widget, thus it is safe to call it from any worker thread. If there are any errors, they are raised to the caller (HTTPError for the responses other than HTTP 200). """
+
+	# Validating the user entered IP address before proceeding, the invalid as well as the private / reserved addresses are rejected without any request to the server
+	ipAddress = validateIp(ipAddress)
+
+	# Fetching the information about the user entered IP address from the provider
+	return provider.fetch(ipAddress, priority)
+
+def useProvider(newProvider):
+	""" This function makes the provider mentioned in the arguments (see iptracker.providers) the current provider of all the lookups, and returns the previous one. The cached responses are kept. """
+
+	global provider
+
+	previous, provider = provider, newProvider
+	return previous
+
+def currentProvider():
+	""" This function returns the current provider of the lookups. """
+
+	return provider
+
+def lookupIp(ipAddress, priority = INTERACTIVE):
+	""" This function returns the information about the IP address mentioned in the arguments as a tuple (response, age). The IP address is validated and normalized first (ValueError is raised for the invalid or non-public addresses), then the response cache is checked, and the request is sent to the server only on a miss. The concurrent lookups of the same IP address share one request (see SingleFlight). Each lookup is traced phase by phase in the metrics registry. The age is the number of seconds since the cached response was fetched, or None if the response was fetched from the server right now. """
+
+	ipAddress = validateIp(ipAddress)
+	metrics.begin(ipAddress)
+	outcome = 'error'
+	try:
+		with metrics.timed('cache'):
+			cached = cache.get(ipAddress)
+		if cached is not None:
+			outcome = 'hit'
+			return cached
+
+		leader = []
+
+		def fetch():
+			# Sending the request and storing the response into the cache, only once for all the concurrent lookups of the same IP address
+			leader.append(True)
+			response = provider.fetch(ipAddress, priority)  # The address is already validated, thus requestIp() is not used on this path
+			cache.put(ipAddress, response)
+			return response, None
+
+		result = flight.do(ipAddress, fetch)
+		outcome = 'miss' if leader else 'coalesced'
+		return result
+	finally:
+		metrics.end(outcome)
+
+def lookupMany(ipAddresses, workers = 8, priority = BATCH, executor = None):
+	""" This function resolves the IP addresses mentioned in the arguments (any iterable, it is consumed lazily) concurrently using a pool of worker threads, while keeping at most the given number of lookups in flight at once. It yields a tuple (ipAddress, response, age, error) for each lookup as soon as it completes, thus the results are in the order of completion rather than the order of the input. Either the response (along with its age in the cache) or the error is None. If an executor is specified, then the lookups run on it (a pool shared by many callers, like the API server) instead of a pool of their own, which is left running. """
+
+	ipAddresses = iter(ipAddresses)
+	with ThreadPoolExecutor(max_workers = workers, thread_name_prefix = 'lookup') if executor is None else nullcontext(executor) as executor:
+		inFlight = {}
+
+		def feed():
+			# Submitting the next IP addresses until the number of lookups in flight reaches the limit
+			for ipAddress in ipAddresses:
+				inFlight[executor.submit(lookupIp, ipAddress, priority)] = ipAddress
+				if len(inFlight) >= workers:
+					break
+
+		feed()
+		while inFlight:
+			done, pending = wait(inFlight, return_when = FIRST_COMPLETED)
+			for future in done:
+				ipAddress = inFlight.pop(future)
+				try:
+					response, age = future.result()
+				except Exception as e:
+					yield ipAddress, None, None, e
+				else:
+					yield ipAddress, response, age, None
+			feed()
@@ -0,0 +1,266 @@
+"""
+IP Tracker - Metrics
+
+This module contains the timing instrumentation of the lookups. Each lookup is traced phase by phase (the wait for the request scheduler, DNS resolution, TCP connect, TLS handshake, server time to first byte, download of the body, JSON parsing, cache lookup, and the building of the widgets in the graphical interface), the durations are kept in rolling histograms, and the whole can be exported as a Prometheus text file or as an NDJSON trace (one JSON record per lookup).
+"""
+
+# Importing the required functions and modules
+from json import dumps
+from time import perf_counter
+from datetime import datetime
+from threading import Lock, local
+from collections import deque
+import os
+
+# The phases of a lookup, in the order they happen
+PHASES = ('cache', 'throttle', 'dns', 'connect', 'tls', 'ttfb', 'download', 'json', 'widgets', 'total')
+
+class Histogram:
+	""" This class contains a rolling histogram of durations. It keeps the last few samples (the window) for the percentiles, along with the overall count and sum of all the samples ever observed. """
+
+	def __init__(self, window = 1024):
+		""" The constructor takes the number of the latest samples kept for the percentiles. """
+
+		self.samples = deque(maxlen = window)
+		self.count = 0
+		self.sum = 0.0
+
+	def observe(self, value):
+		""" This method adds a sample (in seconds) to the histogram. """
+
+		self.samples.append(value)
+		self.count += 1
+		self.sum += value
+
+	def percentiles(self, quantiles = (0.5, 0.95, 0.99)):
+		""" This method returns a dict mapping each quantile mentioned in the arguments to its value (in seconds) over the samples in the window, or an empty dict if there are no samples. """
+
+		if len(self.samples) == 0:
+			return {}
+		samples = sorted(self.samples)
+		return {quantile : samples[min(len(samples) - 1, int(quantile * len(samples)))] for quantile in quantiles}
+
+class LookupTrace:
+	""" This class contains the trace of one lookup : the IP address, the durations of its phases (in seconds) and its outcome ('hit', 'miss', 'coalesced' or 'error'). """
+
+	__slots__ = ('ip', 'timestamp', 'start', 'phases', 'outcome')
+
+	def __init__(self, ipAddress):
+		""" The constructor takes the IP address being looked up, and starts the clock. """
+
+		self.ip = ipAddress
+		self.timestamp = datetime.now().timestamp()
+		self.start = perf_counter()
+		self.phases = {}
+		self.outcome = None
+
+	def add(self, phase, seconds):
+		""" This method adds the duration mentioned in the arguments to the phase (the durations of a repeated phase, like a retried request, are summed). """
+
+		self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+	def record(self):
+		""" This method returns the trace as a dict (durations in milliseconds), as written to the NDJSON trace. """
+
+		return {"ip" : self.ip, "timestamp" : self.timestamp, "outcome" : self.outcome, "phases_ms" : {phase : round(seconds * 1000, 3) for phase, seconds in self.phases.items()}}
+
+	def summary(self):
+		""" This method returns the durations of the phases as a short line of text, in the order of the phases. """
+
+		return ', '.join(f'{phase} {self.phases[phase] * 1000:.1f} ms' for phase in PHASES if phase in self.phases)
+
+# Defining the metrics registry
+# ----
+# 1. A lookup is traced by calling begin() before and end() after it, on the same thread. In between, the instrumented code (the connection pool, the request function, the cache) calls mark() or uses the timed() context manager, which add the durations to the trace of the current thread. Thus, the trace does not need to be passed through the lookup functions, and the code outside of a traced lookup is not affected.
+# 2. On end(), the durations are added to the rolling histogram of each phase, the outcome counter is incremented, and the trace is kept in a small ring buffer (and written to the NDJSON trace file, if one is opened).
+# 3. The gauges (like the cache hit rate and the queue depth) are registered as functions, and read only when the metrics are exported.
+# ----
+class Metrics:
+	""" This class contains the metrics registry of the application. Below are some of the steps to use the registry :
+	* To trace a lookup -> metrics.begin(ipAddress), then metrics.end(outcome) on the same thread, which returns the trace (also returned once by metrics.last() on that thread)
+	* To time a phase of the current lookup -> with metrics.timed('json'): ..., or metrics.mark('json', seconds)
+	* To time a phase outside of any lookup (like the rendering) -> metrics.observe('widgets', seconds)
+	* To register a gauge -> metrics.gauge(name, function, help)
+	* To export -> metrics.prometheus() (text), metrics.writePrometheus(filename), metrics.writeTraces(filename) or metrics.openTrace(filename) for streaming """
+
+	def __init__(self, window = 1024, keep = 1024):
+		""" The constructor takes the number of the latest samples kept per histogram, and the number of the latest traces kept in memory. """
+
+		self.lock = Lock()
+		self.local = local()
+		self.window = window
+		self.histograms = {phase : Histogram(window) for phase in PHASES}
+		self.outcomes = {}
+		self.gauges = {}
+		self.traces = deque(maxlen = keep)
+		self.inFlight = 0
+		self.traceFile = None
+
+	def begin(self, ipAddress):
+		""" This method starts the trace of a lookup of the IP address mentioned in the arguments, on the current thread. """
+
+		self.local.trace = LookupTrace(ipAddress)
+		with self.lock:
+			self.inFlight += 1
+		return self.local.trace
+
+	def current(self):
+		""" This method returns the trace of the lookup in progress on the current thread, or None. """
+
+		return getattr(self.local, 'trace', None)
+
+	def adopt(self, trace):
+		""" This method makes the trace mentioned in the arguments (or None) the trace of the current thread, so that a lookup running on several threads (like the hedged requests) is timed into one trace. """
+
+		self.local.trace = trace
+
+	def last(self):
+		""" This method returns (and forgets) the trace of the last lookup ended on the current thread, or None. """
+
+		trace = getattr(self.local, 'last', None)
+		self.local.last = None
+		return trace
+
+	def mark(self, phase, seconds):
+		""" This method adds the duration mentioned in the arguments to the phase of the lookup in progress on the current thread (if any). """
+
+		trace = self.current()
+		if trace is not None:
+			trace.add(phase, seconds)
+
+	def timed(self, phase):
+		""" This method returns a context manager which times its block as the phase mentioned in the arguments, for the lookup in progress on the current thread. """
+
+		return PhaseTimer(self, phase)
+
+	def end(self, outcome):
+		""" This method ends the trace of the lookup in progress on the current thread with the outcome mentioned in the arguments, records it, and returns it. """
+
+		trace = self.current()
+		if trace is None:
+			return None
+		self.local.trace = None
+		self.local.last = trace
+		trace.add('total', perf_counter() - trace.start)
+		trace.outcome = outcome
+
+		with self.lock:
+			self.inFlight -= 1
+			for phase, seconds in trace.phases.items():
+				self.histograms[phase].observe(seconds)
+			self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+			self.traces.append(trace)
+			if self.traceFile is not None:
+				self.traceFile.write(dumps(trace.record()) + '\n')
+		return trace
+
+	def observe(self, phase, seconds, trace = None):
+		""" This method adds the duration mentioned in the arguments directly to the histogram of the phase, for the phases measured after the lookup has ended (like the building of the widgets). If the trace of the lookup is mentioned, then the duration is added to it too. """
+
+		with self.lock:
+			self.histograms[phase].observe(seconds)
+		if trace is not None:
+			trace.add(phase, seconds)
+
+	def gauge(self, name, function, help = ''):
+		""" This method registers a gauge, i.e., a function returning the current value of a metric. The function is called only on export. """
+
+		self.gauges[name] = (function, help)
+
+	def snapshot(self):
+		""" This method returns the current metrics as a dict : the percentiles (in milliseconds) and the count of each phase, the outcome counters, the lookups in flight and the values of the gauges. """
+
+		with self.lock:
+			phases = {}
+			for phase, histogram in self.histograms.items():
+				if histogram.count > 0:
+					phases[phase] = {"count" : histogram.count, **{f'p{int(quantile * 100)}_ms' : round(value * 1000, 3) for quantile, value in histogram.percentiles().items()}}
+			snapshot = {"phases" : phases, "outcomes" : dict(self.outcomes), "in_flight" : self.inFlight}
+		snapshot["gauges"] = {name : self.read(function) for name, (function, help) in self.gauges.items()}
+		return snapshot
+
+	def read(self, function):
+		""" This method returns the value of a gauge function, or None if it fails. """
+
+		try:
+			return function()
+		except Exception:
+			return None
+
+	def prometheus(self):
+		""" This method returns the metrics in the Prometheus text exposition format. The phases are exported as summaries (quantiles over the rolling window, along with the overall sum and count) in seconds. """
+
+		lines = ['# HELP iptracker_lookup_phase_seconds Duration of each phase of the lookups.', '# TYPE iptracker_lookup_phase_seconds summary']
+		with self.lock:
+			for phase, histogram in self.histograms.items():
+				if histogram.count == 0:
+					continue
+				for quantile, value in histogram.percentiles().items():
+					lines.append(f'iptracker_lookup_phase_seconds{{phase="{phase}",quantile="{quantile}"}} {value:.6f}')
+				lines.append(f'iptracker_lookup_phase_seconds_sum{{phase="{phase}"}} {histogram.sum:.6f}')
+				lines.append(f'iptracker_lookup_phase_seconds_count{{phase="{phase}"}} {histogram.count}')
+
+			lines += ['# HELP iptracker_lookups_total Number of the lookups per outcome.', '# TYPE iptracker_lookups_total counter']
+			for outcome, count in sorted(self.outcomes.items()):
+				lines.append(f'iptracker_lookups_total{{outcome="{outcome}"}} {count}')
+			lines += ['# HELP iptracker_lookups_in_flight Number of the lookups in progress.', '# TYPE iptracker_lookups_in_flight gauge', f'iptracker_lookups_in_flight {self.inFlight}']
+
+		for name, (function, help) in sorted(self.gauges.items()):
+			value = self.read(function)
+			if value is None:
+				continue
+			lines += [f'# HELP iptracker_{name} {help or name}', f'# TYPE iptracker_{name} gauge', f'iptracker_{name} {value}']
+		return '\n'.join(lines) + '\n'
+
+	def writePrometheus(self, filename):
+		""" This method writes the metrics in the Prometheus text format to the file mentioned in the arguments. The file is replaced atomically, so that a scraper (like the textfile collector of node_exporter) never reads a half-written file. """
+
+		temporary = filename + '.tmp'
+		with open(temporary, 'w') as file:
+			file.write(self.prometheus())
+		os.replace(temporary, filename)
+
+	def writeTraces(self, filename):
+		""" This method writes the latest traces kept in memory to the file mentioned in the arguments, as NDJSON. It returns the number of the traces written. """
+
+		with self.lock:
+			traces = list(self.traces)
+		with open(filename, 'w') as file:
+			for trace in traces:
+				file.write(dumps(trace.record()) + '\n')
+		return len(traces)
+
+	def openTrace(self, filename):
+		""" This method opens the NDJSON trace file mentioned in the arguments (in the append mode), and from now on writes the trace of each lookup to it as the lookup ends. """
+
+		self.closeTrace()
+		with self.lock:
+			self.traceFile = open(filename, 'a', encoding = 'utf-8')
+
+	def closeTrace(self):
+		""" This method closes the NDJSON trace file, if any. """
+
+		with self.lock:
+			if self.traceFile is not None:
+				self.traceFile.close()
+				self.traceFile = None
+
+class PhaseTimer:
+	""" This class contains the context manager returned by metrics.timed(phase). """
+
+	__slots__ = ('metrics', 'phase', 'start')
+
+	def __init__(self, metrics, phase):
+		self.metrics = metrics
+		self.phase = phase
+
+	def __enter__(self):
+		self.start = perf_counter()
+		return self
+
+	def __exit__(self, *arguments):
+		self.metrics.mark(self.phase, perf_counter() - self.start)
+		return False
+
+# The metrics registry is shared by all the lookups of the application
+metrics = Metrics()
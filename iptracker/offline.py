@@ -0,0 +1,238 @@
+"""
+IP Tracker - Offline database
+
+This module contains the offline IP geolocation engine. The ranges of IP addresses (start, end, country, city, org / ASN) are imported from a CSV file into a compact binary file of sorted, packed integer ranges, which is then memory-mapped and searched using binary search. Thus, a lookup does not need any network round trip, takes only a few microseconds and costs nearly no memory (the operating system pages in only the touched parts of the file). If NumPy is installed, then the bulk lookups are vectorized using numpy.searchsorted.
+
+Format of the binary file (all the integers are little-endian) :
+1. Header - magic (8 bytes), version, number of IPv4 ranges, number of IPv6 ranges, number of records, followed by the offsets of the sections below.
+2. IPv4 section - the start addresses (uint32), the end addresses (uint32) and the record ids (uint32) of the ranges, sorted by the start address.
+3. IPv6 section - the start and the end addresses (16 bytes each, big-endian so that they sort as bytes) and the record ids (uint32) of the ranges, sorted by the start address.
+4. Records section - the offsets (uint32, number of records + 1) into the blob of the JSON encoded records. The identical records (same country, city and org) are stored only once.
+"""
+
+# Importing the required functions and modules
+from json import loads, dumps
+from csv import reader as csvReader
+from struct import Struct, pack
+from ipaddress import ip_address
+from functools import lru_cache
+import mmap
+
+from iptracker.validation import packIpv4
+
+try:
+	import numpy
+except ImportError:
+	# NumPy is optional, the bulk lookups fall back to the binary search on each address
+
+	numpy = None
+
+MAGIC = b'IPTRANGE'
+VERSION = 1
+HEADER = Struct('<8sIIII8Q')
+UINT32 = Struct('<I')
+
+def align(size, boundary = 16):
+	""" This function returns the size mentioned in the arguments rounded up to the boundary, so that the arrays in the file stay aligned. """
+
+	return (size + boundary - 1) // boundary * boundary
+
+def parseAddress(value):
+	""" This function parses an address of the CSV file, which can either be an IP address or its integer form, and returns the ipaddress object. """
+
+	value = value.strip()
+	if value.isdigit():
+		return ip_address(int(value))
+	return ip_address(value)
+
+def importRanges(csvFilename, filename):
+	""" This function imports the ranges of IP addresses from the CSV file (columns : start, end, country, city, org) mentioned in the arguments into the binary file (filename). A header row is skipped. The ranges are expected not to overlap. The function returns the tuple (number of IPv4 ranges, number of IPv6 ranges, number of unique records). """
+
+	ranges = {4 : [], 6 : []}
+	records, recordIds = [], {}
+
+	with open(csvFilename, 'r', newline = '') as file:
+		for row in csvReader(file):
+			# Iterating through each row of the CSV file
+
+			if len(row) < 2 or row[0].strip() == '' or row[0].startswith('#'):
+				continue
+			try:
+				start, end = parseAddress(row[0]), parseAddress(row[1])
+			except ValueError:
+				# If the row is the header row (or an invalid row), then we skip it
+
+				continue
+			if start.version != end.version or int(start) > int(end):
+				raise ValueError(f'Invalid range : {row[0]} - {row[1]}')
+
+			record = dumps({key : (row[index].strip() if len(row) > index else '') for index, key in ((2, 'country'), (3, 'city'), (4, 'org'))}, separators = (',', ':'))
+			if record not in recordIds:
+				recordIds[record] = len(records)
+				records.append(record.encode())
+			ranges[start.version].append((int(start), int(end), recordIds[record]))
+
+	for version in ranges:
+		ranges[version].sort()
+
+	# Arranging the sections of the file
+	v4, v6 = ranges[4], ranges[6]
+	sections = [
+		b''.join(pack('<I', start) for start, end, record in v4),
+		b''.join(pack('<I', end) for start, end, record in v4),
+		b''.join(pack('<I', record) for start, end, record in v4),
+		b''.join(start.to_bytes(16, 'big') for start, end, record in v6),
+		b''.join(end.to_bytes(16, 'big') for start, end, record in v6),
+		b''.join(pack('<I', record) for start, end, record in v6),
+		]
+	offsets, position = [0], 0
+	for record in records:
+		position += len(record)
+		offsets.append(position)
+	sections.append(b''.join(pack('<I', offset) for offset in offsets))
+	sections.append(b''.join(records))
+
+	# Writing the header followed by the aligned sections
+	with open(filename, 'wb') as file:
+		position = align(HEADER.size)
+		sectionOffsets = []
+		for section in sections:
+			sectionOffsets.append(position)
+			position = align(position + len(section))
+		file.write(HEADER.pack(MAGIC, VERSION, len(v4), len(v6), len(records), *sectionOffsets))
+		for offset, section in zip(sectionOffsets, sections):
+			file.write(b'\0' * (offset - file.tell()))
+			file.write(section)
+	return len(v4), len(v6), len(records)
+
+class OfflineDatabase:
+	""" This class contains the offline lookup engine over a memory-mapped binary file created by importRanges(). Below are some of the steps to use the engine :
+	* To open a database -> database = OfflineDatabase(filename)
+	* To look up an IP address -> database.lookup(ipAddress), returns the ipinfo-style response (dict), or None if the address is not covered by any range
+	* To look up many IP addresses at once -> database.lookupBulk(ipAddresses), returns the list of responses (or None) """
+
+	def __init__(self, filename):
+		""" The constructor memory-maps the binary file mentioned in the arguments and validates its header. """
+
+		self.filename = filename
+		with open(filename, 'rb') as file:
+			self.map = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+
+		magic, version, self.count4, self.count6, self.countRecords, *offsets = HEADER.unpack_from(self.map, 0)
+		if magic != MAGIC or version != VERSION:
+			raise ValueError(f'{filename} is not an offline database of a supported version.')
+		self.starts4, self.ends4, self.records4, self.starts6, self.ends6, self.records6, self.recordOffsets, self.blob = offsets
+		self.view = memoryview(self.map)
+		self.record = lru_cache(maxsize = 4096)(self.record)
+
+		# Mapping the IPv4 arrays as NumPy arrays (without copying) for the vectorized bulk lookups
+		if numpy is not None and self.count4 > 0:
+			self.numpyStarts4 = numpy.frombuffer(self.map, dtype = '<u4', count = self.count4, offset = self.starts4)
+			self.numpyEnds4 = numpy.frombuffer(self.map, dtype = '<u4', count = self.count4, offset = self.ends4)
+			self.numpyRecords4 = numpy.frombuffer(self.map, dtype = '<u4', count = self.count4, offset = self.records4)
+
+	def record(self, recordId):
+		""" This method returns the decoded record (dict) for the record id mentioned in the arguments. The decoded records are cached, as many ranges share the same record. """
+
+		start, end = UINT32.unpack_from(self.map, self.recordOffsets + 4 * recordId)[0], UINT32.unpack_from(self.map, self.recordOffsets + 4 * recordId + 4)[0]
+		return loads(bytes(self.view[self.blob + start : self.blob + end]))
+
+	def find4(self, value):
+		""" This method returns the record id of the IPv4 range covering the integer address mentioned in the arguments, or None. It does the binary search over the memory-mapped start addresses. """
+
+		low, high = 0, self.count4
+		while low < high:
+			middle = (low + high) // 2
+			if UINT32.unpack_from(self.map, self.starts4 + 4 * middle)[0] <= value:
+				low = middle + 1
+			else:
+				high = middle
+		if low == 0 or UINT32.unpack_from(self.map, self.ends4 + 4 * (low - 1))[0] < value:
+			return None
+		return UINT32.unpack_from(self.map, self.records4 + 4 * (low - 1))[0]
+
+	def find6(self, value):
+		""" This method returns the record id of the IPv6 range covering the address (16 bytes, big-endian) mentioned in the arguments, or None. """
+
+		low, high = 0, self.count6
+		while low < high:
+			middle = (low + high) // 2
+			if self.map[self.starts6 + 16 * middle : self.starts6 + 16 * middle + 16] <= value:
+				low = middle + 1
+			else:
+				high = middle
+		if low == 0 or self.map[self.ends6 + 16 * (low - 1) : self.ends6 + 16 * low] < value:
+			return None
+		return UINT32.unpack_from(self.map, self.records6 + 4 * (low - 1))[0]
+
+	def response(self, ipAddress, recordId):
+		""" This method returns the ipinfo-style response for the IP address and the record id mentioned in the arguments. """
+
+		if recordId is None:
+			return None
+		response = {"ip" : ipAddress}
+		response.update(self.record(recordId))
+		return response
+
+	def lookup(self, ipAddress):
+		""" This method returns the ipinfo-style response (ip, country, city, org) for the IP address mentioned in the arguments, or None if the address is not covered by any range. Invalid addresses raise ValueError. """
+
+		address = ip_address(ipAddress.strip())
+		if address.version == 4:
+			return self.response(str(address), self.find4(int(address)))
+		return self.response(str(address), self.find6(address.packed))
+
+	def lookupPacked(self, values):
+		""" This method looks up the IPv4 addresses packed as integers (a NumPy uint32 array) in one vectorized pass, and returns the array of the record ids (-1 where the address is not covered by any range). NumPy is required. """
+
+		if numpy is None:
+			raise RuntimeError('NumPy is required for the packed lookups.')
+		if self.count4 == 0:
+			return numpy.full(len(values), -1, dtype = numpy.int64)
+
+		indexes = numpy.searchsorted(self.numpyStarts4, values, side = 'right') - 1
+		clipped = numpy.maximum(indexes, 0)
+		found = (indexes >= 0) & (self.numpyEnds4[clipped] >= values)
+		return numpy.where(found, self.numpyRecords4[clipped].astype(numpy.int64), -1)
+
+	def lookupBulk(self, ipAddresses):
+		""" This method looks up many IP addresses at once and returns the list of the responses (None for the addresses not covered by any range or invalid). If NumPy is installed, then the IPv4 addresses are packed into a uint32 array and resolved in one vectorized pass, while the other addresses are resolved one by one. """
+
+		ipAddresses = [ipAddress.strip() for ipAddress in ipAddresses]
+		results = [None] * len(ipAddresses)
+		remaining = range(len(ipAddresses))
+
+		if numpy is not None and len(ipAddresses) > 0:
+			# Packing the dotted IPv4 addresses into a uint32 array, the other addresses are resolved one by one
+			values, valid = packIpv4(ipAddresses)
+			remaining = numpy.flatnonzero(~valid).tolist()
+			positions = numpy.flatnonzero(valid)
+			for index, recordId in zip(positions.tolist(), self.lookupPacked(values[positions]).tolist()):
+				if recordId >= 0:
+					results[index] = self.response(ipAddresses[index], recordId)
+
+		for index in remaining:
+			try:
+				results[index] = self.lookup(ipAddresses[index])
+			except ValueError:
+				results[index] = None
+		return results
+
+	def lookupStream(self, ipAddresses, chunkSize = 65536):
+		""" This method looks up the IP addresses mentioned in the arguments (any iterable, it is consumed lazily in chunks) and yields a tuple (ipAddress, response) for each of them, in the order of the input. The response is None for the addresses not covered by any range or invalid. """
+
+		chunk = []
+		for ipAddress in ipAddresses:
+			chunk.append(ipAddress)
+			if len(chunk) >= chunkSize:
+				yield from zip(chunk, self.lookupBulk(chunk))
+				chunk = []
+		if chunk:
+			yield from zip(chunk, self.lookupBulk(chunk))
+
+	def close(self):
+		""" This method unmaps the database file. """
+
+		self.numpyStarts4 = self.numpyEnds4 = self.numpyRecords4 = None
+		self.view.release()
+		self.map.close()
@@ -0,0 +1,226 @@
+"""
+IP Tracker - Profiling
+
+This module contains the profiling mode of the tool. When it is on, each action of the application (a menu command, a lookup on the worker thread running it, a phase of the startup, a command of the command line interface) is run under cProfile and tracemalloc, and its call profile (.pstats) and memory snapshot (.snapshot) are written to a directory, along with one summary record per action in 'index.ndjson'. Thus, the slow startups, the costly widget builds and the allocation hot spots can be tracked down in the field. When it is off, the profiled actions cost only a flag check.
+
+The files can be read using the standard library : pstats.Stats('FILE.pstats').sort_stats('cumulative').print_stats(20), and tracemalloc.Snapshot.load('FILE.snapshot').statistics('lineno').
+"""
+
+# Importing the required functions and modules
+from json import dumps
+from time import perf_counter, process_time
+from datetime import datetime
+from functools import wraps
+from threading import Lock, get_ident
+from collections import deque
+from io import StringIO
+import cProfile
+import pstats
+import tracemalloc
+import os
+import re
+
+class ActionProfile:
+	""" This class contains the profile of one action, used as a context manager : with profiler.profile('name'): ... The action is profiled only if the profiling mode is on and no other action is being profiled (the nested actions are part of the outer one, as cProfile runs one profile at a time). The actions run meanwhile on the other threads are counted as skipped by the profiler. """
+
+	def __init__(self, profiler, name):
+		""" The constructor takes the profiler and the name of the action. """
+
+		self.profiler = profiler
+		self.name = name
+		self.profile = None
+
+	def __enter__(self):
+		if not self.profiler.enabled:
+			return self
+		if not self.profiler.active.acquire(blocking = False):
+			if self.profiler.owner != get_ident():
+				# The nested actions are part of the outer one, only the actions overlapping it on the other threads are counted as skipped
+				self.profiler.skip(self.name)
+			return self
+		self.profiler.owner = get_ident()
+
+		self.profile = cProfile.Profile()
+		tracemalloc.reset_peak()
+		self.memory = tracemalloc.get_traced_memory()[0]
+		self.started = datetime.now()
+		self.start, self.cpu = perf_counter(), process_time()
+		self.profile.enable()
+		return self
+
+	def __exit__(self, *arguments):
+		if self.profile is None:
+			return
+
+		self.profile.disable()
+		try:
+			seconds, cpuSeconds = perf_counter() - self.start, process_time() - self.cpu
+			current, peak = tracemalloc.get_traced_memory()
+			self.profiler.finish(self.name, self.started, seconds, cpuSeconds, peak - self.memory, current - self.memory, self.profile)
+		finally:
+			self.profile = None
+			self.profiler.owner = None
+			if not self.profiler.enabled:
+				# If the profiling mode was turned off during the action, then the tracing is stopped now
+				self.profiler.stopTracing()
+			self.profiler.active.release()
+
+# Defining the profiler
+# ----
+# 1. The profiling mode is turned on using enable(directory) (the --profile DIR option, or the toggle in the tools menu) and off using disable(). tracemalloc traces the allocations only while the mode is on, as it slows down the whole application.
+# 2. The files of an action are named after the start of the session, the number of the action and its name (like 20260101-120000-0003-menu.history.pstats), thus the sessions never overwrite each other.
+# 3. The latest actions are kept in memory for the summary of the slowest ones, and every action is also appended to 'index.ndjson' in the directory, so that the timings can be compared across the sessions.
+# ----
+class Profiler:
+	""" This class contains the profiler of the application. Below are some of the steps to use the profiler :
+	* To turn the profiling mode on / off -> profiler.enable('profiles') / profiler.disable()
+	* To profile an action -> with profiler.profile('name'): ..., or decorate a function using @profiler.profiled('name')
+	* To profile the consecutive phases of a process (like the startup) -> profiler.phase('startup.window'), profiler.phase('startup.menus'), ..., profiler.phase(None) to end the last one
+	* To fetch the slowest recent actions -> profiler.slowest(10), or profiler.report(10) as text """
+
+	def __init__(self, keep = 100, frames = 5):
+		""" The constructor takes the number of the latest actions kept for the summary, and the number of the frames tracemalloc keeps per allocation. """
+
+		self.keep = keep
+		self.frames = frames
+		self.enabled = False
+		self.directory = None
+		self.session = None
+		self.sequence = 0
+		self.records = deque(maxlen = keep)
+		self.current = None
+		self.skipped = {}  # The number of the actions run unprofiled (another action was being profiled), per name
+		self.active = Lock()  # Held while an action is being profiled
+		self.owner = None  # The thread of the action being profiled
+		self.lock = Lock()
+		self.startedTracing = False
+
+	def enable(self, directory = 'profiles'):
+		""" This method turns the profiling mode on, writing the files to the directory mentioned in the arguments (created if missing). """
+
+		os.makedirs(directory, exist_ok = True)
+		with self.lock:
+			self.directory = directory
+			self.session = datetime.now().strftime('%Y%m%d-%H%M%S')
+			self.sequence = 0
+			self.skipped = {}
+			if not tracemalloc.is_tracing():
+				tracemalloc.start(self.frames)
+				self.startedTracing = True
+			self.enabled = True
+
+	def disable(self):
+		""" This method turns the profiling mode off. If an action is being profiled, then it is still stored when it ends. """
+
+		self.phase(None)
+		self.enabled = False
+		if self.active.acquire(blocking = False):
+			try:
+				self.stopTracing()
+			finally:
+				self.active.release()
+
+	def stopTracing(self):
+		""" This method stops tracing the allocations, if the tracing was started by the profiler. """
+
+		with self.lock:
+			if self.startedTracing:
+				tracemalloc.stop()
+				self.startedTracing = False
+
+	def profile(self, name):
+		""" This method returns the context manager profiling the action mentioned in the arguments. """
+
+		return ActionProfile(self, name)
+
+	def profiled(self, name):
+		""" This method returns a decorator profiling each call of the function as an action with the name mentioned in the arguments. The keyword arguments set to True are appended to the name (like menu.history[fetch,session]), so that the commands served by one function are told apart. """
+
+		def decorator(function):
+			@wraps(function)
+			def wrapper(*arguments, **keywords):
+				if not self.enabled:
+					return function(*arguments, **keywords)
+				flags = [key for key, value in keywords.items() if value is True]
+				with ActionProfile(self, f'{name}[{",".join(flags)}]' if flags else name):
+					return function(*arguments, **keywords)
+			return wrapper
+		return decorator
+
+	def skip(self, name):
+		""" This method counts an action run unprofiled, as another action was being profiled at the same time on another thread. """
+
+		with self.lock:
+			self.skipped[name] = self.skipped.get(name, 0) + 1
+
+	def phase(self, name):
+		""" This method ends the current phase (if any), and starts profiling the phase mentioned in the arguments (None to start no other phase). """
+
+		if self.current is not None:
+			self.current.__exit__(None, None, None)
+			self.current = None
+		if name is not None:
+			self.current = ActionProfile(self, name).__enter__()
+
+	def finish(self, name, started, seconds, cpuSeconds, peak, allocated, profile):
+		""" This method stores the profile of a completed action : the call profile and the memory snapshot are written to the directory, and the summary record is kept and appended to the index. The errors while writing the files are ignored, so that the profiling never breaks the action. """
+
+		with self.lock:
+			self.sequence += 1
+			base = os.path.join(self.directory, f'{self.session}-{self.sequence:04d}-{re.sub(r"[^A-Za-z0-9_.,-]+", "_", name)}')
+		record = {
+			"name" : name,
+			"started" : started.isoformat(timespec = 'milliseconds'),
+			"seconds" : round(seconds, 6),
+			"cpu_seconds" : round(cpuSeconds, 6),
+			"peak_bytes" : max(peak, 0),
+			"allocated_bytes" : allocated,
+			"pstats" : base + '.pstats',
+			"snapshot" : base + '.snapshot',
+		}
+		try:
+			profile.dump_stats(record["pstats"])
+			tracemalloc.take_snapshot().dump(record["snapshot"])
+			with open(os.path.join(self.directory, 'index.ndjson'), 'a') as file:
+				file.write(dumps(record) + '\n')
+		except (OSError, RuntimeError):
+			pass
+		with self.lock:
+			self.records.append(record)
+
+	def slowest(self, count = 10):
+		""" This method returns the records of the slowest actions among the latest ones, from the slowest. """
+
+		with self.lock:
+			records = list(self.records)
+		return sorted(records, key = lambda record : record["seconds"], reverse = True)[:count]
+
+	def report(self, count = 10, functions = 10):
+		""" This method returns the summary of the slowest recent actions as text : the wall and the CPU time, the peak and the retained memory of each action, followed by the functions with the highest cumulative time and the lines with the most allocated memory of the slowest action. """
+
+		records = self.slowest(count)
+		with self.lock:
+			skipped = sorted(self.skipped.items(), key = lambda item : item[1], reverse = True)
+		if len(records) == 0:
+			return 'No action has been profiled yet.' if self.enabled else 'The profiling mode is off.'
+
+		text = '[#] %-36s   %9s   %9s   %10s   %10s\n' %('ACTION', 'WALL (ms)', 'CPU (ms)', 'PEAK (KB)', 'KEPT (KB)')
+		for record in records:
+			text += '[#] %-36s   %9.1f   %9.1f   %10.1f   %10.1f\n' %(record["name"][:36], 1000 * record["seconds"], 1000 * record["cpu_seconds"], record["peak_bytes"] / 1024, record["allocated_bytes"] / 1024)
+		if skipped:
+			# The actions which overlapped a profiled one were not profiled, as cProfile runs one profile at a time
+			text += f'\nSKIPPED (RUN WHILE ANOTHER ACTION WAS PROFILED) : {sum(count for name, count in skipped)} actions, ' + ', '.join(f'{name} ({count})' for name, count in skipped[:functions]) + '\n'
+
+		slowest = records[0]
+		try:
+			output = StringIO()
+			pstats.Stats(slowest["pstats"], stream = output).sort_stats('cumulative').print_stats(functions)
+			text += f'\nSLOWEST ACTION : {slowest["name"]} ({slowest["pstats"]})\n' + output.getvalue().split('\n\n', 1)[-1].strip('\n') + '\n'
+			statistics = tracemalloc.Snapshot.load(slowest["snapshot"]).statistics('lineno')[:functions]
+			text += '\nTOP ALLOCATIONS (AT THE END OF THE SLOWEST ACTION)\n' + ''.join(f'[#] {statistic}\n' for statistic in statistics)
+		except (OSError, EOFError, ValueError):
+			pass
+		return text
+
+# The profiler is shared by the entire application
+profiler = Profiler()
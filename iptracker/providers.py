@@ -0,0 +1,277 @@
+"""
+IP Tracker - Providers
+
+This module contains the provider backends of the lookups. A provider fetches the information about an IP address from somewhere (the ipinfo.io API, another HTTP API, the offline database) and maps it to the normalized schema of the application, which is the schema of the ipinfo.io responses (ip, hostname, city, region, country, loc, org, postal, timezone) along with the name of the provider. Thus, the rest of the application (the cache, the history, the interfaces) does not depend on where the information came from. A hedged provider combines two providers, and sends the request to the second one only if the first one is slower than a latency budget.
+"""
+
+# Importing the required functions and modules
+from json import loads
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from iptracker.metrics import metrics
+from iptracker.scheduler import scheduler as defaultScheduler, RequestScheduler, HTTPError, parseRetryAfter, INTERACTIVE
+
+# The fields of the normalized schema, the same as those of the ipinfo.io responses
+FIELDS = ('ip', 'hostname', 'city', 'region', 'country', 'loc', 'org', 'postal', 'timezone')
+
+class Provider:
+	""" This class contains the interface of the providers. A provider implements the fetch() method, which returns the information about an IP address in the normalized schema, or raises an error. """
+
+	name = 'provider'
+
+	def fetch(self, ipAddress, priority = INTERACTIVE):
+		""" This method returns the information about the IP address mentioned in the arguments (already validated) as a dict in the normalized schema. The priority (INTERACTIVE or BATCH) is the lane of the request, for the providers which go through the request scheduler. """
+
+		raise NotImplementedError
+
+	def normalize(self, ipAddress, data):
+		""" This method maps the data returned by the backend (dict) to the normalized schema. The keys are kept as they are, the empty values are dropped, and the IP address and the name of the provider are added. """
+
+		response = {key : value for key, value in data.items() if value not in (None, '')}
+		response["ip"] = response.get("ip") or ipAddress
+		response["provider"] = self.name
+		return response
+
+	def close(self):
+		""" This method releases the resources (connections, files) held by the provider. """
+
+		pass
+
+# Defining the HTTP providers
+# ----
+# 1. An HTTP provider sends a GET request for each IP address to a JSON API on a pooled keep-alive connection (see ConnectionPool), through the request scheduler (pacing, retries, rate limits, priority lanes).
+# 2. The path of the request is a template containing '{ip}', and the fields of the response are mapped to the normalized schema using a mapping of the normalized field to the field of the response (dotted for the nested fields), or to a function of the response.
+# ----
+class HttpProvider(Provider):
+	""" This class contains a provider for any JSON-over-HTTP API. Below are some of the steps to use the provider :
+	* To create a provider -> HttpProvider('name', 'api.example.com', path = '/json/{ip}', mapping = {"country" : "country_code", "org" : "connection.org"})
+	* To fetch the information about an IP address -> provider.fetch(ipAddress) """
+
+	def __init__(self, name, host, path = '/{ip}', https = False, mapping = None, headers = None, pool = None, scheduler = None):
+		""" The constructor takes the name of the provider, the host of the API, the template of the path, whether to use HTTPS, the mapping of the fields (None to keep the fields as they are), the extra headers of the requests, and optionally the connection pool and the request scheduler to be used (a new pool, and the shared scheduler by default). """
+
+		if pool is None:
+			from iptracker.lookup import ConnectionPool
+
+			pool = ConnectionPool(host = host, https = https)
+		self.name = name
+		self.path = path
+		self.mapping = mapping
+		self.headers = headers
+		self.pool = pool
+		self.scheduler = scheduler or defaultScheduler
+
+	def error(self, status, body):
+		""" This method returns the error message for a response other than HTTP 200, as sent by the server if possible. """
+
+		try:
+			error = loads(body.decode())["error"]
+			return f'{error["title"]} : {error["message"]}'
+		except Exception:
+			return f'The server responded with the HTTP status {status}.'
+
+	def parse(self, ipAddress, body):
+		""" This method parses the body of an HTTP 200 response and returns it in the normalized schema. """
+
+		data = loads(body.decode())
+		if self.mapping is None:
+			return self.normalize(ipAddress, data)
+
+		mapped = {}
+		for field, source in self.mapping.items():
+			if callable(source):
+				value = source(data)
+			else:
+				value = data
+				for key in source.split('.'):
+					value = value.get(key) if isinstance(value, dict) else None
+			mapped[field] = value
+		return self.normalize(ipAddress, mapped)
+
+	def fetch(self, ipAddress, priority = INTERACTIVE):
+		""" This method fetches the information about the IP address mentioned in the arguments from the API, through the request scheduler, and returns it in the normalized schema. HTTPError is raised for the responses other than HTTP 200. """
+
+		path = self.path.format(ip = ipAddress)
+
+		def send():
+			# Sending the GET HTTP request on a pooled connection, and raising the error (along with the status and the Retry-After delay for the scheduler) for the responses other than HTTP 200
+			status, headers, body = self.pool.get(path, self.headers)
+			if status != 200:
+				raise HTTPError(self.error(status, body), status, parseRetryAfter(headers.get('Retry-After')))
+			return body
+
+		body = self.scheduler.run(send, priority, onWait = lambda seconds : metrics.mark('throttle', seconds))
+		with metrics.timed('json'):
+			return self.parse(ipAddress, body)
+
+	def close(self):
+		""" This method closes the idle connections of the provider. """
+
+		self.pool.close()
+
+class IpinfoProvider(HttpProvider):
+	""" This class contains the provider for the ipinfo.io API, whose responses are already in the normalized schema. An access token can be specified for the higher quotas. """
+
+	def __init__(self, host = 'ipinfo.io', https = False, token = None, pool = None, scheduler = None):
+		""" The constructor takes the host of the API, whether to use HTTPS, the access token (if any), and optionally the connection pool and the request scheduler to be used. """
+
+		super().__init__('ipinfo', host, path = '/{ip}' if token is None else '/{ip}?token=' + token, https = https, pool = pool, scheduler = scheduler)
+
+class IpApiProvider(HttpProvider):
+	""" This class contains the provider for the ip-api.com API (the free endpoint, http://ip-api.com/json/IP), an alternate HTTP endpoint whose fields are mapped to the normalized schema. """
+
+	def __init__(self, host = 'ip-api.com', pool = None, scheduler = None):
+		""" The constructor takes the host of the API, and optionally the connection pool and the request scheduler to be used. """
+
+		mapping = {
+			"ip" : "query",
+			"hostname" : "reverse",
+			"city" : "city",
+			"region" : "regionName",
+			"country" : "countryCode",
+			"loc" : lambda data : f'{data["lat"]:.4f},{data["lon"]:.4f}' if "lat" in data and "lon" in data else None,
+			"org" : lambda data : data.get("as") or data.get("org"),
+			"postal" : "zip",
+			"timezone" : "timezone",
+		}
+		super().__init__('ip-api', host, path = '/json/{ip}?fields=status,message,query,reverse,city,regionName,countryCode,lat,lon,as,org,zip,timezone', mapping = mapping, pool = pool, scheduler = scheduler)
+
+	def parse(self, ipAddress, body):
+		""" This method parses the body of the response, raising the error reported by the API (the API responds with HTTP 200 along with a status field). """
+
+		data = loads(body.decode())
+		if data.get("status") == 'fail':
+			raise LookupError(f'ip-api.com : {data.get("message", "the lookup failed")}')
+		return super().parse(ipAddress, body)
+
+class ServerProvider(HttpProvider):
+	""" This class contains the provider for the local API server of the tool (see iptracker.server), thus the lookups use the shared cache and the rate-limited client of the server instead of hitting the upstream API directly. The responses are already in the normalized schema, and keep the name of the provider the server fetched them from. """
+
+	def __init__(self, host = '127.0.0.1:8000', pool = None, scheduler = None):
+		""" The constructor takes the 'host:port' of the server, and optionally the connection pool and the request scheduler to be used. The upstream rate limit is applied by the server, thus the scheduler of this provider only retries the temporary failures (no pacing) by default. """
+
+		super().__init__('server', host, path = '/lookup/{ip}', pool = pool, scheduler = scheduler or RequestScheduler(rate = None))
+
+	def normalize(self, ipAddress, data):
+		""" This method keeps the response as it is, along with the name of the provider the server fetched it from. """
+
+		response = super().normalize(ipAddress, data)
+		response["provider"] = data.get("provider") or self.name
+		return response
+
+class OfflineProvider(Provider):
+	""" This class contains the provider for the offline database (see iptracker.offline). The lookups are local, thus they do not go through the request scheduler. """
+
+	name = 'offline'
+
+	def __init__(self, database):
+		""" The constructor takes the offline database (an OfflineDatabase object) or the filename of the database file. """
+
+		if isinstance(database, str):
+			from iptracker.offline import OfflineDatabase
+
+			database = OfflineDatabase(database)
+		self.database = database
+
+	def fetch(self, ipAddress, priority = INTERACTIVE):
+		""" This method looks up the IP address mentioned in the arguments in the offline database. LookupError is raised if the address is not covered by the database. """
+
+		response = self.database.lookup(ipAddress)
+		if response is None:
+			raise LookupError(f'{ipAddress} is not covered by the offline database.')
+		return self.normalize(ipAddress, response)
+
+	def close(self):
+		""" This method unmaps the database file. """
+
+		self.database.close()
+
+# Defining the hedged provider
+# ----
+# 1. The request is sent to the primary provider first. If the answer arrives within the latency budget, then it is returned as it is.
+# 2. Otherwise (or if the primary provider fails before the budget), the same request is sent to the secondary provider too, and the first successful answer of the two is returned. The slower request is left to complete in the background, its answer is discarded.
+# 3. Thus, the tail latency is cut down to about the budget plus the latency of the secondary provider, at the cost of the extra requests sent for the slow lookups only.
+# ----
+class HedgedProvider(Provider):
+	""" This class contains the hedged provider. To create it -> HedgedProvider(primary, secondary, budget = 0.5), then use it like any other provider. The counters (number of the hedged requests and of the ones won by the secondary provider) are returned by stats(). """
+
+	def __init__(self, primary, secondary, budget = 0.5, workers = 16):
+		""" The constructor takes the primary and the secondary providers, the latency budget (in seconds) after which the secondary provider is tried, and the number of threads running the requests. """
+
+		self.primary = primary
+		self.secondary = secondary
+		self.budget = budget
+		self.name = f'{primary.name}+{secondary.name}'
+		self.executor = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = 'hedge')
+		self.lock = Lock()
+		self.counters = {"requests" : 0, "hedged" : 0, "secondary_wins" : 0}
+
+	def call(self, provider, ipAddress, priority, trace):
+		""" This method runs the fetch of the provider mentioned in the arguments on a thread of the executor, with the phases timed into the trace of the lookup (if any). """
+
+		metrics.adopt(trace)
+		try:
+			return provider.fetch(ipAddress, priority)
+		finally:
+			metrics.adopt(None)
+
+	def fetch(self, ipAddress, priority = INTERACTIVE):
+		""" This method fetches the information about the IP address mentioned in the arguments from the primary provider, and hedges with the secondary provider once the latency budget is exceeded. The error of the primary provider is raised if both fail. """
+
+		with self.lock:
+			self.counters["requests"] += 1
+		primary = self.executor.submit(self.call, self.primary, ipAddress, priority, metrics.current())
+		done, pending = wait([primary], timeout = self.budget)
+		if done and primary.exception() is None:
+			return primary.result()
+
+		with self.lock:
+			self.counters["hedged"] += 1
+		secondary = self.executor.submit(self.call, self.secondary, ipAddress, priority, None)
+		futures = {primary, secondary}
+		while futures:
+			done, futures = wait(futures, return_when = FIRST_COMPLETED)
+			for future in done:
+				if future.exception() is None:
+					if future is secondary:
+						with self.lock:
+							self.counters["secondary_wins"] += 1
+					return future.result()
+		return primary.result()
+
+	def stats(self):
+		""" This method returns a copy of the counters. """
+
+		with self.lock:
+			return dict(self.counters)
+
+	def close(self):
+		""" This method stops the threads of the provider and closes both the providers. """
+
+		self.executor.shutdown(wait = False, cancel_futures = True)
+		self.primary.close()
+		self.secondary.close()
+
+def createProvider(spec, scheduler = None):
+	""" This function creates a provider from its textual specification, as used by the command line interface :
+	* 'ipinfo' -> the ipinfo.io API (HTTP), 'ipinfo:TOKEN' -> the same with an access token (HTTPS)
+	* 'ip-api' -> the ip-api.com API
+	* 'server' or 'server:HOST:PORT' -> the local API server of the tool (127.0.0.1:8000 by default, see iptracker.server)
+	* 'offline:FILE' -> the offline database file
+	* 'http://HOST/PATH' or 'https://HOST/PATH' -> any API responding in the ipinfo.io schema, the PATH being a template containing '{ip}' (defaults to '/{ip}')
+	ValueError is raised for an unknown specification. """
+
+	kind, separator, argument = spec.partition(':')
+	if kind == 'ipinfo':
+		return IpinfoProvider(https = bool(argument), token = argument or None, scheduler = scheduler)
+	if kind == 'ip-api':
+		return IpApiProvider(scheduler = scheduler)
+	if kind == 'server':
+		return ServerProvider(argument or '127.0.0.1:8000', scheduler = scheduler)
+	if kind == 'offline' and argument:
+		return OfflineProvider(argument)
+	if kind in ('http', 'https') and argument.startswith('//'):
+		host, slash, path = argument[2:].partition('/')
+		return HttpProvider(host, host, path = '/' + (path or '{ip}'), https = kind == 'https', scheduler = scheduler)
+	raise ValueError(f"Unknown provider '{spec}' (expected ipinfo, ipinfo:TOKEN, ip-api, server:HOST:PORT, offline:FILE or an http(s)://HOST/PATH template).")
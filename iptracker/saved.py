@@ -0,0 +1,182 @@
+"""
+IP Tracker - Saved results
+
+This module contains the store of the saved results (the lookups the user chose to keep). It replaces the single-slot 'fetched_data.json' file, which was overwritten on every save, with a SQLite database holding any number of records.
+"""
+
+# Importing the required functions and modules
+from json import loads, dumps
+from datetime import datetime
+from threading import Lock
+import os
+import sqlite3
+
+from iptracker.validation import normalizeIp
+
+# Defining the saved results store
+# ----
+# 1. The records are stored in a SQLite database file named 'saved.db' in the current working directory, one row per saved result. The row holds the IP address, the time of saving and a few summary columns (country, city, org) next to the full response, which is stored as compact JSON.
+# 2. The IP address column is indexed, thus finding the saved results of an IP address does not depend on the size of the store. A whole batch is saved in one transaction, thus the cost of a save does not grow with the store either.
+# 3. The listings read only the summary columns, page by page (keyset pagination on the row id), and the full response of a record is loaded only when it is opened.
+# 4. The old 'fetched_data.json' file (if any) is imported once on the first access, and then renamed to 'fetched_data.json.migrated'.
+# ----
+class SavedResults:
+	""" This class contains the saved results store of the application. Below are some of the steps to use the store :
+	* To save a result -> saved_results.save(response), returns the id of the record
+	* To save many results at once (a batch) -> saved_results.saveMany(responses), returns the number of records saved
+	* To find the saved results of an IP address -> saved_results.find(ipAddress), returns a list of tuples (id, timestamp, response) from the newest to the oldest
+	* To list the saved results page by page -> saved_results.query(prefix, after, limit), returns a list of rows (id, ip, timestamp, country, city, org)
+	* To load the full response of a record -> saved_results.get(recordId)
+	* To stream all the saved results (for the exports) -> saved_results.iterate() """
+
+	# The summary columns stored next to the full response, the keys are the same as those of the ipinfo.io response
+	summary = ('country', 'city', 'org')
+
+	def __init__(self, filename = 'saved.db', legacyFilename = 'fetched_data.json'):
+		""" The constructor takes the filename of the database and the filename of the old single-slot file to be imported. The database file is opened lazily on the first access. """
+
+		self.filename = filename
+		self.legacyFilename = legacyFilename
+		self.connection = None
+		self.lock = Lock()
+
+	def database(self):
+		""" This method returns the connection to the database, creating the table and the index (and importing the old single-slot file) on the first call. The caller must hold the lock. """
+
+		if self.connection is None:
+			self.connection = sqlite3.connect(self.filename, check_same_thread = False)
+			self.connection.executescript("""
+				CREATE TABLE IF NOT EXISTS saved (id INTEGER PRIMARY KEY, ip TEXT NOT NULL, timestamp REAL NOT NULL, country TEXT, city TEXT, org TEXT, response TEXT NOT NULL);
+				CREATE INDEX IF NOT EXISTS saved_ip ON saved (ip, id);
+			""")
+			self.migrate()
+		return self.connection
+
+	def migrate(self):
+		""" This method imports the record of the old single-slot file into the store, and renames the file so that it is imported only once. """
+
+		if self.legacyFilename is None or not os.path.isfile(self.legacyFilename):
+			return 0
+
+		try:
+			with open(self.legacyFilename, 'r') as file:
+				response = loads(file.read())
+			timestamp = datetime.strptime(response.pop("datetime"), '%a %b %d %H:%M:%S %Y').timestamp() if "datetime" in response else os.path.getmtime(self.legacyFilename)
+			self.insert([(response, timestamp)])
+			os.replace(self.legacyFilename, self.legacyFilename + '.migrated')
+		except (OSError, ValueError, AttributeError, sqlite3.Error):
+			# If the old file is unreadable, then we leave it as it is
+
+			pass
+
+	def insert(self, items):
+		""" This method inserts the (response, timestamp) tuples mentioned in the arguments in one transaction, and returns the id of the last inserted record. The caller must hold the lock. """
+
+		rows = []
+		for response, timestamp in items:
+			rows.append((normalizeIp(str(response.get("ip", ''))), timestamp) + tuple(str(response.get(key, '')) for key in self.summary) + (dumps(response, separators = (',', ':')),))
+		with self.connection:
+			self.connection.executemany('INSERT INTO saved (ip, timestamp, country, city, org, response) VALUES (?, ?, ?, ?, ?, ?)', rows)
+		return self.connection.execute('SELECT MAX(id) FROM saved').fetchone()[0]
+
+	def save(self, response):
+		""" This method saves the response (dict, the ipinfo.io response) mentioned in the arguments, and returns the id of the record. """
+
+		with self.lock:
+			self.database()
+			return self.insert([(response, datetime.now().timestamp())])
+
+	def saveMany(self, responses):
+		""" This method saves all the responses mentioned in the arguments (any iterable of dicts) in one transaction, and returns the number of records saved. """
+
+		timestamp = datetime.now().timestamp()
+		items = [(response, timestamp) for response in responses]
+		if len(items) == 0:
+			return 0
+		with self.lock:
+			self.database()
+			self.insert(items)
+		return len(items)
+
+	def find(self, ipAddress):
+		""" This method returns the saved results of the IP address mentioned in the arguments as a list of tuples (id, timestamp, response), from the newest to the oldest. """
+
+		with self.lock:
+			rows = self.database().execute('SELECT id, timestamp, response FROM saved WHERE ip = ? ORDER BY id DESC', (normalizeIp(ipAddress),)).fetchall()
+		return [(recordId, timestamp, loads(response)) for recordId, timestamp, response in rows]
+
+	def get(self, recordId):
+		""" This method returns the full response of the record mentioned in the arguments (along with the time of saving, under the key 'datetime'), or None if there is no such record. """
+
+		with self.lock:
+			row = self.database().execute('SELECT timestamp, response FROM saved WHERE id = ?', (recordId,)).fetchone()
+		if row is None:
+			return None
+		response = loads(row[1])
+		response["datetime"] = datetime.fromtimestamp(row[0]).ctime()
+		return response
+
+	def query(self, prefix = '', after = None, limit = 50):
+		""" This method returns a page of the saved results as a list of rows (id, ip, timestamp, country, city, org), from the newest to the oldest. The rows can be filtered by the IP address prefix. The after argument is the id of the last row of the previous page. """
+
+		conditions, parameters = [], []
+		if prefix:
+			# The prefix is matched using a range on the IP address, so that the index is used
+			conditions.append('ip >= ? AND ip < ?')
+			parameters += [prefix, prefix + '\uffff']
+		if after is not None:
+			conditions.append('id < ?')
+			parameters.append(after)
+
+		sql = 'SELECT id, ip, timestamp, country, city, org FROM saved'
+		if conditions:
+			sql += ' WHERE ' + ' AND '.join(conditions)
+		sql += ' ORDER BY id DESC LIMIT ?'
+		parameters.append(limit)
+
+		with self.lock:
+			return self.database().execute(sql, parameters).fetchall()
+
+	def iterate(self, size = 1000):
+		""" This method streams all the saved results as tuples (id, timestamp, response), from the oldest to the newest. The records are read page by page (size records at once, keyset pagination on the row id), thus the memory used does not depend on the size of the store. """
+
+		after = 0
+		while True:
+			with self.lock:
+				rows = self.database().execute('SELECT id, timestamp, response FROM saved WHERE id > ? ORDER BY id LIMIT ?', (after, size)).fetchall()
+			if len(rows) == 0:
+				return
+			for recordId, timestamp, response in rows:
+				yield recordId, timestamp, loads(response)
+			after = rows[-1][0]
+
+	def count(self):
+		""" This method returns the number of the saved results. """
+
+		with self.lock:
+			return self.database().execute('SELECT COUNT(*) FROM saved').fetchone()[0]
+
+	def delete(self, recordId):
+		""" This method deletes the record mentioned in the arguments. """
+
+		with self.lock:
+			with self.database():
+				self.connection.execute('DELETE FROM saved WHERE id = ?', (recordId,))
+
+	def clear(self):
+		""" This method deletes all the saved results. """
+
+		with self.lock:
+			with self.database():
+				self.connection.execute('DELETE FROM saved')
+
+	def close(self):
+		""" This method closes the connection to the database. """
+
+		with self.lock:
+			if self.connection is not None:
+				self.connection.close()
+				self.connection = None
+
+# The saved results store is shared by the graphical and the command line interfaces
+saved_results = SavedResults()
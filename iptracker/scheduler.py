@@ -0,0 +1,204 @@
+"""
+IP Tracker - Request scheduler
+
+This module contains the scheduler which sits in front of the HTTP layer and keeps the requests within the quota of the ipinfo.io API. The requests are paced by a token bucket, the rate limits signalled by the server (HTTP 429 along with a Retry-After header) pause all the requests for the time asked (up to the maximum backoff, beyond which the request fails fast), the failed requests are retried after a jittered exponential backoff, and the interactive lookups are always served ahead of the bulk (batch) lookups.
+"""
+
+# Importing the required functions and modules
+from threading import Condition
+from time import monotonic, sleep
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from http.client import HTTPException
+import heapq
+import random
+
+# The priority lanes of the requests, the lower value is served first
+INTERACTIVE = 0
+BATCH = 1
+
+# The HTTP statuses worth retrying (rate limited, and the temporary failures of the server)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class HTTPError(Exception):
+	""" This class contains the error raised for the responses of the server other than HTTP 200. The status and the Retry-After delay (in seconds, or None) of the response are kept as attributes, so that the scheduler can decide whether and when to retry. """
+
+	def __init__(self, message, status, retryAfter = None):
+		super().__init__(message)
+		self.status = status
+		self.retryAfter = retryAfter
+
+def parseRetryAfter(value):
+	""" This function parses the value of a Retry-After header (either a number of seconds or an HTTP date) and returns the delay in seconds, or None if the value is missing or invalid. """
+
+	if not value:
+		return None
+	value = value.strip()
+	if value.isdigit():
+		return float(value)
+	try:
+		return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+	except (TypeError, ValueError):
+		return None
+
+class TokenBucket:
+	""" This class contains a token bucket : the tokens are refilled at a constant rate (per second) up to the burst size, and each request takes one token. A rate of None means no limit. The bucket is not thread-safe by itself, it is guarded by the lock of the scheduler. """
+
+	def __init__(self, rate = None, burst = 1):
+		""" The constructor takes the refill rate (tokens per second, or None for no limit) and the burst size (the capacity of the bucket). The bucket starts full. """
+
+		self.rate = rate
+		self.burst = max(1, burst)
+		self.tokens = float(self.burst)
+		self.updated = monotonic()
+
+	def refill(self, now):
+		""" This method adds the tokens accumulated since the last refill. """
+
+		if self.rate is not None:
+			self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+		self.updated = now
+
+	def wait(self, now):
+		""" This method returns the number of seconds until a token is available (0 if one is available right now). """
+
+		if self.rate is None:
+			return 0.0
+		self.refill(now)
+		return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+	def take(self, now):
+		""" This method takes one token, the caller must have checked that one is available. """
+
+		if self.rate is not None:
+			self.refill(now)
+			self.tokens -= 1
+
+	def drain(self, now):
+		""" This method empties the bucket, so that the requests resume slowly after a rate limit. """
+
+		self.refill(now)
+		self.tokens = min(self.tokens, 0.0)
+
+# Defining the request scheduler
+# ----
+# 1. Before each request, the caller waits in a queue ordered by the priority lane (interactive first, then batch) and by the order of arrival. Only the head of the queue may take a token from the bucket, thus a waiting interactive lookup always gets the next token even if many batch lookups are already waiting.
+# 2. An HTTP 429 response pauses all the requests until the Retry-After delay has passed (or the backoff delay, if the server did not send one), and empties the bucket. A Retry-After delay longer than the maximum backoff is not waited for : the error is raised to the caller right away, and so is an HTTP 429 error to every other request until the pause ends. The other retryable failures (the temporary HTTP 5xx errors and the connection errors) delay only the failed request.
+# 3. The backoff delay doubles on each retry, up to a maximum, and is drawn uniformly between 0 and that value (the so called full jitter), so that many clients failing at the same time do not retry at the same time.
+# ----
+class RequestScheduler:
+	""" This class contains the request scheduler of the application. Below are some of the steps to use the scheduler :
+	* To send a request through the scheduler -> scheduler.run(function, priority), the function is retried as long as it raises a retryable error (HTTPError with a retryable status, or a connection error)
+	* To change the limits -> scheduler.configure(rate = ..., burst = ..., retries = ...)
+	* To fetch the counters -> scheduler.stats() """
+
+	def __init__(self, rate = None, burst = 10, retries = 4, backoff = 0.5, maxBackoff = 30.0):
+		""" The constructor takes the rate of the requests (per second, or None for no limit), the burst size, the maximum number of retries of a request and the base and the maximum backoff delays (in seconds). """
+
+		self.condition = Condition()
+		self.bucket = TokenBucket(rate, burst)
+		self.retries = retries
+		self.backoff = backoff
+		self.maxBackoff = maxBackoff
+		self.pausedUntil = 0.0
+		self.waiting = []
+		self.sequence = 0
+		self.random = random.Random()
+		self.counters = {"requests" : 0, "retries" : 0, "rate_limited" : 0, "throttled_seconds" : 0.0}
+
+	def configure(self, rate = None, burst = None, retries = None):
+		""" This method changes the rate (per second, or None for no limit), the burst size and the maximum number of retries. The arguments left to None keep their value, except the rate. """
+
+		with self.condition:
+			self.bucket = TokenBucket(rate, burst or self.bucket.burst)
+			if retries is not None:
+				self.retries = retries
+			self.condition.notify_all()
+
+	def acquire(self, priority = INTERACTIVE):
+		""" This method blocks until the caller may send a request in the priority lane mentioned in the arguments, and returns the number of seconds it has waited. If the requests are paused (on a rate limit) for longer than the maximum backoff, then an HTTPError (429) is raised right away instead. """
+
+		startTime = monotonic()
+		with self.condition:
+			self.sequence += 1
+			ticket = (priority, self.sequence)
+			heapq.heappush(self.waiting, ticket)
+			try:
+				while True:
+					now = monotonic()
+					if self.pausedUntil - now > self.maxBackoff:
+						# If the requests are paused for longer than the maximum backoff, then the request fails fast instead of waiting (or being sent and rate limited again)
+						remaining = self.pausedUntil - now
+						raise HTTPError(f'The requests are paused for {remaining:.0f} more seconds, as asked by the rate limit of the server.', 429, remaining)
+					delay = max(self.pausedUntil - now, self.bucket.wait(now))
+					if self.waiting[0] == ticket and delay <= 0:
+						heapq.heappop(self.waiting)
+						self.bucket.take(now)
+						self.counters["requests"] += 1
+						break
+					self.condition.wait(delay if self.waiting[0] == ticket else None)
+			except BaseException:
+				# If the waiting caller is interrupted, then we remove it from the queue
+				self.waiting.remove(ticket)
+				heapq.heapify(self.waiting)
+				raise
+			finally:
+				self.condition.notify_all()
+			waited = monotonic() - startTime
+			self.counters["throttled_seconds"] += waited
+		return waited
+
+	def pause(self, seconds):
+		""" This method pauses all the requests for the number of seconds mentioned in the arguments (on a rate limit), and empties the bucket. """
+
+		with self.condition:
+			now = monotonic()
+			self.pausedUntil = max(self.pausedUntil, now + seconds)
+			self.bucket.drain(now)
+			self.counters["rate_limited"] += 1
+			self.condition.notify_all()
+
+	def delay(self, attempt):
+		""" This method returns the jittered backoff delay (in seconds) before the retry number mentioned in the arguments (starting from 1). """
+
+		return self.random.uniform(0, min(self.maxBackoff, self.backoff * 2 ** (attempt - 1)))
+
+	def run(self, function, priority = INTERACTIVE, onWait = None):
+		""" This method calls the function mentioned in the arguments (sending one request) once the scheduler allows it, and returns its result. If the function raises a retryable error, then it is called again after the backoff delay, up to the maximum number of retries, after which the error is raised to the caller. The onWait(seconds) callback, if specified, is called with the time spent waiting before each attempt. """
+
+		attempt = 0
+		while True:
+			waited = self.acquire(priority)
+			if onWait is not None:
+				onWait(waited)
+			try:
+				return function()
+			except HTTPError as e:
+				if e.status == 429:
+					# If the request was rate limited, then we pause all the requests for the time asked by the server
+					self.pause(e.retryAfter if e.retryAfter is not None else self.delay(attempt + 1))
+				if e.status not in RETRY_STATUSES or attempt >= self.retries or (e.retryAfter or 0) > self.maxBackoff:
+					# If the server asks to wait longer than the maximum backoff, then we fail fast instead of stalling (the pause stays recorded, thus the other requests fail fast too, see acquire())
+					raise
+				attempt += 1
+				if e.status != 429:
+					sleep(e.retryAfter if e.retryAfter is not None else self.delay(attempt))
+			except (HTTPException, ConnectionError, TimeoutError):
+				if attempt >= self.retries:
+					raise
+				attempt += 1
+				sleep(self.delay(attempt))
+			with self.condition:
+				self.counters["retries"] += 1
+
+	def stats(self):
+		""" This method returns a copy of the counters, along with the number of the requests waiting. """
+
+		with self.condition:
+			stats = dict(self.counters)
+			stats["waiting"] = len(self.waiting)
+			stats["throttled_seconds"] = round(stats["throttled_seconds"], 3)
+		return stats
+
+# The request scheduler is shared by all the requests of the application. The default limits stay well below the quota of the ipinfo.io API, and can be changed using scheduler.configure() (or the --rate / --burst options of the command line interface).
+scheduler = RequestScheduler(rate = 20, burst = 40)
@@ -0,0 +1,250 @@
+"""
+IP Tracker - API server
+
+This module contains the local JSON API server of the tool. It exposes the lookup engine over HTTP, thus several analysts and scripts share one response cache, one request coalescing layer and one rate-limited client instead of each hitting the ipinfo.io API separately with a cold cache. Below are listed the endpoints served :
+1. GET /lookup/IP      -> The information about one IP address, in the normalized schema (the same as the ipinfo.io responses). The age of a cached response is sent in the X-Cache-Age header.
+2. POST /batch         -> The lookups of a list of IP addresses (a JSON list, or an object with an 'ips' list), answered at once as a JSON list of records.
+3. POST /stream        -> The same as /batch, but the records are streamed as NDJSON (chunked) as the lookups complete.
+4. GET /stats          -> The counters of the server, the cache, the request coalescing and the request scheduler.
+
+The errors are answered in the same shape as those of the ipinfo.io API ({"error" : {"title" : ..., "message" : ...}}), thus the server can itself be used as a provider (see iptracker.providers.ServerProvider). To run the server -> python3 main.py serve [--port 8000].
+"""
+
+# Importing the required functions and modules
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread, Lock
+from urllib.parse import urlsplit, unquote
+from json import loads, dumps
+
+from iptracker.lookup import lookupIp, lookupMany, flight
+from iptracker.cache import cache
+from iptracker.scheduler import scheduler, HTTPError, INTERACTIVE, BATCH
+from iptracker.history import history_log, historyItem
+from iptracker.validation import screenIps
+
+# The maximum size of a request body (in bytes), and the maximum number of IP addresses of a /batch request (the /stream requests are bounded only by the size of the body)
+MAX_BODY = 16 * 1024 * 1024
+MAX_BATCH = 10000
+
+def errorBody(title, message):
+	""" This function returns the body (bytes) of an error response, in the same shape as the errors of the ipinfo.io API. """
+
+	return dumps({"error" : {"title" : title, "message" : message}}).encode()
+
+def resultRecord(ipAddress, response, age, error):
+	""" This function returns the record (dict) of a lookup in the batch responses : the IP address, along with either the response, whether it came from the cache and its age, or the error. """
+
+	if error is not None:
+		return {"ip" : ipAddress, "error" : f'{error}'}
+	return {"ip" : ipAddress, "data" : response, "cached" : age is not None, "age" : age}
+
+class ApiHTTPServer(ThreadingHTTPServer):
+	""" This class contains the threaded HTTP server of the API, with a longer backlog of the pending connections (for the bursts of clients connecting at once) than the default one. """
+
+	request_queue_size = 256
+	daemon_threads = True
+
+# Defining the API server
+# ----
+# 1. The server is a threaded HTTP/1.1 server (keep-alive), one thread per connection, thus hundreds of clients can be connected at once. The lookups of all the clients go through the same lookup function, thus they share the response cache (a miss of one client is a hit for the others), the request coalescing (the concurrent lookups of the same IP address from different clients send one request) and the request scheduler (the rate limit of the upstream API applies to the server as a whole).
+# 2. A single lookup runs on the thread of its connection. The lookups of the batches run on one pool of worker threads shared by all the clients, each batch keeping at most perRequest lookups in flight, thus the number of threads does not grow with the number of batches.
+# 3. The IP addresses of the batches are validated and deduplicated first, the rejected ones are answered with their errors without any lookup. The successful lookups are recorded to the overall history (unless disabled).
+# ----
+class ApiServer:
+	""" This class contains the local JSON API server. Below are some of the steps to use the server :
+	* To create the server -> server = ApiServer(host = '127.0.0.1', port = 8000, workers = 32)
+	* To serve in the foreground -> server.serveForever(), or in a background thread -> server.start()
+	* To fetch the counters of the server -> server.stats()
+	* To stop the server -> server.stop() """
+
+	def __init__(self, host = '127.0.0.1', port = 8000, workers = 32, perRequest = 8, history = True):
+		""" The constructor takes the address and the port to listen on (0 for a free port), the number of the worker threads shared by the batches, the maximum number of lookups in flight per batch, and whether to record the lookups to the overall history. """
+
+		self.workers = workers
+		self.perRequest = perRequest
+		self.history = history
+		self.executor = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = 'serve')
+		self.lock = Lock()
+		self.counters = {"requests" : 0, "lookups" : 0, "errors" : 0, "active" : 0}
+		self.server = ApiHTTPServer((host, port), self.handler())
+		self.thread = None
+
+	@property
+	def address(self):
+		""" This property returns the 'host:port' the server listens on. """
+
+		host, port = self.server.server_address[:2]
+		return f'{host}:{port}'
+
+	def count(self, **increments):
+		""" This method adds the increments mentioned in the arguments to the counters. """
+
+		with self.lock:
+			for key, value in increments.items():
+				self.counters[key] += value
+
+	def handler(self):
+		""" This method returns the request handler class bound to this server. """
+
+		api = self
+
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = 'HTTP/1.1'
+			disable_nagle_algorithm = True
+
+			def reply(self, status, body, headers = None, contentType = 'application/json; charset=utf-8'):
+				# Sending a whole response at once
+				self.send_response(status)
+				self.send_header('Content-Type', contentType)
+				self.send_header('Content-Length', str(len(body)))
+				for key, value in (headers or {}).items():
+					self.send_header(key, value)
+				self.end_headers()
+				self.wfile.write(body)
+
+			def readAddresses(self):
+				# Reading the IP addresses of a batch from the body (a JSON list, or an object with an 'ips' list), or returning None after replying with the error
+				length = int(self.headers.get('Content-Length') or 0)
+				if length > MAX_BODY:
+					self.close_connection = True
+					self.reply(413, errorBody('Request too large', f'The body of the request is larger than {MAX_BODY} bytes.'))
+					return None
+				try:
+					data = loads(self.rfile.read(length) or b'null')
+					ipAddresses = data.get("ips") if isinstance(data, dict) else data
+					if not isinstance(ipAddresses, list) or not all(isinstance(ipAddress, str) for ipAddress in ipAddresses):
+						raise ValueError
+				except ValueError:
+					self.reply(400, errorBody('Invalid request', "The body must be a JSON list of IP addresses, or an object with an 'ips' list."))
+					return None
+				return ipAddresses
+
+			def do_GET(self):
+				path = urlsplit(self.path).path
+				api.count(requests = 1, active = 1)
+				try:
+					if path.startswith('/lookup/'):
+						self.reply(*api.lookup(unquote(path[len('/lookup/'):])))
+					elif path == '/stats':
+						self.reply(200, dumps(api.stats()).encode())
+					else:
+						self.reply(404, errorBody('Wrong endpoint', 'The endpoints are GET /lookup/IP, POST /batch, POST /stream and GET /stats.'))
+				finally:
+					api.count(active = -1)
+
+			def do_POST(self):
+				path = urlsplit(self.path).path
+				api.count(requests = 1, active = 1)
+				try:
+					if path not in ('/batch', '/stream'):
+						self.reply(404, errorBody('Wrong endpoint', 'The endpoints are GET /lookup/IP, POST /batch, POST /stream and GET /stats.'))
+						return
+					ipAddresses = self.readAddresses()
+					if ipAddresses is None:
+						return
+					if path == '/batch':
+						if len(ipAddresses) > MAX_BATCH:
+							self.reply(413, errorBody('Batch too large', f'A batch holds at most {MAX_BATCH} IP addresses, use POST /stream for the larger ones.'))
+							return
+						self.reply(200, dumps(list(api.lookupBatch(ipAddresses))).encode())
+						return
+
+					# Streaming the records as NDJSON, one chunk per record, as the lookups complete
+					self.send_response(200)
+					self.send_header('Content-Type', 'application/x-ndjson')
+					self.send_header('Transfer-Encoding', 'chunked')
+					self.end_headers()
+					for item in api.lookupBatch(ipAddresses):
+						line = (dumps(item) + '\n').encode()
+						self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line))
+						self.wfile.flush()
+					self.wfile.write(b'0\r\n\r\n')
+				except (BrokenPipeError, ConnectionResetError):
+					# If the client went away in the middle of a stream, then we drop the connection
+					self.close_connection = True
+				finally:
+					api.count(active = -1)
+
+			def log_message(self, format, *arguments):
+				# The requests are not logged to the console
+				pass
+
+		return Handler
+
+	def record(self, ipAddress, response):
+		""" This method records a successful lookup to the overall history, unless disabled. """
+
+		self.count(lookups = 1)
+		if self.history:
+			history_log.append(historyItem(ipAddress, response))
+
+	def lookup(self, ipAddress):
+		""" This method looks up one IP address, and returns the tuple (status, body, headers) of the response : the response in the normalized schema, or the error (HTTP 400 for the invalid or non-public addresses, the status of the upstream API for its rate limits, HTTP 502 for the other failures). """
+
+		try:
+			response, age = lookupIp(ipAddress, INTERACTIVE)
+		except ValueError as e:
+			self.count(errors = 1)
+			return 400, errorBody('Invalid IP address', f'{e}'), {}
+		except HTTPError as e:
+			self.count(errors = 1)
+			if e.status == 429:
+				return 429, errorBody('Rate limit exceeded', f'{e}'), {"Retry-After" : str(round(e.retryAfter or 1))}
+			return 502, errorBody('Upstream error', f'{e}'), {}
+		except Exception as e:
+			self.count(errors = 1)
+			return 502, errorBody('Upstream error', f'{e}'), {}
+
+		self.record(ipAddress, response)
+		return 200, dumps(response).encode(), {"X-Cache-Age" : 'none' if age is None else f'{age:.3f}'}
+
+	def lookupBatch(self, ipAddresses):
+		""" This method looks up the IP addresses of a batch on the shared worker pool, and yields the record of each lookup (see resultRecord()) as soon as it completes. The rejected IP addresses are yielded first, without any lookup. """
+
+		valid = []
+		for ipAddress, error in screenIps(ipAddresses):
+			if error is None:
+				valid.append(ipAddress)
+			else:
+				self.count(errors = 1)
+				yield resultRecord(ipAddress, None, None, error)
+
+		for ipAddress, response, age, error in lookupMany(valid, workers = self.perRequest, priority = BATCH, executor = self.executor):
+			if error is None:
+				self.record(ipAddress, response)
+			else:
+				self.count(errors = 1)
+			yield resultRecord(ipAddress, response, age, error)
+
+	def stats(self):
+		""" This method returns the counters of the server (requests, lookups, errors, connections being served) along with those of the cache, the request coalescing and the request scheduler. """
+
+		with self.lock:
+			stats = {f'server_{key}' : value for key, value in self.counters.items()}
+		stats.update(cache.stats())
+		stats.update(flight.stats())
+		stats.update({f'scheduler_{key}' : value for key, value in scheduler.stats().items()})
+		return stats
+
+	def serveForever(self):
+		""" This method serves the requests in the current thread, until the server is stopped. """
+
+		self.server.serve_forever()
+
+	def start(self):
+		""" This method starts serving the requests in a background thread, and returns the server itself. """
+
+		self.thread = Thread(target = self.server.serve_forever, name = 'api-server', daemon = True)
+		self.thread.start()
+		return self
+
+	def stop(self):
+		""" This method stops the server, and waits for the lookups in flight. """
+
+		if self.thread is not None:
+			self.server.shutdown()
+		self.server.server_close()
+		self.executor.shutdown(wait = True, cancel_futures = True)
+		if self.history:
+			history_log.close()
@@ -0,0 +1,186 @@
+"""
+IP Tracker - Subnet sweep
+
+This module contains the sweep of a whole network (CIDR, like 8.8.8.0/22) : every host address of the network is enriched, while as few lookups as possible are sent. Once a lookup returns the network range the address belongs to (like the route of its ASN), the results of all the other hosts covered by that range are inferred from it, and those hosts are not looked up at all. The hosts are probed from the coarse to the fine, so that the probes spread over the network before they fill it.
+"""
+
+# Importing the required functions and modules
+from ipaddress import ip_network, IPv4Address, IPv6Address
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from iptracker.validation import parseNetwork, specialReason, SPECIAL_IPV4_RANGES
+from iptracker.scheduler import BATCH
+
+# The largest number of hosts a sweep accepts (a /16 IPv4 network)
+MAX_HOSTS = 65536
+
+def responseRange(response, assumePrefix = None):
+	""" This function returns the network range (ipaddress network) the response mentioned in the arguments applies to, or None if it is not known. The range is read from the route of the ASN (the 'asn' object of the ipinfo.io responses with a token), or the 'route' / 'network' keys of the other providers. If assumePrefix is specified, then the responses holding an org but no range are assumed to apply to the whole network of that prefix length around the address. """
+
+	asn = response.get("asn")
+	route = (asn.get("route") if isinstance(asn, dict) else None) or response.get("route") or response.get("network")
+	if route:
+		try:
+			return ip_network(str(route), strict = False)
+		except ValueError:
+			pass
+	if assumePrefix is not None and response.get("org") and response.get("ip"):
+		try:
+			return ip_network(f'{response["ip"]}/{assumePrefix}', strict = False)
+		except ValueError:
+			return None
+	return None
+
+def probeOrder(count):
+	""" This function yields the indexes 0 .. count - 1 from the coarse to the fine : 0 first, then the middle, then the quarters, and so on. Thus, the first probes are spread evenly over the network. """
+
+	if count <= 0:
+		return
+	yield 0
+	step = 1 << count.bit_length()
+	while step > 1:
+		step //= 2
+		yield from range(step, count, 2 * step)
+
+# Defining the subnet sweep
+# ----
+# 1. The state of each host of the network is kept in a bytearray (0 for unknown, 1 for probed, 2 for inferred, 3 for skipped as not public), thus a sweep of a /16 network takes 64 KB.
+# 2. The next host to probe is the next unknown host in the coarse-to-fine order. As the results arrive, the hosts covered by the range of each result are marked as inferred, thus they are skipped when their turn comes.
+# 3. The inferred results are copies of the probed result, without the host-specific fields (the hostname), along with the probed address they were inferred from (the 'inferred_from' key). They are neither cached nor recorded as lookups.
+# ----
+class SubnetSweep:
+	""" This class contains the sweep of a network. Below are some of the steps to use it :
+	* To create the sweep -> SubnetSweep('8.8.8.0/22', assumePrefix = None), ValueError is raised for the invalid, non-public or too large networks
+	* To run the sweep through the lookup pipeline -> for ipAddress, response, age, error in sweep.results(workers = 8): ..., the inferred results being streamed along with the probed ones
+	* To drive the sweep from an event loop (like the graphical interface) -> sweep.next() returns the next address to probe (or None), and sweep.record(ipAddress, response, age) / sweep.fail(ipAddress) report the result of a probe, record() returning the list of the results inferred from it
+	* To fetch the counters -> sweep.stats(), including the number of upstream calls saved compared with a lookup per host """
+
+	def __init__(self, network, assumePrefix = None):
+		""" The constructor takes the network (CIDR) to be swept, and optionally the prefix length assumed for the results which hold no range (see responseRange()). """
+
+		self.network = parseNetwork(network) if isinstance(network, str) else network
+
+		# Finding the range of the host addresses, the same as those of network.hosts() (the network and the broadcast addresses are not hosts, except in the smallest networks)
+		self.first, self.count = int(self.network.network_address), self.network.num_addresses
+		if self.network.version == 4 and self.network.prefixlen < 31:
+			self.first, self.count = self.first + 1, self.count - 2
+		elif self.network.version == 6 and self.network.prefixlen < 127:
+			self.first, self.count = self.first + 1, self.count - 1
+		if self.count > MAX_HOSTS:
+			raise ValueError(f'{self.network} is too large to be swept (at most {MAX_HOSTS} addresses).')
+
+		self.assumePrefix = assumePrefix
+		self.state = bytearray(self.count)
+		skipped = self.skipSpecial()
+		if skipped == self.count:
+			raise ValueError(f'{self.network} is a {specialReason(self.network.network_address)} network, thus there is no public information about it.')
+		self.order = probeOrder(self.count)
+		self.cancelled = False
+		self.lock = Lock()
+		self.counters = {"hosts" : self.count, "skipped" : skipped, "probed" : 0, "fetched" : 0, "cached" : 0, "inferred" : 0, "errors" : 0}
+
+	def skipSpecial(self):
+		""" This method marks the hosts which are not public (like those of a documentation or a private range partly overlapping the network) as skipped, so that they are neither probed nor inferred, and returns their number. """
+
+		if self.network.version == 4:
+			# The IPv4 special ranges are marked span by span
+			for start, end, reason in SPECIAL_IPV4_RANGES:
+				first, last = max(start - self.first, 0), min(end - self.first, self.count - 1)
+				if first <= last:
+					self.state[first : last + 1] = b'\x03' * (last - first + 1)
+		elif specialReason(self.network.network_address) is not None:
+			# The IPv6 special ranges are networks far larger than a sweep (at most a /112), and the networks are either nested or disjoint, thus the network is either all special or all public
+			self.state[:] = b'\x03' * self.count
+		return self.state.count(3)
+
+	def address(self, index):
+		""" This method returns the host address (string) at the index mentioned in the arguments. """
+
+		return str((IPv4Address if self.network.version == 4 else IPv6Address)(self.first + index))
+
+	def next(self):
+		""" This method returns the next host address to be probed, or None if there is none left (all the hosts are probed or inferred, or the sweep is cancelled). """
+
+		with self.lock:
+			for index in self.order:
+				if self.cancelled:
+					return None
+				if self.state[index] == 0:
+					self.state[index] = 1
+					self.counters["probed"] += 1
+					return self.address(index)
+			return None
+
+	def record(self, ipAddress, response, age = None):
+		""" This method reports the successful probe of the address mentioned in the arguments, and returns the list of the results (ipAddress, response) inferred for the other hosts covered by the range of the response. """
+
+		inferred = []
+		with self.lock:
+			self.counters["fetched" if age is None else "cached"] += 1
+			network = responseRange(response, self.assumePrefix)
+			if network is None or network.version != self.network.version or not self.network.overlaps(network):
+				return inferred
+
+			start = max(0, int(network.network_address) - self.first)
+			end = min(self.count - 1, int(network.broadcast_address) - self.first)
+			template = {key : value for key, value in response.items() if key not in ('ip', 'hostname')}
+			for index in range(start, end + 1):
+				if self.state[index] == 0:
+					self.state[index] = 2
+					address = self.address(index)
+					inferred.append((address, dict(template, ip = address, inferred_from = ipAddress)))
+			self.counters["inferred"] += len(inferred)
+		return inferred
+
+	def fail(self, ipAddress):
+		""" This method reports the failed probe of the address mentioned in the arguments. """
+
+		with self.lock:
+			self.counters["errors"] += 1
+
+	def cancel(self):
+		""" This method stops the sweep : next() returns None from now on. """
+
+		self.cancelled = True
+
+	def stats(self):
+		""" This method returns a copy of the counters : the number of hosts (and of those skipped as not public), of probes (fetched from the server, served from the cache, or failed), of inferred results, and of the upstream calls saved compared with a lookup per public host (the inferred results and the cache hits, the failed probes having reached the server too). """
+
+		with self.lock:
+			stats = dict(self.counters)
+		stats["calls_saved"] = stats["inferred"] + stats["cached"]
+		return stats
+
+	def results(self, workers = 8, priority = BATCH):
+		""" This method runs the sweep through the lookup function (cache, single-flight, scheduler), with at most the given number of probes in flight at once. It yields a tuple (ipAddress, response, age, error) for each probe as soon as it completes, followed by the results inferred from it (whose age is None and response holds the 'inferred_from' key), in the same shape as lookupMany(). """
+
+		from iptracker.lookup import lookupIp
+
+		with ThreadPoolExecutor(max_workers = workers, thread_name_prefix = 'sweep') as executor:
+			inFlight = {}
+
+			def feed():
+				# Submitting the next probes until the number of probes in flight reaches the limit
+				while len(inFlight) < workers:
+					ipAddress = self.next()
+					if ipAddress is None:
+						break
+					inFlight[executor.submit(lookupIp, ipAddress, priority)] = ipAddress
+
+			feed()
+			while inFlight:
+				done, pending = wait(inFlight, return_when = FIRST_COMPLETED)
+				for future in done:
+					ipAddress = inFlight.pop(future)
+					try:
+						response, age = future.result()
+					except Exception as e:
+						self.fail(ipAddress)
+						yield ipAddress, None, None, e
+						continue
+					inferred = self.record(ipAddress, response, age)
+					yield ipAddress, response, age, None
+					for address, result in inferred:
+						yield address, result, None, None
+				feed()
@@ -0,0 +1,188 @@
+"""
+IP Tracker - Validation
+
+This module contains the validation and normalization stage of the lookups. The user entered IP addresses are parsed (IPv4, IPv6 and CIDR networks), converted to their canonical form (so that ' 1.1.1.1 ' and '1.1.1.1' are the same key for the history and the cache), and the private / reserved addresses are flagged before any request is sent to the server. For the large batches, the IPv4 addresses are packed into uint32 arrays and checked in one vectorized pass when NumPy is installed.
+"""
+
+# Importing the required functions and modules
+from ipaddress import ip_address, ip_network, IPv4Address
+from socket import inet_aton, inet_ntoa
+import re
+
+# The minimum number of the addresses validated at once for which the vectorized path is used. NumPy is imported lazily on the first such batch (see loadNumpy()), thus the single lookups (and the startup of the command line interface) do not pay for loading it.
+VECTORIZE_MIN = 256
+
+numpyModule = False  # Not imported yet
+
+def loadNumpy():
+	""" This function imports NumPy on the first call, and returns the module (or None if NumPy is not installed, as it is optional). """
+
+	global numpyModule
+	if numpyModule is False:
+		try:
+			import numpy as module
+		except ImportError:
+			# NumPy is optional, the bulk validation falls back to validating each address
+			module = None
+		numpyModule = module
+	return numpyModule
+
+# The special (non-public) IPv4 ranges, along with the reason they are flagged for. ipinfo.io does not have any information about these addresses, thus they are rejected before any request.
+SPECIAL_IPV4 = [
+	('0.0.0.0/8', 'reserved'),
+	('10.0.0.0/8', 'private'),
+	('100.64.0.0/10', 'shared (carrier-grade NAT)'),
+	('127.0.0.0/8', 'loopback'),
+	('169.254.0.0/16', 'link-local'),
+	('172.16.0.0/12', 'private'),
+	('192.0.0.0/24', 'reserved'),
+	('192.0.2.0/24', 'documentation'),
+	('192.168.0.0/16', 'private'),
+	('198.18.0.0/15', 'benchmarking'),
+	('198.51.100.0/24', 'documentation'),
+	('203.0.113.0/24', 'documentation'),
+	('224.0.0.0/4', 'multicast'),
+	('240.0.0.0/4', 'reserved'),
+	]
+SPECIAL_IPV4_RANGES = [(int(ip_network(network).network_address), int(ip_network(network).broadcast_address), reason) for network, reason in SPECIAL_IPV4]
+
+# The strict dotted-quad form of the IPv4 addresses (no leading zeros, no shortened forms), used by the bulk path before packing
+IPV4_PATTERN = re.compile(r'(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)')
+
+def normalizeIp(ipAddress):
+	""" This function returns the normalized form of the IP address mentioned in the arguments (whitespaces stripped, and the canonical form for valid IPv4 / IPv6 addresses), which is used as the key for the cache and the history. Invalid addresses are returned stripped and lowered, without raising any error. """
+
+	ipAddress = ipAddress.strip()
+	try:
+		return str(ip_address(ipAddress))
+	except ValueError:
+		# If the IP address is not a valid one, then we just lower its case
+
+		return ipAddress.lower()
+
+def specialReason(address):
+	""" This function returns the reason (like 'private', 'loopback') if the address (ipaddress object) mentioned in the arguments is not a public one, or None if it is a public address. """
+
+	if isinstance(address, IPv4Address):
+		value = int(address)
+		for start, end, reason in SPECIAL_IPV4_RANGES:
+			if start <= value <= end:
+				return reason
+		return None
+
+	if address.ipv4_mapped is not None:
+		return specialReason(address.ipv4_mapped)
+	for attribute, reason in (('is_unspecified', 'unspecified'), ('is_loopback', 'loopback'), ('is_link_local', 'link-local'), ('is_multicast', 'multicast'), ('is_private', 'private'), ('is_reserved', 'reserved')):
+		if getattr(address, attribute):
+			return reason
+	if not address.is_global:
+		return 'reserved'
+	return None
+
+def validateIp(ipAddress):
+	""" This function validates the IP address mentioned in the arguments and returns its canonical form. ValueError is raised (with a message fit to be displayed to the user) if the input is not a valid IP address, if it is a network (CIDR) instead of a single address, or if it is a private / reserved address. """
+
+	text = ipAddress.strip()
+	if text == '':
+		raise ValueError('Please enter an IP address.')
+	if '/' in text:
+		try:
+			network = ip_network(text, strict = False)
+		except ValueError:
+			raise ValueError(f'{text} is not a valid IP address or network.') from None
+		raise ValueError(f'{network} is a network (CIDR), not a single IP address.')
+
+	try:
+		address = ip_address(text)
+	except ValueError:
+		raise ValueError(f'{text} is not a valid IPv4 / IPv6 address.') from None
+
+	reason = specialReason(address)
+	if reason is not None:
+		raise ValueError(f'{address} is a {reason} address, thus there is no public information about it.')
+	return str(address)
+
+def parseNetwork(network):
+	""" This function parses the network (CIDR, like 203.0.113.0/24) mentioned in the arguments and returns the ipaddress network object. The host bits are allowed to be set (they are masked off). ValueError is raised for invalid networks. """
+
+	try:
+		return ip_network(network.strip(), strict = False)
+	except ValueError:
+		raise ValueError(f'{network.strip()} is not a valid network (CIDR).') from None
+
+def validateMany(ipAddresses):
+	""" This function validates many IP addresses at once, and returns a list of tuples (canonical address, None) for the valid ones and (input, error message) for the invalid ones, in the order of the input. If NumPy is installed and there are at least VECTORIZE_MIN inputs, then the dotted IPv4 addresses are packed into a uint32 array and checked against the special ranges in one vectorized pass, while the other inputs go through validateIp() one by one. """
+
+	ipAddresses = [ipAddress.strip() for ipAddress in ipAddresses]
+	results = [None] * len(ipAddresses)
+	remaining = range(len(ipAddresses))
+
+	numpy = loadNumpy() if len(ipAddresses) >= VECTORIZE_MIN else None
+	if numpy is not None:
+		# Packing the strict dotted IPv4 addresses into a uint32 array
+		packed, positions, remaining = [], [], []
+		match = IPV4_PATTERN.fullmatch
+		for index, ipAddress in enumerate(ipAddresses):
+			if match(ipAddress):
+				packed.append(inet_aton(ipAddress))
+				positions.append(index)
+			else:
+				remaining.append(index)
+
+		if packed:
+			values = numpy.frombuffer(b''.join(packed), dtype = '>u4')
+			reasons = numpy.full(len(values), -1, dtype = numpy.int8)
+			for number, (start, end, reason) in enumerate(SPECIAL_IPV4_RANGES):
+				reasons[(values >= start) & (values <= end)] = number
+
+			for index, reason in zip(positions, reasons.tolist()):
+				if reason < 0:
+					results[index] = (ipAddresses[index], None)
+				else:
+					results[index] = (ipAddresses[index], f'{ipAddresses[index]} is a {SPECIAL_IPV4_RANGES[reason][2]} address, thus there is no public information about it.')
+
+	for index in remaining:
+		try:
+			results[index] = (validateIp(ipAddresses[index]), None)
+		except ValueError as e:
+			results[index] = (ipAddresses[index], f'{e}')
+	return results
+
+def screenIps(ipAddresses, dedupe = True, chunkSize = 65536):
+	""" This function streams the IP addresses mentioned in the arguments (any iterable, consumed lazily in chunks) through the validation stage, and yields a tuple (canonical address, None) for each valid address and (input, error message) for each invalid one. If dedupe is True, then the repeated addresses (after the normalization) are yielded only once. """
+
+	seen = set()
+	chunk = []
+
+	def flush():
+		for ipAddress, error in validateMany(chunk):
+			if error is None and dedupe:
+				if ipAddress in seen:
+					continue
+				seen.add(ipAddress)
+			yield ipAddress, error
+
+	for ipAddress in ipAddresses:
+		chunk.append(ipAddress)
+		if len(chunk) >= chunkSize:
+			yield from flush()
+			chunk = []
+	if chunk:
+		yield from flush()
+
+def packIpv4(ipAddresses):
+	""" This function packs the dotted IPv4 addresses mentioned in the arguments into a NumPy uint32 array (native byte order), along with a boolean array marking which inputs were valid (the invalid ones are packed as 0). NumPy is required. """
+
+	numpy = loadNumpy()
+	if numpy is None:
+		raise RuntimeError('NumPy is required for packing the IPv4 addresses.')
+
+	match = IPV4_PATTERN.fullmatch
+	valid = numpy.fromiter((match(ipAddress.strip()) is not None for ipAddress in ipAddresses), dtype = bool, count = len(ipAddresses))
+	packed = b''.join(inet_aton(ipAddress.strip()) if ok else b'\0\0\0\0' for ipAddress, ok in zip(ipAddresses, valid.tolist()))
+	return numpy.frombuffer(packed, dtype = '>u4').astype(numpy.uint32), valid
+
+def unpackIpv4(values):
+	""" This function returns the dotted form of the IPv4 addresses packed as integers (any iterable of integers). """
+
+	return [inet_ntoa(value.to_bytes(4, 'big')) for value in values]
@@ -0,0 +1,54 @@
+"""
+IP Tracker - Tests of the request scheduler
+
+These tests run the requests against the local stub server (see iptracker.benchmark), thus they never touch the live API. To run the tests -> python3 -m unittest discover tests
+"""
+
+# Importing the required functions and modules
+from time import monotonic
+import unittest
+
+from iptracker.benchmark import StubServer
+from iptracker.lookup import ConnectionPool
+from iptracker.providers import IpinfoProvider
+from iptracker.scheduler import RequestScheduler, HTTPError
+
+class RetryAfterTest(unittest.TestCase):
+	""" This class contains the tests of the rate limits whose Retry-After delay is longer than the maximum backoff. """
+
+	def setUp(self):
+		# Every request of the stub server is rate limited, with a Retry-After of one hour
+		self.server = StubServer(rateLimitRate = 1.0, retryAfter = 3600).start()
+		self.scheduler = RequestScheduler(retries = 4, backoff = 0.05, maxBackoff = 2.0)
+		self.provider = IpinfoProvider(pool = ConnectionPool(host = self.server.host), scheduler = self.scheduler)
+
+	def tearDown(self):
+		self.provider.close()
+		self.server.stop()
+
+	def test_long_retry_after_fails_fast(self):
+		""" The rate limited request is not retried, and fails right away with the HTTP 429 error. """
+
+		start = monotonic()
+		with self.assertRaises(HTTPError) as context:
+			self.provider.fetch('8.8.8.8')
+		self.assertEqual(context.exception.status, 429)
+		self.assertLess(monotonic() - start, 1.0)
+		self.assertEqual(self.server.stats(), {"429" : 1})
+
+	def test_later_requests_do_not_reach_the_server(self):
+		""" Once the server has asked to pause for longer than the maximum backoff, the other requests fail fast without being sent. """
+
+		with self.assertRaises(HTTPError):
+			self.provider.fetch('8.8.8.8')
+		self.assertEqual(self.server.stats(), {"429" : 1})
+
+		with self.assertRaises(HTTPError) as context:
+			self.provider.fetch('1.1.1.1')
+		self.assertEqual(context.exception.status, 429)
+		self.assertGreater(context.exception.retryAfter, 3500)
+		self.assertEqual(self.server.stats(), {})
+		self.assertEqual(self.scheduler.stats()["waiting"], 0)
+
+if __name__ == '__main__':
+	unittest.main()